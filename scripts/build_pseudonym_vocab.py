@@ -0,0 +1,47 @@
+"""
+Regenerate src/stupiphi/transformation/pseudonym_vocab.py from Faker's en_US providers.
+
+The pseudonymizer indexes these tables directly instead of constructing Faker per value;
+rerun this only to refresh the vocabulary (it changes every pseudonym).
+
+  python scripts/build_pseudonym_vocab.py
+"""
+from __future__ import annotations
+
+import textwrap
+from pathlib import Path
+
+from faker.providers.address.en_US import Provider as AddressProvider
+from faker.providers.person.en_US import Provider as PersonProvider
+
+OUT = Path(__file__).resolve().parents[1] / "src" / "stupiphi" / "transformation" / "pseudonym_vocab.py"
+
+
+def _table(name: str, words) -> str:
+    words = sorted(set(words))
+    assert all(w.isalpha() for w in words), name
+    body = textwrap.fill(" ".join(words), width=96, break_long_words=False)
+    return f'{name} = tuple(\n    """\n{textwrap.indent(body, "    ")}\n    """.split()\n)\n'
+
+
+def main() -> None:
+    tables = [
+        _table("FIRST_NAMES", list(PersonProvider.first_names_female) + list(PersonProvider.first_names_male)),
+        _table("LAST_NAMES", PersonProvider.last_names),
+        _table("STREET_SUFFIXES", AddressProvider.street_suffixes),
+        _table("CITY_PREFIXES", AddressProvider.city_prefixes),
+        _table("CITY_SUFFIXES", AddressProvider.city_suffixes),
+        _table("STATES", AddressProvider.states_abbr),
+    ]
+    header = (
+        '"""\n'
+        "Vocabulary for stable pseudonyms (en_US names, street and city parts, state codes).\n"
+        "Generated from Faker's en_US providers by scripts/build_pseudonym_vocab.py; do not edit.\n"
+        '"""\n'
+    )
+    OUT.write_text(header + "\n" + "\n".join(tables), encoding="utf-8")
+    print(f"wrote {OUT}")
+
+
+if __name__ == "__main__":
+    main()
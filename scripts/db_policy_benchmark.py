@@ -0,0 +1,116 @@
+"""
+database_policy replay benchmark.
+
+Times the compiled, column-wise DbPolicy against the previous row-by-row implementation
+(re-read the policy and call stable_pseudonym per row) on synthetic payment and appointment
+tables, and checks both produce the same rows. Exits 1 on a mismatch.
+
+  python scripts/db_policy_benchmark.py [--rows 10000 50000]
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from stupiphi.slice.apply_db_policy import REDACTED, DbPolicy, _column_to_field_kind  # noqa: E402
+from stupiphi.transformation.pseudonymizer import stable_pseudonym  # noqa: E402
+
+POLICY = {
+    "payments": {"last4": "mask", "method": "redact", "card_holder": "pseudonymize", "token": "placeholder"},
+    "appointments": {"notes": "preserve", "therapist_email": "pseudonymize", "room": "redact"},
+}
+PLACEHOLDERS = {"payments.token": "dev-token"}
+SALT = "bench-salt"
+
+
+def _previous_row(
+    table_name: str, row: Dict[str, Any], policy_config, salt: Optional[str], placeholders
+) -> Dict[str, Any]:
+    """The pre-compilation apply_db_policy_to_row."""
+    table_policy = (policy_config or {}).get(table_name) or {}
+    placeholders_map = placeholders or {}
+    out: Dict[str, Any] = {}
+    for col, value in row.items():
+        action = (table_policy.get(col) or "preserve").strip().lower()
+        if action == "preserve":
+            out[col] = value
+        elif action == "redact":
+            out[col] = REDACTED
+        elif action == "placeholder":
+            out[col] = placeholders_map.get(f"{table_name}.{col}", REDACTED)
+        elif action == "pseudonymize":
+            if value is None or (isinstance(value, str) and value.strip() == ""):
+                out[col] = REDACTED
+            elif salt:
+                out[col] = stable_pseudonym(salt, f"{table_name}.{col}", str(value), _column_to_field_kind(col))
+            else:
+                out[col] = REDACTED
+        elif action == "mask":
+            s = str(value) if value is not None else ""
+            out[col] = "*" * (len(s) - 4) + s[-4:] if len(s) >= 4 else REDACTED
+        else:
+            out[col] = value
+    return out
+
+
+def _tables(n: int) -> Dict[str, List[Dict[str, Any]]]:
+    payments = [
+        {
+            "id": i,
+            "patient_id": 1,
+            "method": "card",
+            "last4": f"{4000 + i % 6000:04d}",
+            "card_holder": f"Holder {i % 40}",  # a case has few distinct holders
+            "token": f"tok_{i}",
+            "created_at": "2024-01-01T00:00:00Z",
+        }
+        for i in range(n)
+    ]
+    appointments = [
+        {
+            "id": i,
+            "case_id": 1,
+            "therapist_id": i % 5,
+            "scheduled_at": "2024-01-01T10:00:00Z",
+            "notes": "Follow-up session.",
+            "therapist_email": f"therapist{i % 5}@clinic.org",
+            "room": f"R{i % 12}",
+        }
+        for i in range(n)
+    ]
+    return {"payments": payments, "appointments": appointments}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 50_000], help="Rows per table")
+    args = parser.parse_args()
+
+    print(f"{'table':<14}{'rows':>8}{'previous ms':>13}{'compiled ms':>13}{'speedup':>9}")
+    mismatches = 0
+    for n in args.rows:
+        for table, rows in _tables(n).items():
+            started = time.perf_counter()
+            previous = [_previous_row(table, r, POLICY, SALT, PLACEHOLDERS) for r in rows]
+            previous_s = time.perf_counter() - started
+
+            started = time.perf_counter()
+            compiled = DbPolicy(POLICY, SALT, placeholders=PLACEHOLDERS).apply_rows(table, rows)
+            compiled_s = time.perf_counter() - started
+
+            row = f"{table:<14}{n:>8}{previous_s * 1000:>13.1f}{compiled_s * 1000:>13.1f}{previous_s / compiled_s:>8.1f}x"
+            if compiled != previous:
+                mismatches += 1
+                row += "  MISMATCH"
+            print(row)
+    if mismatches:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Import-time regression benchmark.
+
+Times cold starts in fresh interpreters for the paths that must stay fast (CLI --help,
+rule-only sanitize) and fails if any exceeds its budget or loads the HF stack.
+
+  python scripts/import_time_benchmark.py [--runs 5] [--budget-ms 1500]
+"""
+from __future__ import annotations
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parents[1] / "src"
+HEAVY_MODULES = ("torch", "transformers")
+
+CASES = {
+    "import stupiphi": "import stupiphi",
+    "stupiphi --help": (
+        "import sys; sys.argv = ['stupiphi', '--help']\n"
+        "from stupiphi.cli import main\n"
+        "try:\n    main()\nexcept SystemExit:\n    pass"
+    ),
+    "rule-only sanitize": (
+        "from stupiphi import PipelineConfig, SanitizationPipeline\n"
+        "from stupiphi.ingestion.synthetic_generator import generate_records\n"
+        "SanitizationPipeline(PipelineConfig(enable_hf=False)).sanitize_batch(generate_records(count=10, seed=1))"
+    ),
+}
+
+
+def _run_case(code: str) -> tuple[float, list[str]]:
+    script = (
+        f"import sys; sys.path.insert(0, {str(SRC_DIR)!r})\n"
+        f"{code}\n"
+        f"print('HEAVY=' + ','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    started = time.perf_counter()
+    out = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True)
+    elapsed = time.perf_counter() - started
+    heavy_line = [line for line in out.stdout.splitlines() if line.startswith("HEAVY=")][-1]
+    return elapsed, [m for m in heavy_line[len("HEAVY="):].split(",") if m]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark StupiPHI cold-start import time.")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per case (median reported)")
+    parser.add_argument("--budget-ms", type=float, default=1500.0, help="Fail if a case's median exceeds this")
+    args = parser.parse_args()
+
+    failed = False
+    print(f"{'case':<22} {'median ms':>10} {'min ms':>8}  heavy modules")
+    for name, code in CASES.items():
+        timings = []
+        heavy: list[str] = []
+        for _ in range(max(1, args.runs)):
+            elapsed, heavy = _run_case(code)
+            timings.append(elapsed * 1000)
+        median = statistics.median(timings)
+        print(f"{name:<22} {median:>10.0f} {min(timings):>8.0f}  {', '.join(heavy) or '-'}")
+        if heavy or median > args.budget_ms:
+            failed = True
+
+    if failed:
+        print("FAIL: import-time budget exceeded or HF stack loaded eagerly")
+        raise SystemExit(1)
+    print("PASS")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Span-merge and redaction benchmark.
+
+Builds notes with hundreds of findings (every entity found by two detectors, as when NER
+tags an email the rule scanner also matched) and times planning plus redaction with the
+previous per-finding, per-action slicing approach and the current merged, one-pass one.
+Exits 1 if the current output does not redact every finding.
+
+  python scripts/redaction_benchmark.py [--findings 200 400 800] [--repeat 20]
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from stupiphi.detection.detector_base import Finding  # noqa: E402
+from stupiphi.transformation.apply import REDACTION_TOKEN, _apply_span_redactions  # noqa: E402
+from stupiphi.transformation.plan import PlanAction, build_conservative_plan  # noqa: E402
+
+_FILLER = "Patient reports improved sleep and mood since the last session. "
+
+
+def _note(n: int) -> tuple[str, List[Finding]]:
+    """A note with n entities, each reported by the rule scanner and (overlapping) by NER."""
+    parts: List[str] = []
+    findings: List[Finding] = []
+    pos = 0
+    for i in range(n):
+        parts.append(_FILLER)
+        pos += len(_FILLER)
+        email = f"person{i}@clinic{i % 7}.org"
+        findings.append(Finding("encounter_notes", "EMAIL", 1.0, "rule", pos, pos + len(email), email))
+        org = email.index("clinic")
+        findings.append(Finding("encounter_notes", "ORG", 0.6, "huggingface", pos + org, pos + len(email) - 4))
+        parts.append(email + " ")
+        pos += len(email) + 1
+    return "".join(parts), findings
+
+
+def _previous(text: str, findings: List[Finding]) -> str:
+    """One action per finding and one string rebuild per action (the pre-merge implementation)."""
+    actions = [
+        PlanAction(
+            action_type="REDACT_TEXT_SPAN",
+            field_path="encounter_notes",
+            start=f.start,
+            end=f.end,
+            reason=f"redact detected entity_type={f.entity_type} source={f.detector_source}",
+            entity_type=str(f.entity_type),
+        )
+        for f in findings
+    ]
+    actions.sort(key=lambda a: (a.start or 0), reverse=True)
+    out = text
+    for a in actions:
+        out = out[: a.start] + REDACTION_TOKEN + out[a.end :]
+    return out
+
+
+def _current(text: str, findings: List[Finding]) -> str:
+    plan = build_conservative_plan("bench", findings)
+    return _apply_span_redactions(text, plan.actions)
+
+
+def _time(fn: Callable[[str, List[Finding]], str], text: str, findings: List[Finding], repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn(text, findings)
+    return (time.perf_counter() - started) / repeat
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--findings", type=int, nargs="+", default=[200, 400, 800], help="Entities per note")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'entities':>9}{'findings':>10}{'chars':>9}{'previous ms':>13}{'current ms':>12}{'speedup':>9}")
+    failures = 0
+    for n in args.findings:
+        text, findings = _note(n)
+        out = _current(text, findings)
+        if out.count(REDACTION_TOKEN) != n or "@" in out:
+            failures += 1
+        previous = _time(_previous, text, findings, args.repeat)
+        current = _time(_current, text, findings, args.repeat)
+        print(
+            f"{n:>9}{len(findings):>10}{len(text):>9}{previous * 1000:>13.3f}{current * 1000:>12.3f}"
+            f"{previous / current:>8.1f}x"
+        )
+    if failures:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Rule-pattern worst-case benchmark.
+
+Times the rule scanner on the adversarial corpus (stupiphi.evals.regex_corpus) with Python's
+re and, when google-re2 is installed, the linear-time re2 backend; checks both find the same
+spans. Exits 1 on a mismatch.
+
+  python scripts/regex_worst_case_benchmark.py [--size 5000]
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from stupiphi.detection.linear_regex import linear_backend_available  # noqa: E402
+from stupiphi.detection.patterns import PatternScanner, registered_patterns  # noqa: E402
+from stupiphi.evals.regex_corpus import worst_case_notes  # noqa: E402
+
+
+def _time(scanner: PatternScanner, text: str) -> tuple[float, list]:
+    started = time.perf_counter()
+    matches = scanner.scan(text)
+    return time.perf_counter() - started, matches
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=5000, help="Repeat count for each corpus unit")
+    args = parser.parse_args()
+
+    backends = ["re"] + (["re2"] if linear_backend_available() else [])
+    scanners = {b: PatternScanner(registered_patterns(), backend=b) for b in backends}
+    if len(backends) == 1:
+        print("google-re2 not installed; timing the re backend only (pip install 'stupiphi[re2]')")
+
+    print(f"{'case':<32}{'chars':>9}" + "".join(f"{b + ' s':>11}" for b in backends))
+    mismatches = 0
+    for name, text in worst_case_notes(args.size).items():
+        timings = {b: _time(s, text) for b, s in scanners.items()}
+        row = f"{name:<32}{len(text):>9}" + "".join(f"{timings[b][0]:>11.4f}" for b in backends)
+        if len(backends) == 2 and timings["re"][1] != timings["re2"][1]:
+            mismatches += 1
+            row += "  MISMATCH"
+        print(row)
+    if mismatches:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -35,7 +35,7 @@ def main() -> None:
         pipeline = SanitizationPipeline(PipelineConfig(hf_min_confidence=0.40, faker_seed=99))
 
     labeled = generate_labeled_records(count=args.count, seed=args.seed, difficulty=args.difficulty)
-    sanitized = [pipeline.sanitize_record(lr.record).record for lr in labeled]
+    sanitized = [res.record for res in pipeline.sanitize_batch([lr.record for lr in labeled])]
 
     result = evaluate_sanitization(labeled, sanitized)
 
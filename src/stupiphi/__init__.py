@@ -16,7 +16,7 @@ from stupiphi.audit.audit_log import (
 from stupiphi.verification.verify import verify_basic
 
 try:
-    # May require optional dependencies (e.g. transformers) via HF detector.
+    # transformers/torch are imported lazily, only when a pipeline enables the HF detector.
     from stupiphi.sanitizer.pipeline import (  # type: ignore[assignment]
         PipelineConfig,
         SanitizationPipeline,
@@ -1,34 +1,55 @@
-"""CLI entry point: stupiphi run-eval, stupiphi sanitize."""
+"""CLI entry point: stupiphi run-eval, stupiphi sanitize, stupiphi transfer-case, stupiphi serve."""
 from __future__ import annotations
 
 import argparse
 import json
+from dataclasses import replace
 from pathlib import Path
+from typing import Any, Callable, Dict, Optional
 
 from stupiphi.evals.labeled_dataset import generate_labeled_records
-from stupiphi.evals.metrics import evaluate_sanitization
+from stupiphi.evals.metrics import evaluate_sanitization, passes_accuracy_gate
 from stupiphi.ingestion.synthetic_generator import generate_records
 from stupiphi.sanitizer.pipeline import SanitizationPipeline, PipelineConfig
 from stupiphi.audit.audit_log import to_dict, file_audit_sink
-from stupiphi.jobs.case_transfer import (
-    run_case_transfer,
-    VerificationFailedError,
-    DBVerificationFailedError,
-)
 
 
-def _run_eval(args: argparse.Namespace) -> None:
+def _config_path_from_args(args: argparse.Namespace) -> Optional[str]:
     if args.config and Path(args.config).is_file():
-        pipeline = SanitizationPipeline.from_yaml(args.config)
-    elif Path("config.yaml").is_file():
-        pipeline = SanitizationPipeline.from_yaml("config.yaml")
-    else:
-        pipeline = SanitizationPipeline(PipelineConfig(hf_min_confidence=0.40, faker_seed=99))
+        return args.config
+    if Path("config.yaml").is_file():
+        return "config.yaml"
+    return None
+
+
+def _pipeline_from_args(args: argparse.Namespace) -> SanitizationPipeline:
+    config_path = _config_path_from_args(args)
+    if getattr(args, "server", None):
+        from stupiphi.server import RemotePipeline
+
+        # Same interface and results; the warm pipeline lives in `stupiphi serve`.
+        return RemotePipeline(args.server, config_path)  # type: ignore[return-value]
+    if config_path:
+        return SanitizationPipeline.from_yaml(config_path)
+    return SanitizationPipeline(PipelineConfig(hf_min_confidence=0.40, faker_seed=99))
+
+
+def _run_eval(args: argparse.Namespace) -> None:
+    if (args.compare_quantized or args.compare_profiles) and args.server:
+        raise SystemExit("--compare-quantized/--compare-profiles run locally; drop --server")
+    pipeline = _pipeline_from_args(args)
 
     labeled = generate_labeled_records(
         count=args.count, seed=args.seed, difficulty=args.difficulty
     )
-    sanitized = [pipeline.sanitize_record(lr.record).record for lr in labeled]
+    if args.compare_quantized:
+        _compare_quantized(pipeline, labeled, args.max_fn_increase)
+        return
+    if args.compare_profiles:
+        _compare_profiles(pipeline, labeled)
+        return
+
+    sanitized = [res.record for res in pipeline.sanitize_batch([lr.record for lr in labeled])]
     result = evaluate_sanitization(labeled, sanitized)
 
     print("EVALUATION RESULTS")
@@ -48,13 +69,65 @@ def _run_eval(args: argparse.Namespace) -> None:
         print(f"- {t}: total={total}, fn={fn}, fn_rate={rate:.3f}")
 
 
-def _sanitize(args: argparse.Namespace) -> None:
-    if args.config and Path(args.config).is_file():
-        pipeline = SanitizationPipeline.from_yaml(args.config)
-    elif Path("config.yaml").is_file():
-        pipeline = SanitizationPipeline.from_yaml("config.yaml")
+def _compare_quantized(pipeline: SanitizationPipeline, labeled: list, max_fn_increase: float) -> None:
+    """Evaluate fp32 and int8 variants of the same config side by side; exit 1 if the gate fails."""
+    records = [lr.record for lr in labeled]
+    # Reuse the already-loaded pipeline for whichever variant its config selects.
+    if pipeline.cfg.hf_quantized:
+        fp32, int8 = SanitizationPipeline(replace(pipeline.cfg, hf_quantized=False)), pipeline
     else:
-        pipeline = SanitizationPipeline(PipelineConfig(hf_min_confidence=0.40, faker_seed=99))
+        fp32, int8 = pipeline, SanitizationPipeline(replace(pipeline.cfg, hf_quantized=True))
+    results = {
+        name: evaluate_sanitization(labeled, [res.record for res in p.sanitize_batch(records)])
+        for name, p in (("fp32", fp32), ("int8", int8))
+    }
+    base, cand = results["fp32"], results["int8"]
+
+    print("QUANTIZATION ACCURACY GATE")
+    print("--------------------------")
+    print(f"{'':<24}{'fp32':>8}{'int8':>8}")
+    print(f"{'False negative rate':<24}{base.false_negative_rate:>8.3f}{cand.false_negative_rate:>8.3f}")
+    for t, total in base.by_type_total.items():
+        base_rate = base.by_type_fn.get(t, 0) / total if total else 0.0
+        cand_total = cand.by_type_total.get(t, 0)
+        cand_rate = cand.by_type_fn.get(t, 0) / cand_total if cand_total else 0.0
+        print(f"{'- ' + t + ' fn_rate':<24}{base_rate:>8.3f}{cand_rate:>8.3f}")
+    print(
+        f"{'Residual email/phone':<24}"
+        f"{f'{base.residual_email_count}/{base.residual_phone_count}':>8}"
+        f"{f'{cand.residual_email_count}/{cand.residual_phone_count}':>8}"
+    )
+    ok = passes_accuracy_gate(base, cand, max_fn_rate_increase=max_fn_increase)
+    print("")
+    print(f"Gate (max FN-rate increase {max_fn_increase:.3f}): {'PASS' if ok else 'FAIL'}")
+    if not ok:
+        raise SystemExit(1)
+
+
+def _compare_profiles(pipeline: SanitizationPipeline, labeled: list) -> None:
+    """Throughput and FN rate of each detector profile on the same records."""
+    from stupiphi.evals.profiles import compare_profiles
+
+    evals = compare_profiles(labeled, pipeline.cfg)
+    print("DETECTOR PROFILES")
+    print("-----------------")
+    print(f"{'profile':<10}{'records/s':>11}{'FN rate':>9}{'NER notes':>11}{'NER chars':>11}")
+    for e in evals:
+        print(
+            f"{e.profile:<10}{e.records_per_second:>11.1f}{e.result.false_negative_rate:>9.3f}"
+            f"{e.ner_note_share:>11.1%}{e.ner_char_share:>11.1%}"
+        )
+    print("")
+    print("By type (fn_rate):")
+    for t, total in evals[0].result.by_type_total.items():
+        rates = "  ".join(
+            f"{e.profile}={(e.result.by_type_fn.get(t, 0) / total if total else 0.0):.3f}" for e in evals
+        )
+        print(f"- {t}: {rates}")
+
+
+def _sanitize(args: argparse.Namespace) -> None:
+    pipeline = _pipeline_from_args(args)
 
     record = next(generate_records(count=1, seed=args.seed))
     result = pipeline.sanitize_record(record)
@@ -71,21 +144,31 @@ def _sanitize(args: argparse.Namespace) -> None:
 
 
 def _transfer_case(args: argparse.Namespace) -> None:
+    # Imported here so other commands (and --help) do not load the Postgres driver.
+    from stupiphi.jobs.case_transfer import (
+        run_case_transfer,
+        VerificationFailedError,
+        DBVerificationFailedError,
+    )
+
     audit_sink = None
     if args.audit_out:
         Path(args.audit_out).open("w").close()  # fresh file per run
         audit_sink = file_audit_sink(args.audit_out)
     try:
-        report = run_case_transfer(
-            case_id=args.case_id,
-            config_path=args.config,
-            dry_run=args.dry_run,
-            report_out=args.report_out,
-            audit_sink=audit_sink,
-            fail_on_verification=args.fail_on_verification,
-            verify_dev=args.verify_dev,
-            fail_on_db_verify=args.fail_on_db_verify,
-        )
+        if args.server:
+            report = _transfer_case_remote(args, audit_sink)
+        else:
+            report = run_case_transfer(
+                case_id=args.case_id,
+                config_path=args.config,
+                dry_run=args.dry_run,
+                report_out=args.report_out,
+                audit_sink=audit_sink,
+                fail_on_verification=args.fail_on_verification,
+                verify_dev=args.verify_dev,
+                fail_on_db_verify=args.fail_on_db_verify,
+            )
     except VerificationFailedError as e:
         print(str(e))
         if args.report_out:
@@ -111,6 +194,17 @@ def _transfer_case(args: argparse.Namespace) -> None:
         print(f"  {table}: {count}")
     print(f"Verification failures: {report.verification_failures}")
     print(f"Audit events: {report.audit_events}")
+    if report.ner_cache:
+        print(f"NER cache: {report.ner_cache.get('hits', 0)} hit(s), {report.ner_cache.get('misses', 0)} miss(es)")
+    if report.pseudonym_vault:
+        vault = report.pseudonym_vault
+        print(
+            f"Pseudonym vault: {int(vault.get('hits', 0))} hit(s), {int(vault.get('misses', 0))} miss(es), "
+            f"hit rate {vault.get('hit_rate', 0.0):.0%}, {int(vault.get('disk_entries', vault.get('entries', 0)))} stored"
+        )
+    hits = {name: n for name, n in report.rule_hits.items() if n}
+    if hits:
+        print(f"Rule hits: {', '.join(f'{name}={n}' for name, n in sorted(hits.items()))}")
     if report.replay_skipped and report.replay_skip_reason:
         print(f"Replay skipped: {report.replay_skip_reason}")
     if report.db_verification_ok:
@@ -126,6 +220,78 @@ def _transfer_case(args: argparse.Namespace) -> None:
         print(f"Audit written to: {args.audit_out}")
 
 
+def _transfer_case_remote(
+    args: argparse.Namespace,
+    audit_sink: Optional[Callable[[Dict[str, Any]], None]],
+) -> Any:
+    """Run transfer-case in `stupiphi serve`; errors map back to the local exception types."""
+    from stupiphi.jobs.case_transfer import (
+        DBVerificationFailedError,
+        TransferReport,
+        VerificationFailedError,
+    )
+    from stupiphi.server import ServerError, request
+
+    try:
+        response = request(
+            args.server,
+            "/transfer-case",
+            {
+                "case_id": args.case_id,
+                "config": str(Path(args.config).resolve()) if args.config else None,
+                "dry_run": args.dry_run,
+                "fail_on_verification": args.fail_on_verification,
+                "verify_dev": args.verify_dev,
+                "fail_on_db_verify": args.fail_on_db_verify,
+            },
+        )
+    except ServerError as e:
+        for payload in e.payload.get("audit", []) if audit_sink is not None else []:
+            audit_sink(payload)
+        if args.report_out and "report" in e.payload:
+            Path(args.report_out).write_text(TransferReport(**e.payload["report"]).to_json(), encoding="utf-8")
+        error = e.payload.get("error")
+        if error == "verification_failed":
+            raise VerificationFailedError(str(e)) from None
+        if error == "db_verification_failed":
+            raise DBVerificationFailedError(str(e)) from None
+        raise SystemExit(f"Server error: {e}") from None
+    if audit_sink is not None:
+        for payload in response.get("audit", []):
+            audit_sink(payload)
+    report = TransferReport(**response["report"])
+    if args.report_out:  # written here, as the caller: the server writes no files for a request
+        Path(args.report_out).write_text(report.to_json(), encoding="utf-8")
+    return report
+
+
+def _serve(args: argparse.Namespace) -> None:
+    from stupiphi.server import PipelineCache, SanitizationServer
+
+    pipelines = PipelineCache(micro_batch_size=args.micro_batch_size, micro_batch_wait_ms=args.micro_batch_wait_ms)
+    for config_path in args.config or [None]:
+        pipelines.get(config_path)  # load models before accepting requests
+    server = SanitizationServer(args.address, pipelines=pipelines, configs=args.config or [None])
+    print(f"stupiphi serving on {server.address} ({len(pipelines)} pipeline(s) warm)", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+def _add_server_arg(parser: argparse.ArgumentParser) -> None:
+    from stupiphi.server import DEFAULT_ADDRESS
+
+    parser.add_argument(
+        "--server",
+        nargs="?",
+        const=DEFAULT_ADDRESS,
+        default=None,
+        metavar="ADDRESS",
+        help=f"Delegate to a running `stupiphi serve` (default {DEFAULT_ADDRESS}; or http://127.0.0.1:PORT)",
+    )
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(prog="stupiphi", description="StupiPHI sanitization engine CLI.")
     subparsers = parser.add_subparsers(dest="command", required=True)
@@ -135,11 +301,29 @@ def main() -> None:
     eval_parser.add_argument("--difficulty", choices=["easy", "hard"], default="easy")
     eval_parser.add_argument("--count", type=int, default=100)
     eval_parser.add_argument("--seed", type=int, default=123)
+    eval_parser.add_argument(
+        "--compare-quantized",
+        action="store_true",
+        help="Evaluate fp32 and int8-quantized HF models side by side; exit 1 if the int8 FN rate regresses",
+    )
+    eval_parser.add_argument(
+        "--max-fn-increase",
+        type=float,
+        default=0.0,
+        help="Allowed FN-rate increase (overall and per type) for --compare-quantized (default: 0.0)",
+    )
+    eval_parser.add_argument(
+        "--compare-profiles",
+        action="store_true",
+        help="Evaluate the fast, balanced and thorough detector profiles: throughput and FN rate",
+    )
+    _add_server_arg(eval_parser)
     eval_parser.set_defaults(func=_run_eval)
 
     sanitize_parser = subparsers.add_parser("sanitize", help="Sanitize one synthetic record (smoke test)")
     sanitize_parser.add_argument("--config", type=str, default=None, help="Path to YAML config")
     sanitize_parser.add_argument("--seed", type=int, default=42)
+    _add_server_arg(sanitize_parser)
     sanitize_parser.set_defaults(func=_sanitize)
 
     transfer_parser = subparsers.add_parser(
@@ -182,8 +366,41 @@ def main() -> None:
         action="store_true",
         help="Exit non-zero if DB verification finds residual email/phone patterns in dev",
     )
+    _add_server_arg(transfer_parser)
     transfer_parser.set_defaults(func=_transfer_case)
 
+    from stupiphi.server import DEFAULT_ADDRESS
+
+    serve_parser = subparsers.add_parser(
+        "serve", help="Keep pipelines and models warm for --server clients (local use only)"
+    )
+    serve_parser.add_argument(
+        "--address",
+        type=str,
+        default=DEFAULT_ADDRESS,
+        help=f"unix:/path/to.sock or http://127.0.0.1:PORT (default: {DEFAULT_ADDRESS})",
+    )
+    serve_parser.add_argument(
+        "--config",
+        type=str,
+        action="append",
+        default=None,
+        help="YAML config to load at start-up (repeatable); requests may only use these (default: built-in config)",
+    )
+    serve_parser.add_argument(
+        "--micro-batch-size",
+        type=int,
+        default=16,
+        help="Coalesce concurrent requests into HF batches of up to this many notes (0 = off)",
+    )
+    serve_parser.add_argument(
+        "--micro-batch-wait-ms",
+        type=float,
+        default=5.0,
+        help="Longest a request waits for its HF batch to fill (default: 5)",
+    )
+    serve_parser.set_defaults(func=_serve)
+
     args = parser.parse_args()
     args.func(args)
 
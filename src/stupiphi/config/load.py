@@ -32,11 +32,14 @@ def _is_dangerous_db_column(column_name: str) -> bool:
 
 
 def load_config(path: str | Path) -> PipelineConfig:
-    """Load PipelineConfig from a YAML file. Missing keys use PipelineConfig defaults."""
+    """Load PipelineConfig from a YAML file. Missing keys use PipelineConfig defaults.
+
+    Relative detectors.rule.pack_files paths are resolved against the config file's directory.
+    """
     with open(path, "r", encoding="utf-8") as f:
         data = yaml.safe_load(f) or {}
 
-    return _dict_to_config(data)
+    return _dict_to_config(data, base_dir=Path(path).resolve().parent)
 
 
 def _parse_database_policy(data: Dict[str, Any]) -> Tuple[Dict[str, Dict[str, str]] | None, Dict[str, str]]:
@@ -77,20 +80,53 @@ def _parse_database_policy(data: Dict[str, Any]) -> Tuple[Dict[str, Dict[str, st
     return result, placeholders
 
 
-def _dict_to_config(data: Dict[str, Any]) -> PipelineConfig:
+def _dict_to_config(data: Dict[str, Any], base_dir: Path | None = None) -> PipelineConfig:
     detectors = data.get("detectors") or {}
     hf = detectors.get("hf") or {}
+    hf_cache = hf.get("cache") or {}
+    hf_micro_batch = hf.get("micro_batch") or {}
     rule = detectors.get("rule") or {}
+    known = detectors.get("known_entities") or {}
+    vault = data.get("pseudonym_vault") or {}
+    pack_files = tuple(
+        str(base_dir / p) if base_dir is not None and not Path(p).is_absolute() else str(p)
+        for p in (rule.get("pack_files") or [])
+    )
 
     structured = data.get("detectors", {}).get("structured") or {}
     database_policy, database_policy_placeholders = _parse_database_policy(data)
     return PipelineConfig(
+        detector_profile=str(detectors.get("profile", "thorough")).strip().lower(),
+        concurrent_detectors=bool(detectors.get("concurrent", False)),
         hf_min_confidence=float(hf.get("min_confidence", 0.40)),
+        hf_model_name=str(hf.get("model_name", "dslim/bert-base-NER")),
+        hf_max_batch_tokens=int(hf["max_batch_tokens"]) if hf.get("max_batch_tokens") else None,
+        hf_chunk_tokens=int(hf["chunk_tokens"]) if hf.get("chunk_tokens") else None,
+        hf_chunk_overlap=int(hf.get("chunk_overlap", 64)),
+        hf_backend=str(hf.get("backend", "torch")).strip().lower(),
+        hf_quantized=bool(hf.get("quantized", False)),
+        hf_cache_entries=int(hf_cache.get("entries", 0) or 0),
+        hf_cache_disk=bool(hf_cache.get("disk", False)),
+        hf_cache_disk_entries=int(hf_cache["disk_entries"]) if hf_cache.get("disk_entries") else None,
+        hf_sentence_memo_entries=int(hf_cache.get("sentence_entries", 0) or 0),
+        hf_micro_batch_size=int(hf_micro_batch.get("max_size", 0) or 0),
+        hf_micro_batch_wait_ms=float(hf_micro_batch.get("max_wait_ms", 5.0)),
+        cache_dir=data.get("cache_dir"),
         faker_seed=int(data.get("faker_seed", 99)),
         enable_hf=bool(hf.get("enabled", True)),
         enable_rule=bool(rule.get("enabled", True)),
+        rule_backend=str(rule.get("backend", "re")).strip().lower(),
+        rule_scan_budget_ms=float(rule["scan_budget_ms"]) if rule.get("scan_budget_ms") else None,
+        rule_packs=tuple(str(p).strip().lower() for p in (rule.get("packs") or [])),
+        rule_pack_files=pack_files,
         enable_structured=bool(structured.get("enabled", True)),
+        enable_known_entities=bool(known.get("enabled", True)),
+        known_entities_hf_min_confidence=(
+            float(known["hf_min_confidence"]) if known.get("hf_min_confidence") is not None else None
+        ),
         pseudonym_salt=data.get("pseudonym_salt"),
+        pseudonym_vault=bool(vault.get("enabled", False)),
+        pseudonym_vault_entries=int(vault.get("entries", 10_000)),
         database_policy=database_policy,
         database_policy_placeholders=database_policy_placeholders if database_policy_placeholders else None,
     )
@@ -0,0 +1,63 @@
+"""
+Detector cascade: run cheap detectors first and NER only where it can still find something.
+
+Detectors declare a relative cost (StructuredFieldDetector 0, rule and known-entity detectors
+1, HFDetector 100). The pipeline runs the cheap ones on every note, then asks the expensive
+ones whether they apply given the spans already covered. NER targets names, organisations
+and places, which in clinical notes are capitalized; a note (or sentence) whose capitalized
+words all lie inside rule or known-entity spans has nothing left for it.
+
+Profiles (detectors.profile in YAML):
+
+- thorough: NER on every note (no gate). Default; same findings as before the cascade.
+- balanced: NER on whole notes with a capitalized word outside the covered spans.
+- fast: NER only on the sentences with such a word. Fewer tokens through the model, at the
+  cost of cross-sentence context.
+
+Lowercase names are missed by balanced and fast; compare profiles with
+`stupiphi run-eval --compare-profiles` before switching.
+"""
+from __future__ import annotations
+
+import re
+from typing import List, Optional, Sequence, Tuple
+
+from stupiphi.detection.detector_base import Finding
+from stupiphi.detection.sentences import split_sentences
+
+PROFILES = ("fast", "balanced", "thorough")
+
+Span = Tuple[int, int]
+
+_WORD_RE = re.compile(r"[^\W\d_]{2,}")  # single letters ("I", initials) alone are not worth a model call
+
+
+def covered_spans(*finding_lists: Optional[Sequence[Finding]]) -> List[Span]:
+    """Text spans already claimed by the given findings (structured findings have none)."""
+    return [
+        (f.start, f.end)
+        for findings in finding_lists
+        if findings
+        for f in findings
+        if f.start is not None and f.end is not None
+    ]
+
+
+def _uncovered_capitalized(text: str, covered: Sequence[Span], start: int = 0, end: Optional[int] = None) -> bool:
+    for m in _WORD_RE.finditer(text, start, len(text) if end is None else end):
+        if not m.group()[0].isupper():
+            continue
+        a, b = m.span()
+        if not any(s <= a and b <= e for s, e in covered):
+            return True
+    return False
+
+
+def needs_ner(text: str, covered: Sequence[Span] = ()) -> bool:
+    """True when text has a capitalized word outside the covered spans (balanced gate)."""
+    return _uncovered_capitalized(text, covered)
+
+
+def ner_segments(text: str, covered: Sequence[Span] = ()) -> List[Span]:
+    """Sentences of text that have a capitalized word outside the covered spans (fast gate)."""
+    return [(s, e) for s, e in split_sentences(text) if _uncovered_capitalized(text, covered, s, e)]
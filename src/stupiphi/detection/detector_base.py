@@ -1,7 +1,7 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import List, Protocol, Optional, Literal
+from dataclasses import dataclass, field
+from typing import Dict, List, Protocol, Optional, Literal
 
 EntityType = Literal[
     "NAME",
@@ -11,10 +11,16 @@ EntityType = Literal[
     "DOB",
     "LOCATION",
     "ORG",
+    "SSN",
+    "MRN",
+    "ID",
+    "ZIP",
+    "DATE",
+    "URL",
     "UNKNOWN",
 ]
 
-DetectorSource = Literal["huggingface", "llm", "rule", "structured"]
+DetectorSource = Literal["huggingface", "llm", "rule", "known", "structured"]
 
 
 @dataclass(frozen=True)
@@ -42,9 +48,28 @@ class Finding:
     text: Optional[str] = None
 
 
+@dataclass
+class DetectionCounts:
+    """
+    Counters for one caller's detection calls (e.g. one transfer-case run).
+
+    Pipelines and their caches are shared by concurrent jobs (stupiphi serve), so their own
+    stats mix everyone's calls; pass one of these down to count a single job's.
+    ner_cache / sentence_memo: NERCache lookups (hits, memory_hits, disk_hits, misses).
+    rule_hits: rule pattern name -> matches the rule detector found.
+    """
+    ner_cache: Dict[str, int] = field(default_factory=dict)
+    sentence_memo: Dict[str, int] = field(default_factory=dict)
+    rule_hits: Dict[str, int] = field(default_factory=dict)
+
+
 class Detector(Protocol):
     """
     All detectors must implement this interface.
+
+    Detectors also declare a relative `cost` (class attribute). Expensive ones may add
+    applies_to(record, covered_spans) -> bool, which the pipeline's cascade consults after the
+    cheap detectors have run (see detection.cascade).
     """
 
     def detect(self, record) -> List[Finding]:
@@ -1,9 +1,13 @@
 from __future__ import annotations
 
-from typing import List
+from typing import Dict, List, Optional, Sequence, Tuple
 
-from stupiphi.detection.detector_base import Detector, Finding, EntityType
-from stupiphi.models.hf_runner import HFTokenClassifier
+from stupiphi.detection.cascade import needs_ner
+from stupiphi.detection.detector_base import DetectionCounts, Detector, Finding, EntityType
+from stupiphi.detection.ner_cache import NERCache
+from stupiphi.detection.sentences import split_sentences
+from stupiphi.models.cache_paths import model_fingerprint
+from stupiphi.models.hf_runner import HFEntity, HFTokenClassifier
 from stupiphi.models.canonical_record import CanonicalRecord
 
 
@@ -36,19 +40,156 @@ class HFDetector:
       - structured-field matching (e.g. email regex) as a separate detector
     """
 
+    cost = 100  # relative to the rule detector (1); see detection.cascade
+
     def __init__(
         self,
         model_name: str = "dslim/bert-base-NER",
         min_confidence: float = 0.50,
         device: int = -1,
+        classifier: Optional[HFTokenClassifier] = None,
+        max_batch_tokens: Optional[int] = None,
+        chunk_tokens: Optional[int] = None,
+        chunk_overlap: int = 64,
+        backend: str = "torch",
+        cache_dir: Optional[str] = None,
+        quantized: bool = False,
+        cache: Optional[NERCache] = None,  # skip inference for notes seen before
+        sentence_memo: Optional[NERCache] = None,  # run NER per sentence, skipping sentences seen before
     ) -> None:
         self.min_confidence = min_confidence
-        self.classifier = HFTokenClassifier(model_name=model_name, device=device)
+        # An injected classifier lets callers share one loaded model across detectors.
+        self.classifier = classifier if classifier is not None else HFTokenClassifier(
+            model_name=model_name,
+            device=device,
+            max_batch_tokens=max_batch_tokens,
+            chunk_tokens=chunk_tokens,
+            chunk_overlap=chunk_overlap,
+            backend=backend,
+            cache_dir=cache_dir,
+            quantized=quantized,
+        )
+        self.cache = cache
+        self.sentence_memo = sentence_memo
+        self._model_id = _model_identity(self.classifier) if cache is not None or sentence_memo is not None else ""
+
+    def detect(self, record: CanonicalRecord, counts: Optional[DetectionCounts] = None) -> List[Finding]:
+        if self.cache is None and self.sentence_memo is None:
+            return self._to_findings(self.classifier.predict(record.encounter_notes))
+        return self.detect_batch([record], batch_size=1, counts=counts)[0]
+
+    def applies_to(self, record: CanonicalRecord, covered: Sequence[Tuple[int, int]] = ()) -> bool:
+        """Cascade gate: the note has a capitalized word no cheaper detector already covers."""
+        return needs_ner(record.encounter_notes, covered)
+
+    def detect_batch(
+        self,
+        records: Sequence[CanonicalRecord],
+        batch_size: int = 8,
+        counts: Optional[DetectionCounts] = None,
+    ) -> List[List[Finding]]:
+        """
+        Detect over many records with batched inference. One findings list per record, in order.
+        counts: also tally this call's cache lookups there.
+        """
+        texts = [r.encounter_notes for r in records]
+        return [self._to_findings(entities) for entities in self._entities(texts, batch_size, counts)]
+
+    def detect_segments(
+        self,
+        records: Sequence[CanonicalRecord],
+        segments: Sequence[Sequence[Tuple[int, int]]],
+        batch_size: int = 8,
+        counts: Optional[DetectionCounts] = None,
+    ) -> List[List[Finding]]:
+        """NER on the given (start, end) spans of each note only; findings use note offsets."""
+        flat = [(i, start, end) for i, spans in enumerate(segments) for start, end in spans]
+        texts = [records[i].encounter_notes[start:end] for i, start, end in flat]
+        results: List[List[Finding]] = [[] for _ in records]
+        for (i, offset, _), entities in zip(flat, self._entities(texts, batch_size, counts)):
+            note = records[i].encounter_notes
+            shifted: List[HFEntity] = []
+            for ent in entities:
+                s, e = ent.start + offset, ent.end + offset
+                shifted.append(HFEntity(label=ent.label, start=s, end=e, score=ent.score, text=note[s:e]))
+            results[i].extend(self._to_findings(shifted))
+        return results
+
+    def _entities(
+        self, texts: List[str], batch_size: int, counts: Optional[DetectionCounts] = None
+    ) -> List[List[HFEntity]]:
+        if not texts:
+            return []
+        if self.cache is None:
+            return self._predict(texts, batch_size, counts)
 
-    def detect(self, record: CanonicalRecord) -> List[Finding]:
-        text = record.encounter_notes
-        entities = self.classifier.predict(text)
+        keys = [NERCache.key(self._model_id, t) for t in texts]
+        tally = counts.ner_cache if counts is not None else None
+        cached = [self.cache.get(k, t, tally) for k, t in zip(keys, texts)]
+        misses = [i for i, hit in enumerate(cached) if hit is None]
+        if misses:
+            predicted = self._predict([texts[i] for i in misses], batch_size, counts)
+            for i, entities in zip(misses, predicted):
+                self.cache.put(keys[i], entities)
+                cached[i] = entities
+        return [entities or [] for entities in cached]
 
+    def _predict(
+        self, texts: List[str], batch_size: int, counts: Optional[DetectionCounts] = None
+    ) -> List[List[HFEntity]]:
+        if self.sentence_memo is None:
+            return self.classifier.predict_batch(texts, batch_size=batch_size)
+        tally = counts.sentence_memo if counts is not None else None
+        return self._predict_by_sentence(self.sentence_memo, texts, batch_size, tally)
+
+    def _predict_by_sentence(
+        self,
+        memo: NERCache,
+        texts: List[str],
+        batch_size: int,
+        tally: Optional[Dict[str, int]] = None,
+    ) -> List[List[HFEntity]]:
+        """
+        Split notes into sentences, look each up in the memo and send only unseen sentences
+        (de-duplicated across the batch) to the model; spans are shifted back into the note.
+        Trades cross-sentence context for far fewer model calls on templated notes.
+        """
+        model_id = self._model_id + "|sentence"
+        sentences_per_text = [
+            [(start, end, NERCache.key(model_id, t[start:end])) for start, end in split_sentences(t)]
+            for t in texts
+        ]
+
+        found: Dict[str, List[HFEntity]] = {}
+        unseen: Dict[str, str] = {}  # key -> sentence text, in first-seen order
+        for text, sentences in zip(texts, sentences_per_text):
+            for start, end, key in sentences:
+                if key in found or key in unseen:
+                    continue
+                sentence = text[start:end]
+                hit = memo.get(key, sentence, tally)
+                if hit is None:
+                    unseen[key] = sentence
+                else:
+                    found[key] = hit
+
+        if unseen:
+            predicted = self.classifier.predict_batch(list(unseen.values()), batch_size=batch_size)
+            for key, entities in zip(unseen, predicted):
+                memo.put(key, entities)
+                found[key] = entities
+
+        results: List[List[HFEntity]] = []
+        for text, sentences in zip(texts, sentences_per_text):
+            entities: List[HFEntity] = []
+            for start, _, key in sentences:
+                for ent in found[key]:
+                    s, e = ent.start + start, ent.end + start
+                    entities.append(HFEntity(label=ent.label, start=s, end=e, score=ent.score, text=text[s:e]))
+            results.append(entities)
+        return results
+
+    def _to_findings(self, entities: List[HFEntity]) -> List[Finding]:
         findings: List[Finding] = []
         for ent in entities:
             if ent.score < self.min_confidence:
@@ -67,3 +208,15 @@ class HFDetector:
             )
 
         return findings
+
+
+def _model_identity(classifier: HFTokenClassifier) -> str:
+    """Everything about the classifier that changes its output, for NER cache keys."""
+    return "|".join(
+        [
+            model_fingerprint(str(getattr(classifier, "model_name", ""))),
+            str(getattr(classifier, "backend", "torch")),
+            f"quantized={bool(getattr(classifier, 'quantized', False))}",
+            f"chunk={getattr(classifier, 'chunk_tokens', None)}:{getattr(classifier, 'chunk_overlap', None)}",
+        ]
+    )
@@ -0,0 +1,214 @@
+"""
+Known-entity detector: find a case's own identifiers in its notes.
+
+In a case transfer the patient's and therapists' names, emails and phones are already in the
+slice (patient_row, therapist_rows). KnownEntityScanner compiles them into one Aho-Corasick
+automaton, so every occurrence in a note is found in a single pass over the text, whatever the
+number of identifiers. Matching ignores case and treats any run of whitespace as one space;
+phones are also matched in their common formats (555-123-4567, (555) 123-4567, 555.123.4567...).
+A match must not start or end inside a word, so "Ann" is not found in "Annual". A first or last
+name on its own must be capitalized in the note, so a patient named May or Will does not
+redact every "may" and "will"; full names, emails and the rest match in any case.
+
+Exact repeats of known identifiers are what NER is least needed for; with these findings in
+hand a case can run NER at a higher confidence threshold (known_entities_hf_min_confidence).
+"""
+from __future__ import annotations
+
+import re
+from collections import deque
+from typing import Any, Dict, Iterable, List, NamedTuple, Tuple
+
+from stupiphi.detection.detector_base import Finding
+from stupiphi.models.canonical_record import CanonicalRecord
+
+# Shorter values (initials, "Al") match too much unrelated text to be worth redacting blindly.
+MIN_ENTITY_CHARS = 2
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+class KnownEntity(NamedTuple):
+    text: str
+    entity_type: str
+    capitalized: bool = False  # only match where the note starts it with a capital letter
+
+
+class KnownEntityMatch(NamedTuple):
+    entity_type: str
+    start: int
+    end: int
+
+
+def known_entities_from_slice(slice_dict: Dict[str, Any]) -> List[KnownEntity]:
+    """Identifiers of the case's patient and therapists (names, full names, emails, phones, ...)."""
+    entities: List[KnownEntity] = []
+    patient = slice_dict.get("patient_row") or {}
+    rows = [patient] + list(slice_dict.get("therapist_rows") or [])
+    for row in rows:
+        first, last = row.get("first_name"), row.get("last_name")
+        for value in (first, last):
+            if value:
+                entities.append(KnownEntity(str(value), "NAME", capitalized=True))
+        if first and last:
+            entities.append(KnownEntity(f"{first} {last}", "NAME"))
+            entities.append(KnownEntity(f"{last}, {first}", "NAME"))
+        if row.get("email"):
+            entities.append(KnownEntity(str(row["email"]), "EMAIL"))
+        if row.get("phone"):
+            entities.extend(KnownEntity(v, "PHONE") for v in phone_variants(str(row["phone"])))
+    if patient.get("address"):
+        entities.append(KnownEntity(str(patient["address"]), "ADDRESS"))
+    if patient.get("dob"):
+        dob = patient["dob"]
+        entities.append(KnownEntity(dob.isoformat() if hasattr(dob, "isoformat") else str(dob), "DOB"))
+    return entities
+
+
+def phone_variants(phone: str) -> List[str]:
+    """The phone as stored plus common formattings of its 10-digit NANP number."""
+    variants = [phone]
+    digits = re.sub(r"\D", "", phone)
+    if len(digits) == 11 and digits.startswith("1"):
+        digits = digits[1:]
+    if len(digits) == 10:
+        a, b, c = digits[:3], digits[3:6], digits[6:]
+        variants += [
+            digits,
+            f"{a}-{b}-{c}",
+            f"{a}.{b}.{c}",
+            f"{a} {b} {c}",
+            f"({a}) {b}-{c}",
+            f"({a}){b}-{c}",
+            f"({a}) {b} {c}",
+        ]
+    return variants
+
+
+def _normalize(text: str) -> Tuple[str, List[int]]:
+    """Lowercased text with whitespace runs collapsed, and the original index of each character."""
+    lowered = text.lower()
+    if len(lowered) != len(text):  # e.g. "İ" lowercases to two characters: keep such chars as-is
+        lowered = "".join(ch if len(ch.lower()) != 1 else ch.lower() for ch in text)
+    chars: List[str] = []
+    positions: List[int] = []
+    pos = 0
+    for m in _WHITESPACE_RE.finditer(lowered):
+        chars.append(lowered[pos : m.start()])
+        positions.extend(range(pos, m.start()))
+        chars.append(" ")
+        positions.append(m.start())
+        pos = m.end()
+    chars.append(lowered[pos:])
+    positions.extend(range(pos, len(lowered)))
+    return "".join(chars), positions
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+
+class KnownEntityScanner:
+    """Aho-Corasick automaton over normalized known identifiers."""
+
+    def __init__(self, entities: Iterable[KnownEntity]) -> None:
+        # Trie as one dict of edges per state; outputs are (normalized length, entity_type, capitalized).
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Tuple[int, str, bool]]] = [[]]
+        seen = set()
+        for entity in entities:
+            key, _ = _normalize(entity.text.strip())
+            if len(key) < MIN_ENTITY_CHARS or (key, entity.entity_type, entity.capitalized) in seen:
+                continue
+            seen.add((key, entity.entity_type, entity.capitalized))
+            self._add(key, entity.entity_type, entity.capitalized)
+        self.size = len(seen)
+        self._build_failure_links()
+
+    @classmethod
+    def from_case_slice(cls, slice_dict: Dict[str, Any]) -> "KnownEntityScanner":
+        return cls(known_entities_from_slice(slice_dict))
+
+    def _add(self, key: str, entity_type: str, capitalized: bool = False) -> None:
+        state = 0
+        for ch in key:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append((len(key), entity_type, capitalized))
+
+    def _build_failure_links(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)  # root children are never queued as nxt
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def scan(self, text: str) -> List[KnownEntityMatch]:
+        """Leftmost-longest, non-overlapping matches on word boundaries, in order of position."""
+        if self.size == 0 or not text:
+            return []
+        normalized, positions = _normalize(text)
+        goto, fail, out = self._goto, self._fail, self._out
+        candidates: List[Tuple[int, int, str]] = []
+        state = 0
+        for i, ch in enumerate(normalized):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for length, entity_type, capitalized in out[state]:
+                start, end = positions[i - length + 1], positions[i] + 1
+                if capitalized and not text[start].isupper():
+                    continue
+                if start > 0 and _is_word_char(text[start - 1]) and _is_word_char(text[start]):
+                    continue
+                if end < len(text) and _is_word_char(text[end]) and _is_word_char(text[end - 1]):
+                    continue
+                candidates.append((start, -end, entity_type))
+        candidates.sort()
+        matches: List[KnownEntityMatch] = []
+        covered = 0
+        for start, neg_end, entity_type in candidates:
+            if start >= covered:
+                matches.append(KnownEntityMatch(entity_type, start, -neg_end))
+                covered = -neg_end
+        return matches
+
+
+class KnownEntityDetector:
+    """Findings for known identifiers in encounter_notes (detector_source "known")."""
+
+    cost = 1
+
+    def __init__(self, scanner: KnownEntityScanner, confidence: float = 1.0) -> None:
+        self.scanner = scanner
+        self.confidence = confidence
+
+    def detect(self, record: CanonicalRecord) -> List[Finding]:
+        text = record.encounter_notes
+        findings = [
+            Finding(
+                field_path="encounter_notes",
+                entity_type=m.entity_type,  # type: ignore[arg-type]
+                confidence=self.confidence,
+                detector_source="known",
+                start=m.start,
+                end=m.end,
+                text=text[m.start : m.end],
+            )
+            for m in self.scanner.scan(text)
+        ]
+        findings.sort(key=lambda f: (f.start or 0), reverse=True)
+        return findings
+
@@ -0,0 +1,114 @@
+"""
+Linear-time regex backend for rule patterns (optional: pip install google-re2).
+
+Python's re backtracks, so patterns with nested or adjacent quantifiers over the same
+characters (the email domain part, for one) can take quadratic time or worse on adversarial
+notes such as long runs of "a.a.a." or digits and separators. RE2 matches in time linear in
+the text. Rule patterns are written for Python's re; to_re2_syntax translates them:
+
+- VERBOSE whitespace and comments are stripped (RE2 has no x flag).
+- \\d, \\s and \\w are widened to the Unicode classes Python's re uses for str patterns.
+- Lookarounds and backreferences are rejected (RE2 cannot run them in linear time).
+
+Leftmost-first alternation and match spans are the same as re. One difference remains: RE2's
+\\b only treats ASCII letters, digits and _ as word characters, so a boundary next to a
+non-ASCII letter can differ.
+"""
+from __future__ import annotations
+
+import re
+from typing import Any
+
+# Python's str \s: ASCII whitespace, \x1c-\x1f, NEL and every Unicode separator.
+_SPACE = r"\t-\r\x1c-\x20\x85\p{Z}"
+_DIGIT = r"\p{Nd}"
+_WORD = r"\p{L}\p{N}_"
+_IN_CLASS = {"d": _DIGIT, "s": _SPACE, "w": _WORD}
+_OUTSIDE = {
+    "d": _DIGIT,
+    "s": f"[{_SPACE}]",
+    "w": f"[{_WORD}]",
+    "D": r"\P{Nd}",
+    "S": f"[^{_SPACE}]",
+    "W": f"[^{_WORD}]",
+    "Z": r"\z",
+}
+
+
+def linear_backend_available() -> bool:
+    try:
+        import re2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def compile_re2(expression: str) -> Any:
+    """Compile an RE2 expression (already in RE2 syntax)."""
+    try:
+        import re2
+    except ImportError as e:
+        raise ImportError("The re2 rule backend needs google-re2: pip install 'stupiphi[re2]'") from e
+    return re2.compile(expression)
+
+
+def to_re2_syntax(pattern: "re.Pattern[str]") -> str:
+    """Translate a compiled Python pattern's source to equivalent RE2 syntax (flags not included)."""
+    source = pattern.pattern
+    verbose = bool(pattern.flags & re.VERBOSE)
+    out = []
+    i = 0
+    in_class = False
+    while i < len(source):
+        c = source[i]
+        if c == "\\":
+            if i + 1 >= len(source):
+                raise ValueError("Pattern ends with a lone backslash")
+            nxt = source[i + 1]
+            if nxt.isdigit() and nxt != "0":
+                raise ValueError("Backreferences are not supported by the re2 backend")
+            if in_class and nxt in _IN_CLASS:
+                out.append(_IN_CLASS[nxt])
+            elif in_class and nxt in "DSW":
+                raise ValueError(f"\\{nxt} inside a character class is not supported by the re2 backend")
+            elif not in_class and nxt in _OUTSIDE:
+                out.append(_OUTSIDE[nxt])
+            else:
+                out.append(source[i : i + 2])
+            i += 2
+            continue
+        if in_class:
+            if c == "]" and not _class_just_opened(source, i):
+                in_class = False
+            out.append(c)
+            i += 1
+            continue
+        if c == "[":
+            in_class = True
+            out.append(c)
+            i += 1
+            continue
+        if verbose and c.isspace():
+            i += 1
+            continue
+        if verbose and c == "#":
+            newline = source.find("\n", i)
+            i = len(source) if newline == -1 else newline + 1
+            continue
+        if source.startswith("(?", i):
+            rest = source[i + 2 : i + 4]
+            if rest[:1] in ("=", "!") or rest in ("<=", "<!"):
+                raise ValueError("Lookarounds are not supported by the re2 backend")
+            if rest == "P=":
+                raise ValueError("Backreferences are not supported by the re2 backend")
+        out.append(c)
+        i += 1
+    return "".join(out)
+
+
+def _class_just_opened(source: str, i: int) -> bool:
+    """A ']' right after '[' or '[^' is a literal, not the end of the class."""
+    j = i - 1
+    if j >= 0 and source[j] == "^":
+        j -= 1
+    return j >= 0 and source[j] == "[" and (j == 0 or source[j - 1] != "\\")
@@ -0,0 +1,195 @@
+"""
+Cache of HF NER results keyed by (model identity, note content hash).
+
+Re-sanitizing the same notes (transfer re-runs, repeated case refreshes, templated notes)
+skips inference on a hit. Two tiers: an in-memory LRU and an optional SQLite file on disk.
+Only labels, character offsets and scores are stored, never note text; the key is a
+SHA-256 digest, so the cache cannot be used to recover notes.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from stupiphi.models.hf_runner import HFEntity
+
+# (label, start, end, score): everything needed to rebuild an HFEntity given the note.
+CachedEntity = Tuple[str, int, int, float]
+
+
+class NERCache:
+    """
+    Two-tier cache of per-note entity spans.
+
+    max_entries bounds the in-memory LRU (least recently used entries are evicted first).
+    When path is set, entries are also written to a SQLite file there; max_disk_entries
+    bounds it (oldest by last use evicted first; None = unbounded). Thread-safe.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 10_000,
+        path: Optional[Union[str, Path]] = None,
+        max_disk_entries: Optional[int] = None,
+    ) -> None:
+        if max_entries < 0:
+            raise ValueError("max_entries must be >= 0")
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.path = Path(path) if path else None
+        self._memory: "OrderedDict[str, List[CachedEntity]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters: Dict[str, int] = {
+            "hits": 0,
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "disk_evictions": 0,
+        }
+        self._db: Optional[sqlite3.Connection] = None
+        if self.path is not None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS ner_cache "
+                "(key TEXT PRIMARY KEY, entities TEXT NOT NULL, last_used REAL NOT NULL)"
+            )
+            self._db.commit()
+
+    @staticmethod
+    def key(model_id: str, text: str) -> str:
+        """Cache key: SHA-256 over the model identity and the note text."""
+        h = hashlib.sha256()
+        h.update(model_id.encode("utf-8"))
+        h.update(b"\x00")
+        h.update(text.encode("utf-8"))
+        return h.hexdigest()
+
+    def get(self, key: str, text: str, counts: Optional[Dict[str, int]] = None) -> Optional[List[HFEntity]]:
+        """
+        Entities cached under key, rebuilt against text; None on a miss.
+        counts: the caller's own hits/memory_hits/disk_hits/misses, also incremented.
+        """
+        with self._lock:
+            cached = self._memory.get(key)
+            if cached is not None:
+                self._memory.move_to_end(key)
+                self._count(counts, "hits", "memory_hits")
+                return _to_entities(text, cached)
+
+            cached = self._disk_get(key)
+            if cached is None:
+                self._count(counts, "misses")
+                return None
+            self._count(counts, "hits", "disk_hits")
+            self._remember(key, cached)
+            return _to_entities(text, cached)
+
+    def put(self, key: str, entities: Sequence[HFEntity]) -> None:
+        """Store spans for key (labels, offsets and scores only)."""
+        spans: List[CachedEntity] = [(e.label, e.start, e.end, float(e.score)) for e in entities]
+        with self._lock:
+            self._remember(key, spans)
+            self._disk_put(key, spans)
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss/eviction counters and current sizes (no PHI)."""
+        with self._lock:
+            out = dict(self._counters)
+            out["entries"] = len(self._memory)
+            if self._db is not None:
+                out["disk_entries"] = int(self._db.execute("SELECT COUNT(*) FROM ner_cache").fetchone()[0])
+            return out
+
+    def clear(self) -> None:
+        """Drop all entries from both tiers (counters are kept)."""
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM ner_cache")
+                self._db.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def _count(self, counts: Optional[Dict[str, int]], *names: str) -> None:
+        for name in names:
+            self._counters[name] += 1
+            if counts is not None:
+                counts[name] = counts.get(name, 0) + 1
+
+    def _remember(self, key: str, spans: List[CachedEntity]) -> None:
+        if self.max_entries == 0:
+            return
+        self._memory[key] = spans
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self._counters["evictions"] += 1
+
+    def _disk_get(self, key: str) -> Optional[List[CachedEntity]]:
+        if self._db is None:
+            return None
+        row = self._db.execute("SELECT entities FROM ner_cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        self._db.execute("UPDATE ner_cache SET last_used = ? WHERE key = ?", (time.time(), key))
+        self._db.commit()
+        return [(str(l), int(s), int(e), float(sc)) for l, s, e, sc in json.loads(row[0])]
+
+    def _disk_put(self, key: str, spans: List[CachedEntity]) -> None:
+        if self._db is None:
+            return
+        self._db.execute(
+            "INSERT OR REPLACE INTO ner_cache (key, entities, last_used) VALUES (?, ?, ?)",
+            (key, json.dumps(spans), time.time()),
+        )
+        if self.max_disk_entries is not None:
+            cur = self._db.execute(
+                "DELETE FROM ner_cache WHERE key IN "
+                "(SELECT key FROM ner_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_disk_entries,),
+            )
+            self._counters["disk_evictions"] += max(0, cur.rowcount)
+        self._db.commit()
+
+
+def _to_entities(text: str, spans: Sequence[CachedEntity]) -> List[HFEntity]:
+    return [
+        HFEntity(label=label, start=start, end=end, score=score, text=text[start:end])
+        for label, start, end, score in spans
+    ]
+
+
+_SHARED: Dict[Tuple[str, int, Optional[str], Optional[int]], NERCache] = {}
+_SHARED_LOCK = threading.Lock()
+
+
+def shared_ner_cache(
+    max_entries: int = 10_000,
+    path: Optional[Union[str, Path]] = None,
+    max_disk_entries: Optional[int] = None,
+    name: str = "notes",
+) -> NERCache:
+    """
+    Process-wide cache for these settings, so pipelines built per job (e.g. one per
+    run_case_transfer call) keep hitting the same in-memory tier. name separates caches
+    with otherwise identical settings (whole notes vs. sentences).
+    """
+    key = (name, max_entries, str(Path(path).resolve()) if path else None, max_disk_entries)
+    with _SHARED_LOCK:
+        cache = _SHARED.get(key)
+        if cache is None:
+            cache = NERCache(max_entries=max_entries, path=path, max_disk_entries=max_disk_entries)
+            _SHARED[key] = cache
+        return cache
@@ -0,0 +1,164 @@
+"""
+Optional rule pattern packs: built-in (SSN, MRN, member IDs, dates, URLs, ZIP codes) and
+site-specific ones from YAML files.
+
+Packs are not in the default scanner. A pipeline enables them with detectors.rule.packs and
+detectors.rule.pack_files; they are appended after the registered patterns (email and phone
+win ties) and compiled into the pipeline's one combined scanner, so extra coverage adds no extra
+pass over the note. Every built-in pattern also runs on the re2 backend (no lookarounds).
+
+Pack file format:
+
+    patterns:
+      - name: employee_id              # unique identifier
+        entity_type: ID                # one of detector_base.EntityType
+        regex: 'EMP-\\d{6}'
+        flags: [ignorecase]            # optional: ignorecase, multiline, dotall, verbose
+        description: employee-ID-like  # used in verification issues
+        guard: 'EMP-'                  # optional lookahead at match start
+        prefilter: ['emp-']            # optional: literals every matching note contains (any one)
+"""
+from __future__ import annotations
+
+import re
+from pathlib import Path
+from typing import Any, Dict, List, Sequence, get_args
+
+import yaml
+
+from stupiphi.detection.detector_base import EntityType
+from stupiphi.detection.patterns import RulePattern
+
+_MONTHS = ("jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec")
+_MONTH_RE = r"(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.?"
+_STATES = (
+    r"(?:A[KLRZ]|C[AOT]|D[CE]|FL|GA|HI|I[ADLN]|K[SY]|LA|M[ADEINOST]|N[CDEHJMVY]|O[HKR]|PA|RI|S[CD]|T[NX]"
+    r"|UT|V[AT]|W[AIVY])"
+)
+
+BUILTIN_PACKS: Dict[str, List[RulePattern]] = {
+    "identifiers": [
+        RulePattern(
+            name="ssn",
+            entity_type="SSN",
+            regex=re.compile(r"\b\d{3}-\d{2}-\d{4}\b"),
+            description="SSN-like",
+            guard=r"\d{3}-",
+            prefilter=("-",),
+        ),
+        RulePattern(
+            name="mrn",
+            entity_type="MRN",
+            regex=re.compile(
+                r"\b(?:mrn|medical\s+record\s+(?:number|no\.?|\#))\s*[:\#]?\s*[A-Z]{0,3}\d{4,12}\b", re.IGNORECASE
+            ),
+            description="MRN-like",
+            guard=r"[mM]",
+            prefilter=("mrn", "medical"),
+        ),
+        RulePattern(
+            name="member_id",
+            entity_type="ID",
+            regex=re.compile(
+                r"\b(?:member|policy|subscriber|account|acct)\s*(?:id|no\.?|number|\#)\s*[:\#]?\s*"
+                r"[A-Z]{0,4}-?\d[A-Z0-9-]{3,}\b",
+                re.IGNORECASE,
+            ),
+            description="member-ID-like",
+            guard=r"[mMpPsSaA]",
+            prefilter=("member", "policy", "subscriber", "account", "acct"),
+        ),
+    ],
+    "dates": [
+        RulePattern(
+            name="date_numeric",
+            entity_type="DATE",
+            regex=re.compile(r"\b(?:\d{1,2}[/-]\d{1,2}[/-](?:\d{4}|\d{2})|\d{4}-\d{1,2}-\d{1,2})\b"),
+            description="date-like",
+            guard=r"\d{1,4}[/-]",
+            prefilter=("/", "-"),
+        ),
+        RulePattern(
+            name="date_text",
+            entity_type="DATE",
+            regex=re.compile(
+                rf"\b(?:{_MONTH_RE}\s+\d{{1,2}}(?:st|nd|rd|th)?,?\s+\d{{4}}|\d{{1,2}}\s+{_MONTH_RE},?\s+\d{{4}})\b",
+                re.IGNORECASE,
+            ),
+            description="date-like",
+            guard=r"[JFMASONDjfmasond\d]",
+            prefilter=_MONTHS,
+        ),
+    ],
+    "urls": [
+        RulePattern(
+            name="url",
+            entity_type="URL",
+            regex=re.compile(r"\b(?:https?://|www\.)[^\s<>\"']*[^\s<>\"'.,;:!?)\]]", re.IGNORECASE),
+            description="URL-like",
+            guard=r"[hHwW]",
+            prefilter=("http", "www."),
+        ),
+    ],
+    "zip": [
+        RulePattern(
+            name="zip",
+            entity_type="ZIP",
+            regex=re.compile(rf"\b{_STATES},?\s+\d{{5}}(?:-\d{{4}})?\b"),
+            description="ZIP-code-like",
+            guard=r"[A-Z]{2},?\s",
+        ),
+    ],
+}
+
+_FLAGS = {"ignorecase": re.IGNORECASE, "multiline": re.MULTILINE, "dotall": re.DOTALL, "verbose": re.VERBOSE}
+_ENTITY_TYPES = frozenset(get_args(EntityType))
+
+
+def load_rule_packs(packs: Sequence[str] = (), pack_files: Sequence[str] = ()) -> List[RulePattern]:
+    """Patterns of the named built-in packs, then those of each pack file, in order."""
+    patterns: List[RulePattern] = []
+    for name in packs:
+        if name not in BUILTIN_PACKS:
+            raise ValueError(f"Unknown rule pack {name!r}; expected one of: {', '.join(sorted(BUILTIN_PACKS))}")
+        patterns.extend(BUILTIN_PACKS[name])
+    for path in pack_files:
+        patterns.extend(load_pattern_file(path))
+    return patterns
+
+
+def load_pattern_file(path: str | Path) -> List[RulePattern]:
+    """Patterns from a YAML pack file (see module docstring for the format)."""
+    with open(path, "r", encoding="utf-8") as f:
+        data = yaml.safe_load(f) or {}
+    entries = data.get("patterns") if isinstance(data, dict) else None
+    if not isinstance(entries, list):
+        raise ValueError(f"{path}: expected a top-level 'patterns' list")
+    return [pattern_from_dict(entry, source=str(path)) for entry in entries]
+
+
+def pattern_from_dict(entry: Dict[str, Any], source: str = "<pack>") -> RulePattern:
+    if not isinstance(entry, dict) or not entry.get("name") or not entry.get("regex"):
+        raise ValueError(f"{source}: every pattern needs a name and a regex")
+    name = str(entry["name"])
+    entity_type = str(entry.get("entity_type", "UNKNOWN")).upper()
+    if entity_type not in _ENTITY_TYPES:
+        raise ValueError(f"{source}: pattern {name!r} has unknown entity_type {entity_type!r}")
+    flags = 0
+    for flag in entry.get("flags") or []:
+        key = str(flag).strip().lower()
+        if key not in _FLAGS:
+            raise ValueError(f"{source}: pattern {name!r} has unknown flag {flag!r}")
+        flags |= _FLAGS[key]
+    try:
+        regex = re.compile(str(entry["regex"]), flags)
+    except re.error as e:
+        raise ValueError(f"{source}: pattern {name!r} does not compile: {e}") from e
+    return RulePattern(
+        name=name,
+        entity_type=entity_type,
+        regex=regex,
+        description=str(entry.get("description") or f"{name}-like"),
+        guard=str(entry["guard"]) if entry.get("guard") else None,
+        prefilter=tuple(str(literal) for literal in entry.get("prefilter") or ()),
+    )
@@ -0,0 +1,483 @@
+"""
+Rule patterns and the multi-pattern scanner shared by detection, verification and evals.
+
+All registered patterns are compiled into one alternation of named groups, so a text is
+scanned once per stage instead of once per pattern per module. The alternation reports one
+pattern per span, so each reported span is then checked for matches of the other patterns
+starting inside it (the email in "(555) 123-4567@example.com" starts inside the phone): scan()
+returns the same matches as a separate finditer() per pattern. Spans of different patterns can
+therefore overlap; the redaction plan merges them.
+
+New patterns plug in with register_pattern(); default_scanner() picks them up. Optional packs
+(SSN, MRN, dates, URLs, ZIP codes, site-specific YAML files) are in pattern_packs and are
+compiled into a pipeline's scanner when enabled in config.
+
+A pattern's prefilter lists literals of which a note must contain at least one (e.g. "-" for
+dashed SSNs). Notes lacking them are scanned by a cached scanner without that pattern, so rarely
+relevant patterns cost one substring test per note instead of a match attempt at every position.
+Per-pattern hits and prefilter skips are counted (pattern_stats()) and scan time is totalled
+(stats()); profile() times each pattern on its own to find the expensive ones.
+
+scan_batch() scans many short texts by joining them with a NUL separator and running the
+combined pattern once per ~1M characters, which removes the per-call overhead that dominates
+on short notes. Patterns must not match across NUL (none of the built-in ones can); a match
+that does is dropped and the texts it touched are rescanned on their own.
+
+backend="re2" runs the same patterns on RE2 (linear time; see linear_regex) so adversarial
+notes cannot stall a worker. scan_budget_ms bounds the time spent per note: Python's re cannot
+be interrupted inside one match attempt, so with backend="re" the budget is checked between
+matches and the rest of an over-budget note is scanned with RE2 when it is installed.
+"""
+from __future__ import annotations
+
+import re
+import threading
+import time
+from bisect import bisect_right
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+from stupiphi.detection.linear_regex import compile_re2, linear_backend_available, to_re2_syntax
+
+EMAIL_RE = re.compile(r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}\b")
+
+PHONE_RE = re.compile(
+    r"""
+    \b
+    (?:\+?1[\s\-\.]?)?                   # optional country code
+    (?:\(?\d{3}\)?[\s\-\.]?)             # area code
+    \d{3}[\s\-\.]?\d{4}                  # local number
+    (?:\s*(?:x|ext\.?|extension)\s*\d+)? # optional extension
+    \b
+    """,
+    re.IGNORECASE | re.VERBOSE,
+)
+
+BACKENDS = ("re", "re2")
+
+_BATCH_SEPARATOR = "\x00"
+_BATCH_CHARS = 1 << 20
+_WINDOW_MAX = 512  # longest span checked for hidden matches with one windowed match() (RE2 allows 1000)
+
+# Flags that can be scoped to one alternative with (?flags:...).
+_SCOPED_FLAGS = ((re.IGNORECASE, "i"), (re.MULTILINE, "m"), (re.DOTALL, "s"), (re.VERBOSE, "x"))
+
+
+@dataclass(frozen=True)
+class RulePattern:
+    """
+    One rule pattern.
+
+    name: unique identifier (used as the regex group name).
+    entity_type: EntityType reported for matches.
+    regex: compiled pattern; only the i/m/s/x flags are supported.
+    description: short phrase for verification issues, e.g. "email-like".
+    guard: optional lookahead that holds wherever a match starts (a necessary condition, e.g.
+      "a digit or parenthesis comes first"). The combined scan checks it first, so most positions skip the pattern
+      after one cheap test instead of a full match attempt.
+    prefilter: literals of which every matching note contains at least one (compared in lower
+      case when regex has IGNORECASE). Must be a necessary condition, like guard.
+    """
+    name: str
+    entity_type: str
+    regex: "re.Pattern[str]"
+    description: str
+    guard: Optional[str] = None
+    prefilter: Tuple[str, ...] = ()
+
+
+class PatternMatch(NamedTuple):
+    name: str
+    entity_type: str
+    start: int
+    end: int
+
+
+class PatternScanner:
+    """Scan text for all patterns in a single pass."""
+
+    def __init__(
+        self,
+        patterns: Sequence[RulePattern],
+        backend: str = "re",
+        scan_budget_ms: Optional[float] = None,
+    ) -> None:
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown rule backend {backend!r}; expected one of: {', '.join(BACKENDS)}")
+        self.patterns: List[RulePattern] = list(patterns)
+        self.backend = backend
+        self.scan_budget_ms = scan_budget_ms
+        self._by_name: Dict[str, RulePattern] = {}
+        for p in self.patterns:
+            if not p.name.isidentifier() or p.name in self._by_name:
+                raise ValueError(f"Pattern name must be a unique identifier: {p.name!r}")
+            self._by_name[p.name] = p
+        self._combined: Any = None
+        if self.patterns:
+            linear = backend == "re2"
+            source = _combined_source(self.patterns, linear=linear)
+            self._combined = compile_re2(source) if linear else re.compile(source)
+        self._types = {p.name: p.entity_type for p in self.patterns}
+        self._prefilters = [
+            (p.name, _prefilter_literals(p), bool(p.regex.flags & re.IGNORECASE)) for p in self.patterns if p.prefilter
+        ]
+        self._subsets: Dict[FrozenSet[str], "PatternScanner"] = {}
+        self._windows: Dict[Tuple[str, int], Any] = {}  # (pattern, window) -> other patterns behind a lazy prefix
+        self._fallback: Optional[PatternScanner] = None
+        # Counters live on the scanner callers hold; subset scanners report to it. The lock
+        # guards them: one scanner is shared by every thread of a pipeline (e.g. the server).
+        self._root: PatternScanner = self
+        self._counter_lock = threading.Lock()
+        self._budget_exceeded = 0
+        self._texts = 0
+        self._scan_seconds = 0.0
+        self._hits: Dict[str, int] = dict.fromkeys(self._by_name, 0)
+        self._prefilter_skips: Dict[str, int] = dict.fromkeys(self._by_name, 0)
+
+    def stats(self) -> Dict[str, float]:
+        """texts and scan_ms: notes scanned and total time; budget_exceeded: notes past scan_budget_ms."""
+        with self._counter_lock:
+            return {
+                "texts": self._texts,
+                "scan_ms": round(1000 * self._scan_seconds, 3),
+                "budget_exceeded": self._budget_exceeded,
+            }
+
+    def pattern_stats(self) -> Dict[str, Dict[str, int]]:
+        """Per pattern: hits (matches reported by scan/scan_batch) and prefilter_skips (notes skipped)."""
+        with self._counter_lock:
+            return {
+                name: {"hits": self._hits[name], "prefilter_skips": self._prefilter_skips[name]} for name in self._hits
+            }
+
+    def profile(self, texts: Iterable[str]) -> Dict[str, float]:
+        """Seconds each pattern takes on its own over texts (no counters updated), for tuning packs."""
+        texts = list(texts)
+        timings: Dict[str, float] = {}
+        for p in self.patterns:
+            started = time.perf_counter()
+            for text in texts:
+                for _ in p.regex.finditer(text):
+                    pass
+            timings[p.name] = time.perf_counter() - started
+        return timings
+
+    def scan(self, text: str) -> List[PatternMatch]:
+        """All matches in text, in order of position."""
+        if self._combined is None or not text:
+            return []
+        started = time.perf_counter()
+        matches = self._for_text(text)._scan_one(text)
+        self._record([matches], started)
+        return matches
+
+    def scan_batch(self, texts: Sequence[str]) -> List[List[PatternMatch]]:
+        """scan() for each text (same results), joining texts so the regex runs over few large buffers."""
+        results: List[List[PatternMatch]] = [[] for _ in texts]
+        if self._combined is None:
+            return results
+        started = time.perf_counter()
+        if self.scan_budget_ms is not None:  # the budget is per note
+            results = [self._for_text(t)._scan_one(t) if t else [] for t in texts]
+        elif not self._prefilters:
+            self._scan_batch_into(texts, range(len(texts)), results)
+        else:
+            # Notes with the same prefilter outcome share a subset scanner: one joined scan per subset.
+            groups: Dict[int, Tuple[PatternScanner, List[int]]] = {}
+            for i, text in enumerate(texts):
+                if text:
+                    scanner = self._for_text(text)
+                    groups.setdefault(id(scanner), (scanner, []))[1].append(i)
+            for scanner, indices in groups.values():
+                scanner._scan_batch_into(texts, indices, results)
+        self._record(results, started)
+        return results
+
+    def _record(self, results: List[List[PatternMatch]], started: float) -> None:
+        elapsed = time.perf_counter() - started
+        with self._counter_lock:
+            self._scan_seconds += elapsed
+            self._texts += len(results)
+            hits = self._hits
+            for matches in results:
+                for m in matches:
+                    hits[m.name] += 1
+
+    def _missing(self, text: str, count: bool = False) -> FrozenSet[str]:
+        """Patterns whose prefilter rules them out for text."""
+        missing = []
+        lowered: Optional[str] = None
+        for name, literals, ignorecase in self._prefilters:
+            if ignorecase and lowered is None:
+                lowered = text.lower()
+            haystack = lowered if ignorecase else text
+            if not any(literal in haystack for literal in literals):  # type: ignore[operator]
+                missing.append(name)
+        if count:
+            with self._counter_lock:
+                for name in missing:
+                    self._prefilter_skips[name] += 1
+        return frozenset(missing)
+
+    def _for_text(self, text: str) -> "PatternScanner":
+        if not self._prefilters:
+            return self
+        missing = self._missing(text, count=True)
+        return self._without(missing) if missing else self
+
+    def _scan_one(self, text: str) -> List[PatternMatch]:
+        if self._combined is None or not text:
+            return []
+        if self.scan_budget_ms is not None:
+            return self._scan_budgeted(text)
+        types = self._types
+        matches = [
+            PatternMatch(m.lastgroup, types[m.lastgroup], m.start(), m.end())  # type: ignore[arg-type,index]
+            for m in self._combined.finditer(text)
+        ]
+        return self._with_hidden(text, matches)
+
+    def _with_hidden(self, text: str, matches: List[PatternMatch]) -> List[PatternMatch]:
+        """
+        matches plus those of other patterns starting inside them, which the alternation hides.
+        One match() of the other patterns behind a lazy prefix as long as the span finds the
+        first candidate without looking past the span (a search() would run on to the end of the
+        text, costing a second full scan on a long unmatched tail); spans that have one are then
+        re-tried position by position, since several patterns can start inside the same span.
+        """
+        if len(self.patterns) < 2 or not matches:
+            return matches
+        types = self._types
+        hidden: List[PatternMatch] = []
+        overrun: Set[str] = set()
+        for m in matches:
+            name, _, start, end = m
+            t = start
+            if end - start <= _WINDOW_MAX:
+                first = self._window(name, end - start).match(text, start)
+                if first is None or first.start(first.lastindex) >= end:
+                    continue
+                t = first.start(first.lastindex)
+            ends = {name: end}  # pattern -> end of its match covering the current position
+            while t < end:
+                scanner = self._without(frozenset(n for n, e in ends.items() if e > t))
+                hit = scanner._combined.match(text, t) if scanner._combined is not None else None
+                if hit is None:
+                    t += 1
+                    continue
+                found = hit.lastgroup
+                hidden.append(PatternMatch(found, types[found], t, hit.end()))  # type: ignore[arg-type,index]
+                ends[found] = hit.end()  # other patterns may still match at t: retry without it
+                if hit.end() > end:
+                    overrun.add(found)
+        if not hidden:
+            return matches
+        merged = matches + hidden
+        if overrun:
+            # A hidden match running past the span shifts where that pattern's next match can
+            # start, which the alternation did not know: rescan those patterns on their own.
+            merged = [m for m in merged if m.name not in overrun]
+            for name in overrun:
+                alone = self._without(frozenset(self._by_name) - {name})
+                merged += [PatternMatch(name, types[name], *hit.span()) for hit in alone._combined.finditer(text)]
+        return sorted(merged, key=lambda m: m.start)
+
+    def _window(self, name: str, length: int) -> Any:
+        """The other patterns, matched at most length - 1 characters (rounded up to a power of two) ahead."""
+        width = 1 << max(0, length - 1).bit_length()
+        window = self._windows.get((name, width))
+        if window is None:
+            linear = self.backend == "re2"
+            source = _combined_source([p for p in self.patterns if p.name != name], linear=linear)
+            source = f"(?s:.{{0,{width}}}?)(?:{source})"
+            window = self._windows[(name, width)] = compile_re2(source) if linear else re.compile(source)
+        return window
+
+    def _scan_batch_into(self, texts: Sequence[str], indices: Iterable[int], results: List[List[PatternMatch]]) -> None:
+        if self._combined is None:
+            return
+        group: List[int] = []
+        size = 0
+        for i in indices:
+            text = texts[i]
+            if not text:
+                continue
+            group.append(i)
+            size += len(text) + 1
+            if size >= _BATCH_CHARS:
+                self._scan_joined(texts, group, results)
+                group, size = [], 0
+        if group:
+            self._scan_joined(texts, group, results)
+
+    def _scan_budgeted(self, text: str) -> List[PatternMatch]:
+        deadline = time.perf_counter() + self.scan_budget_ms / 1000  # type: ignore[operator]
+        types = self._types
+        matches: List[PatternMatch] = []
+        for m in self._combined.finditer(text):
+            name = m.lastgroup
+            matches.append(PatternMatch(name, types[name], m.start(), m.end()))
+            if time.perf_counter() > deadline:
+                self._root._count_budget_exceeded()
+                fallback = self._linear_fallback()
+                if fallback is not None:
+                    # Same leftmost-first semantics, so resuming at the last match end is seamless.
+                    types = fallback._types
+                    for m2 in fallback._combined.finditer(text, m.end()):
+                        name = m2.lastgroup
+                        matches.append(PatternMatch(name, types[name], m2.start(), m2.end()))
+                    return fallback._with_hidden(text, matches)
+                deadline = float("inf")  # counted once per note; finish with this backend
+        if time.perf_counter() > deadline:
+            self._root._count_budget_exceeded()
+        return self._with_hidden(text, matches)
+
+    def _count_budget_exceeded(self) -> None:
+        with self._counter_lock:
+            self._budget_exceeded += 1
+
+    def _linear_fallback(self) -> Optional["PatternScanner"]:
+        if self.backend == "re2" or not linear_backend_available():
+            return None
+        if self._fallback is None:
+            self._fallback = PatternScanner(self.patterns, backend="re2")
+        return self._fallback
+
+    def _scan_joined(self, texts: Sequence[str], indices: List[int], results: List[List[PatternMatch]]) -> None:
+        starts: List[int] = []
+        ends: List[int] = []
+        pos = 0
+        for i in indices:
+            starts.append(pos)
+            pos += len(texts[i])
+            ends.append(pos)
+            pos += 1
+        buffer = _BATCH_SEPARATOR.join(texts[i] for i in indices)
+        types = self._types
+        k, offset, text_end = 0, 0, ends[0]
+        out = results[indices[0]]
+        crossed: Set[int] = set()
+        for m in self._combined.finditer(buffer):  # type: ignore[union-attr]
+            start, end = m.span()
+            if start >= text_end:  # matches come in order: binary search only when we move on
+                k = bisect_right(starts, start, lo=k) - 1
+                offset, text_end, out = starts[k], ends[k], results[indices[k]]
+            if end > text_end:
+                crossed.update(range(k, bisect_right(starts, end - 1, lo=k)))
+                continue
+            name = m.lastgroup
+            out.append(PatternMatch(name, types[name], start - offset, end - offset))  # type: ignore[arg-type,index]
+        for k, i in enumerate(indices):
+            if k in crossed:
+                results[i] = self._scan_one(texts[i])
+            elif results[i]:
+                results[i] = self._with_hidden(texts[i], results[i])
+
+    def names_in(self, text: str) -> Set[str]:
+        """
+        Names of the patterns that match somewhere in text, with the same answer as a separate
+        search() per pattern: one search over all patterns, then one over those not yet seen
+        for each hit. Clean text is scanned once.
+        """
+        found: Set[str] = set()
+        if not text:
+            return found
+        excluded = self._missing(text) if self._prefilters else frozenset()
+        scanner: PatternScanner = self._without(excluded) if excluded else self
+        while scanner._combined is not None:
+            m = scanner._combined.search(text)
+            if m is None:
+                break
+            found.add(m.lastgroup)  # type: ignore[arg-type]
+            scanner = self._without(excluded | found)
+        return found
+
+    def _without(self, names: FrozenSet[str]) -> "PatternScanner":
+        scanner = self._subsets.get(names)
+        if scanner is None:
+            scanner = PatternScanner(
+                [p for p in self.patterns if p.name not in names],
+                backend=self.backend,
+                scan_budget_ms=self.scan_budget_ms,
+            )
+            scanner._prefilters = []  # already applied by the caller
+            scanner._root = self._root
+            self._subsets[names] = scanner
+        return scanner
+
+
+def _prefilter_literals(pattern: RulePattern) -> Tuple[str, ...]:
+    if pattern.regex.flags & re.IGNORECASE:
+        return tuple(literal.lower() for literal in pattern.prefilter)
+    return tuple(pattern.prefilter)
+
+
+def _combined_source(patterns: Sequence[RulePattern], linear: bool = False) -> str:
+    """One alternation of named groups; linear=True emits RE2 syntax (no guards: RE2 has no lookahead)."""
+    bodies = [to_re2_syntax(p.regex) if linear else p.regex.pattern for p in patterns]
+    stripped = [_leading_boundary_stripped(p, body) for p, body in zip(patterns, bodies)]
+    if all(body is not None for body in stripped):
+        # Every pattern starts at a word boundary: test it once per position, not once per pattern.
+        alternatives = [_named_alternative(p, body, linear) for p, body in zip(patterns, stripped)]  # type: ignore[arg-type]
+        return r"\b(?:" + "|".join(alternatives) + ")"
+    return "|".join(_named_alternative(p, body, linear) for p, body in zip(patterns, bodies))
+
+
+def _leading_boundary_stripped(pattern: RulePattern, body: str) -> Optional[str]:
+    if pattern.regex.flags & re.VERBOSE:
+        body = body.lstrip()
+    return body[2:] if body.startswith(r"\b") else None
+
+
+def _named_alternative(pattern: RulePattern, body: str, linear: bool = False) -> str:
+    unsupported = pattern.regex.flags & ~(re.UNICODE | sum(flag for flag, _ in _SCOPED_FLAGS))
+    if unsupported:
+        raise ValueError(f"Pattern {pattern.name!r} uses flags that cannot be combined: {unsupported}")
+    # RE2 has no verbose flag; to_re2_syntax already stripped the whitespace and comments.
+    letters = "".join(
+        letter for flag, letter in _SCOPED_FLAGS if pattern.regex.flags & flag and not (linear and letter == "x")
+    )
+    if pattern.regex.flags & re.VERBOSE and not linear:
+        body += "\n"  # a trailing comment must not swallow the closing parenthesis
+    guard = f"(?={pattern.guard})" if pattern.guard and not linear else ""
+    return f"{guard}(?P<{pattern.name}>(?{letters}:{body}))" if letters else f"{guard}(?P<{pattern.name}>{body})"
+
+
+_lock = threading.Lock()
+_registry: List[RulePattern] = [
+    # No guard on email: "an @ follows" scans the same run the pattern does, doubling the cost
+    # on long @-less runs, and saves nothing measurable on ordinary notes.
+    RulePattern(name="email", entity_type="EMAIL", regex=EMAIL_RE, description="email-like"),
+    RulePattern(name="phone", entity_type="PHONE", regex=PHONE_RE, description="phone-like", guard=r"[\d(+]"),
+]
+_default_scanner: Optional[PatternScanner] = None
+
+
+def register_pattern(pattern: RulePattern) -> None:
+    """Add a pattern to the default scanner (detection, verification and evals)."""
+    global _default_scanner
+    with _lock:
+        candidate = PatternScanner([*_registry, pattern])  # validates before mutating
+        _registry.append(pattern)
+        _default_scanner = candidate
+
+
+def unregister_pattern(name: str) -> None:
+    global _default_scanner
+    with _lock:
+        _registry[:] = [p for p in _registry if p.name != name]
+        _default_scanner = None
+
+
+def registered_patterns() -> List[RulePattern]:
+    with _lock:
+        return list(_registry)
+
+
+def default_scanner() -> PatternScanner:
+    """Scanner over all registered patterns; rebuilt only when the registry changes."""
+    global _default_scanner
+    with _lock:
+        if _default_scanner is None:
+            _default_scanner = PatternScanner(_registry)
+        return _default_scanner
@@ -1,65 +1,66 @@
 from __future__ import annotations
 
-import re
-from typing import List
+from typing import Dict, List, Optional, Sequence
 
-from stupiphi.detection.detector_base import Finding
+from stupiphi.detection.detector_base import DetectionCounts, Finding
+from stupiphi.detection.patterns import EMAIL_RE, PHONE_RE, PatternMatch, PatternScanner, default_scanner
 from stupiphi.models.canonical_record import CanonicalRecord
 
-
-EMAIL_RE = re.compile(r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}\b")
-
-PHONE_RE = re.compile(
-    r"""
-    \b
-    (?:\+?1[\s\-\.]?)?
-    (?:\(?\d{3}\)?[\s\-\.]?)
-    \d{3}[\s\-\.]?\d{4}
-    (?:\s*(?:x|ext\.?|extension)\s*\d+)?
-    \b
-    """,
-    re.IGNORECASE | re.VERBOSE,
-)
+__all__ = ["EMAIL_RE", "PHONE_RE", "RuleBasedDetector"]
 
 
 class RuleBasedDetector:
     """
     Simple pattern-based detector for entities that generic NER models often miss.
+    All rule patterns (see detection.patterns) are matched in one pass over the note.
     """
 
-    def __init__(self, min_confidence: float = 0.99) -> None:
+    cost = 1
+
+    def __init__(self, min_confidence: float = 0.99, scanner: Optional[PatternScanner] = None) -> None:
         # We treat regex matches as high-confidence in this MVP.
         self.min_confidence = min_confidence
+        self._scanner = scanner
 
-    def detect(self, record: CanonicalRecord) -> List[Finding]:
-        findings: List[Finding] = []
-        text = record.encounter_notes
+    @property
+    def scanner(self) -> PatternScanner:
+        # Resolved per call so patterns registered after construction are picked up.
+        return self._scanner if self._scanner is not None else default_scanner()
 
-        for m in EMAIL_RE.finditer(text):
-            findings.append(
-                Finding(
-                    field_path="encounter_notes",
-                    entity_type="EMAIL",
-                    confidence=self.min_confidence,
-                    detector_source="rule",
-                    start=m.start(),
-                    end=m.end(),
-                    text=text[m.start():m.end()],
-                )
-            )
+    def detect(self, record: CanonicalRecord, counts: Optional[DetectionCounts] = None) -> List[Finding]:
+        matches = self.scanner.scan(record.encounter_notes)
+        return self._to_findings(record.encounter_notes, matches, counts)
+
+    def detect_batch(
+        self, records: Sequence[CanonicalRecord], counts: Optional[DetectionCounts] = None
+    ) -> List[List[Finding]]:
+        """
+        detect() for many records (same findings), scanning their notes as one joined buffer.
+        counts: also tally this call's matches per pattern there (the scanner's own
+        pattern_stats() include every caller sharing it).
+        """
+        texts = [r.encounter_notes for r in records]
+        return [self._to_findings(t, matches, counts) for t, matches in zip(texts, self.scanner.scan_batch(texts))]
 
-        for m in PHONE_RE.finditer(text):
-            findings.append(
-                Finding(
-                    field_path="encounter_notes",
-                    entity_type="PHONE",
-                    confidence=self.min_confidence,
-                    detector_source="rule",
-                    start=m.start(),
-                    end=m.end(),
-                    text=text[m.start():m.end()],
-                )
+    def _to_findings(
+        self, text: str, matches: List[PatternMatch], counts: Optional[DetectionCounts] = None
+    ) -> List[Finding]:
+        if counts is not None:
+            hits: Dict[str, int] = counts.rule_hits
+            for m in matches:
+                hits[m.name] = hits.get(m.name, 0) + 1
+        findings = [
+            Finding(
+                field_path="encounter_notes",
+                entity_type=m.entity_type,  # type: ignore[arg-type]
+                confidence=self.min_confidence,
+                detector_source="rule",
+                start=m.start,
+                end=m.end,
+                text=text[m.start:m.end],
             )
+            for m in matches
+        ]
 
         # Sort descending so redaction application remains safe even if caller forgets
         findings.sort(key=lambda f: (f.start or 0), reverse=True)
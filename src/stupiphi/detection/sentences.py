@@ -0,0 +1,54 @@
+"""
+Lightweight sentence splitting for clinical notes.
+
+Used to memoize NER per sentence: templated notes share most sentences, so only unseen
+sentences need a model call. Heuristic (no NLP dependency): a sentence ends at ., ! or ?
+followed by whitespace, or at a line break. Common titles/abbreviations and single-letter
+initials do not end a sentence, so "Dr. Smith" or "J. Smith" stays in one piece.
+"""
+from __future__ import annotations
+
+import re
+from typing import List, Tuple
+
+_BOUNDARY_RE = re.compile(r"[.!?]+(?=\s)|\n")
+_WORD_BEFORE_RE = re.compile(r"(\w+)$")
+
+_NO_BREAK_AFTER = frozenset(
+    {
+        "dr", "mr", "mrs", "ms", "mx", "prof", "sr", "jr", "st", "rd", "ave", "blvd",
+        "apt", "no", "vs", "etc", "approx", "dept", "hosp", "pt", "pts",
+    }
+)
+
+
+def split_sentences(text: str) -> List[Tuple[int, int]]:
+    """
+    (start, end) character spans of the sentences in text, whitespace trimmed.
+
+    Spans are in order, do not overlap and together cover every non-whitespace character.
+    """
+    spans: List[Tuple[int, int]] = []
+    start = 0
+    for m in _BOUNDARY_RE.finditer(text):
+        if m.group() != "\n":
+            word = _WORD_BEFORE_RE.search(text, start, m.start())
+            if word and _is_abbreviation(word.group(1)):
+                continue
+        _append_trimmed(text, start, m.end(), spans)
+        start = m.end()
+    _append_trimmed(text, start, len(text), spans)
+    return spans
+
+
+def _is_abbreviation(word: str) -> bool:
+    return word.lower() in _NO_BREAK_AFTER or (len(word) == 1 and word.isupper())
+
+
+def _append_trimmed(text: str, start: int, end: int, spans: List[Tuple[int, int]]) -> None:
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    if start < end:
+        spans.append((start, end))
@@ -25,6 +25,8 @@ class StructuredFieldDetector:
     Confidence is high since these are explicit schema fields.
     """
 
+    cost = 0
+
     def __init__(self, confidence: float = 1.0) -> None:
         self.confidence = confidence
 
@@ -1,7 +1,7 @@
 """Evaluation harness: labeled datasets and metrics."""
 from stupiphi.evals.labels import InjectedLabel, LabelType
 from stupiphi.evals.labeled_dataset import LabeledRecord, generate_labeled_records
-from stupiphi.evals.metrics import EvalResult, evaluate_sanitization
+from stupiphi.evals.metrics import EvalResult, evaluate_sanitization, passes_accuracy_gate
 
 __all__ = [
     "InjectedLabel",
@@ -10,4 +10,5 @@ __all__ = [
     "generate_labeled_records",
     "EvalResult",
     "evaluate_sanitization",
+    "passes_accuracy_gate",
 ]
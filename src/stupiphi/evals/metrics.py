@@ -6,7 +6,7 @@ from typing import Dict, List
 from stupiphi.evals.labels import InjectedLabel
 from stupiphi.evals.labeled_dataset import LabeledRecord
 from stupiphi.models.canonical_record import CanonicalRecord
-from stupiphi.verification.verify import EMAIL_RE, PHONE_RE
+from stupiphi.detection.patterns import default_scanner
 
 
 @dataclass(frozen=True)
@@ -22,8 +22,12 @@ class EvalResult:
 
 def _count_residual_patterns(records: List[CanonicalRecord]) -> tuple[int, int]:
     """Return (number of records with ≥1 email pattern, number with ≥1 phone pattern)."""
-    email_count = sum(1 for r in records if EMAIL_RE.search(r.encounter_notes))
-    phone_count = sum(1 for r in records if PHONE_RE.search(r.encounter_notes))
+    scanner = default_scanner()
+    email_count = phone_count = 0
+    for r in records:
+        found = scanner.names_in(r.encounter_notes)
+        email_count += "email" in found
+        phone_count += "phone" in found
     return email_count, phone_count
 
 
@@ -76,3 +80,25 @@ def evaluate_sanitization(
         residual_email_count=residual_email_count,
         residual_phone_count=residual_phone_count,
     )
+
+
+def passes_accuracy_gate(
+    baseline: EvalResult,
+    candidate: EvalResult,
+    max_fn_rate_increase: float = 0.0,
+) -> bool:
+    """
+    Accuracy gate for a cheaper model variant (e.g. int8 quantized vs fp32) on the same labeled set.
+
+    The candidate passes if its false-negative rate, overall and for every label type,
+    is at most the baseline's plus max_fn_rate_increase.
+    """
+    if candidate.false_negative_rate > baseline.false_negative_rate + max_fn_rate_increase:
+        return False
+    for label_type, total in candidate.by_type_total.items():
+        base_total = baseline.by_type_total.get(label_type, 0)
+        base_rate = baseline.by_type_fn.get(label_type, 0) / base_total if base_total else 0.0
+        cand_rate = candidate.by_type_fn.get(label_type, 0) / total if total else 0.0
+        if cand_rate > base_rate + max_fn_rate_increase:
+            return False
+    return True
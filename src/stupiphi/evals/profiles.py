@@ -0,0 +1,62 @@
+"""
+Compare detector profiles (fast / balanced / thorough) on the same labeled records:
+throughput, false-negative rate and how much of the text went through NER.
+"""
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, replace
+from typing import Callable, List, Sequence
+
+from stupiphi.detection.cascade import PROFILES
+from stupiphi.evals.labeled_dataset import LabeledRecord
+from stupiphi.evals.metrics import EvalResult, evaluate_sanitization
+from stupiphi.sanitizer.pipeline import PipelineConfig, SanitizationPipeline
+
+_WARMUP_RECORDS = 8
+
+
+@dataclass(frozen=True)
+class ProfileEval:
+    profile: str
+    seconds: float
+    records_per_second: float
+    ner_note_share: float  # fraction of notes that went through NER
+    ner_char_share: float  # fraction of note characters that went through NER
+    result: EvalResult
+
+
+def compare_profiles(
+    labeled: List[LabeledRecord],
+    cfg: PipelineConfig,
+    profiles: Sequence[str] = PROFILES,
+    batch_size: int = 16,
+    build: Callable[[PipelineConfig], SanitizationPipeline] = SanitizationPipeline,
+) -> List[ProfileEval]:
+    """
+    Sanitize the records once per profile. NER caches are turned off so no profile benefits
+    from another's results; each pipeline is warmed up on a few records before timing.
+    """
+    records = [lr.record for lr in labeled]
+    base = replace(cfg, hf_cache_entries=0, hf_cache_disk=False, hf_sentence_memo_entries=0)
+    evals: List[ProfileEval] = []
+    for profile in profiles:
+        pipeline = build(replace(base, detector_profile=profile))
+        pipeline.sanitize_batch(records[:_WARMUP_RECORDS], batch_size=batch_size)
+        before = pipeline.cascade_stats()
+        started = time.perf_counter()
+        sanitized = [res.record for res in pipeline.sanitize_batch(records, batch_size=batch_size)]
+        seconds = time.perf_counter() - started
+        after = pipeline.cascade_stats()
+        counts = {k: after[k] - before.get(k, 0) for k in after}
+        evals.append(
+            ProfileEval(
+                profile=profile,
+                seconds=seconds,
+                records_per_second=len(records) / seconds if seconds > 0 else float("inf"),
+                ner_note_share=counts["ner_notes"] / counts["notes"] if counts["notes"] else 0.0,
+                ner_char_share=counts["ner_chars"] / counts["chars"] if counts["chars"] else 0.0,
+                result=evaluate_sanitization(labeled, sanitized),
+            )
+        )
+    return evals
@@ -0,0 +1,30 @@
+"""
+Worst-case inputs for the rule patterns (backtracking stress corpus).
+
+Each entry is a synthetic "note" built to make a backtracking engine retry the email or phone
+pattern from many start positions: long dotted runs before and after an @, digit groups with
+separators, and mixed punctuation. Used by tests (backend parity) and by
+scripts/regex_worst_case_benchmark.py (timings). No PHI: all strings are generated.
+"""
+from __future__ import annotations
+
+from typing import Dict
+
+
+def worst_case_notes(size: int = 5000) -> Dict[str, str]:
+    """Name -> adversarial text; size scales the repeated unit (Python re time grows ~quadratically)."""
+    return {
+        "dotted_local_no_at": "a." * size,
+        "dotted_local_then_at": "a." * size + "@",
+        "dotted_local_at_dotted_domain": "a." * size + "@" + "a." * size + "!",
+        "at_then_dotted_domain": "x@" + "a." * size + "1",
+        "repeated_at": "a@" * size,
+        "digit_run": "1" * (4 * size),
+        "dashed_digit_groups": "123-" * size,
+        "dotted_digits": "1." * (2 * size),
+        "extension_padding": "555-123-4567" + " " * size + "x",
+        "country_codes": "+1 " * size,
+        "area_codes": "(555) " * size,
+        "mixed_punctuation": "a1.-" * size,
+        "realistic_tail": "Patient reports headache. Call 555-123-4567. " + "ref:" + "9." * size + "@x",
+    }
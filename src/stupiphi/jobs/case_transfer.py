@@ -8,10 +8,14 @@ from datetime import datetime, timezone
 from typing import Any, Callable, Dict, List, Optional
 
 from stupiphi.connectors.postgres import get_prod_client, get_dev_client, PostgresClient
+from stupiphi.detection.detector_base import DetectionCounts
+from stupiphi.detection.known_entities import KnownEntityScanner
+from stupiphi.detection.ner_cache import NERCache
 from stupiphi.slice.extract_case_slice import extract_case_slice
 from stupiphi.slice.map_to_canonical import case_slice_to_canonical_records
 from stupiphi.slice.replay_case_slice import replay_case_slice
-from stupiphi.sanitizer.pipeline import PipelineConfig, SanitizationPipeline, SanitizeResult
+from stupiphi.sanitizer.pipeline import PatientMemo, PipelineConfig, SanitizationPipeline, SanitizeResult
+from stupiphi.transformation.pseudonym_vault import PseudonymVault
 from stupiphi.verification.db_verify import DEFAULT_TABLES, verify_dev_db
 
 
@@ -67,6 +71,9 @@ class TransferReport:
     db_findings_count: int = 0
     db_findings_by_table: Dict[str, int] = field(default_factory=dict)
     db_findings_by_column: Dict[str, int] = field(default_factory=dict)
+    ner_cache: Dict[str, int] = field(default_factory=dict)  # NER cache hits/misses for this run
+    rule_hits: Dict[str, int] = field(default_factory=dict)  # rule pattern name -> matches this run
+    pseudonym_vault: Dict[str, float] = field(default_factory=dict)  # vault hits/misses this run, size, hit rate
 
     def to_dict(self) -> Dict[str, object]:
         """JSON-serializable dict; no PHI. Datetimes as ISO strings."""
@@ -82,6 +89,56 @@ def _write_report(report: TransferReport, path: str) -> None:
         f.write(report.to_json())
 
 
+def _emit_report(
+    report: TransferReport,
+    report_out: Optional[str],
+    report_sink: Optional[Callable[[TransferReport], None]],
+) -> None:
+    if report_out:
+        _write_report(report, report_out)
+    if report_sink is not None:
+        report_sink(report)
+
+
+_NER_CACHE_LOOKUPS = ("hits", "memory_hits", "disk_hits", "misses")
+
+
+def _ner_cache_report(pipeline: SanitizationPipeline, counts: DetectionCounts) -> Dict[str, int]:
+    """
+    This run's lookups in the note cache, and in the sentence memo prefixed with "sentence_",
+    plus their sizes as of now. Lookups are counted per run (counts), not taken from the caches'
+    own stats, which also move with concurrent runs sharing them.
+    """
+    hf = getattr(pipeline, "hf", None)
+    report: Dict[str, int] = {}
+    for prefix, cache, lookups in (
+        ("", getattr(hf, "cache", None), counts.ner_cache),
+        ("sentence_", getattr(hf, "sentence_memo", None), counts.sentence_memo),
+    ):
+        if isinstance(cache, NERCache):
+            sizes = cache.stats()
+            report.update({prefix + k: lookups.get(k, 0) for k in _NER_CACHE_LOOKUPS})
+            report.update({prefix + k: sizes[k] for k in ("entries", "disk_entries") if k in sizes})
+    return report
+
+
+_VAULT_COUNTERS = ("hits", "memory_hits", "disk_hits", "misses", "puts")
+
+
+def _vault_stats(pipeline: SanitizationPipeline) -> Dict[str, float]:
+    vault = getattr(pipeline, "pseudonym_vault", None)
+    return vault.stats() if isinstance(vault, PseudonymVault) else {}
+
+
+def _vault_delta(before: Dict[str, float], after: Dict[str, float]) -> Dict[str, float]:
+    """Counters and hit rate for this run only (the vault is shared across runs); sizes as of now."""
+    out = {k: v - before.get(k, 0) if k in _VAULT_COUNTERS else v for k, v in after.items()}
+    if out:
+        lookups = out["hits"] + out["misses"]
+        out["hit_rate"] = out["hits"] / lookups if lookups else 0.0
+    return out
+
+
 def _rows_extracted_from_slice(slice_dict: object) -> Dict[str, int]:
     if not isinstance(slice_dict, dict):
         return {}
@@ -103,6 +160,8 @@ def run_case_transfer(
     fail_on_verification: bool = False,
     verify_dev: bool = True,
     fail_on_db_verify: bool = False,
+    pipeline: Optional[SanitizationPipeline] = None,
+    report_sink: Optional[Callable[[TransferReport], None]] = None,
 ) -> TransferReport:
     """Run extract → sanitize → [replay unless dry_run or verification gating] → [verify dev DB if verify_dev].
 
@@ -110,13 +169,20 @@ def run_case_transfer(
     (the tool does not store it). When fail_on_verification is True and any record fails
     verification, raises VerificationFailedError after optionally writing report. When
     fail_on_db_verify is True and dev DB verification finds patterns, raises DBVerificationFailedError.
+    A prebuilt pipeline (e.g. the warm one held by `stupiphi serve`) is used instead of
+    building one from config_path; config_path is then only recorded in the report.
+    report_sink receives the report wherever report_out would be written, including before
+    the verification errors are raised (the server returns it instead of writing a file).
     """
     _ensure_transfer_allowed()
     started_at = _now_iso()
-    if config_path:
-        pipeline = SanitizationPipeline.from_yaml(config_path)
-    else:
-        pipeline = SanitizationPipeline(PipelineConfig())
+    if pipeline is None:
+        if config_path:
+            pipeline = SanitizationPipeline.from_yaml(config_path)
+        else:
+            pipeline = SanitizationPipeline(PipelineConfig())
+
+    vault_before = _vault_stats(pipeline)
 
     prod_client: PostgresClient = get_prod_client()
     dev_client: PostgresClient = get_dev_client()
@@ -124,17 +190,27 @@ def run_case_transfer(
     try:
         slice_dict = extract_case_slice(case_id, prod_client)
         records = case_slice_to_canonical_records(slice_dict)
+        # The slice already names the patient and therapists: find those identifiers in every note.
+        known_entities = KnownEntityScanner.from_case_slice(slice_dict)
+        # Every appointment repeats the patient: detect and replace its structured fields once.
+        patient_memo = PatientMemo()
+        counts = DetectionCounts()
 
         sanitized_results: List[SanitizeResult] = []
         verification_failures = 0
 
         for rec in records:
-            res = pipeline.sanitize_record(rec, audit_sink=audit_sink)
+            res = pipeline.sanitize_record(
+                rec, audit_sink=audit_sink, known_entities=known_entities, patient_memo=patient_memo, counts=counts
+            )
             sanitized_results.append(res)
             if not res.verification_ok:
                 verification_failures += 1
 
         rows_extracted = _rows_extracted_from_slice(slice_dict)
+        ner_cache = _ner_cache_report(pipeline, counts)
+        rule_hits = dict(counts.rule_hits)
+        pseudonym_vault = _vault_delta(vault_before, _vault_stats(pipeline))
 
         # Verification gating: abort before replay, still write artifacts if requested
         if fail_on_verification and verification_failures > 0:
@@ -153,9 +229,11 @@ def run_case_transfer(
                 db_findings_count=0,
                 db_findings_by_table={},
                 db_findings_by_column={},
+                ner_cache=ner_cache,
+                rule_hits=rule_hits,
+                pseudonym_vault=pseudonym_vault,
             )
-            if report_out:
-                _write_report(report, report_out)
+            _emit_report(report, report_out, report_sink)
             raise VerificationFailedError(
                 f"Verification failed for {verification_failures} record(s); replay skipped."
             )
@@ -177,9 +255,11 @@ def run_case_transfer(
                 db_findings_count=0,
                 db_findings_by_table={},
                 db_findings_by_column={},
+                ner_cache=ner_cache,
+                rule_hits=rule_hits,
+                pseudonym_vault=pseudonym_vault,
             )
-            if report_out:
-                _write_report(report, report_out)
+            _emit_report(report, report_out, report_sink)
             return report
 
         replay_case_slice(
@@ -190,7 +270,9 @@ def run_case_transfer(
             database_policy=getattr(pipeline.cfg, "database_policy", None),
             pseudonym_salt=pipeline.cfg.pseudonym_salt,
             placeholders=getattr(pipeline.cfg, "database_policy_placeholders", None),
+            vault=getattr(pipeline, "pseudonym_vault", None),
         )
+        pseudonym_vault = _vault_delta(vault_before, _vault_stats(pipeline))
 
         db_ok = True
         db_findings_count = 0
@@ -218,9 +300,11 @@ def run_case_transfer(
                     db_findings_count=db_findings_count,
                     db_findings_by_table=db_findings_by_table,
                     db_findings_by_column=db_findings_by_column,
+                    ner_cache=ner_cache,
+                    rule_hits=rule_hits,
+                    pseudonym_vault=pseudonym_vault,
                 )
-                if report_out:
-                    _write_report(report, report_out)
+                _emit_report(report, report_out, report_sink)
                 raise DBVerificationFailedError(
                     f"DB verification found {db_findings_count} finding(s) in dev DB; failing."
                 )
@@ -240,9 +324,11 @@ def run_case_transfer(
             db_findings_count=db_findings_count,
             db_findings_by_table=db_findings_by_table,
             db_findings_by_column=db_findings_by_column,
+            ner_cache=ner_cache,
+            rule_hits=rule_hits,
+            pseudonym_vault=pseudonym_vault,
         )
-        if report_out:
-            _write_report(report, report_out)
+        _emit_report(report, report_out, report_sink)
         return report
     finally:
         prod_client.close()
@@ -0,0 +1,84 @@
+"""
+Batch planning for HF inference.
+
+Pure Python (no transformers import) so it can be unit-tested and reused by any backend.
+"""
+from __future__ import annotations
+
+from typing import List, Optional, Sequence, Tuple
+
+
+def plan_token_budget_batches(
+    lengths: Sequence[int],
+    max_batch_tokens: int,
+    max_batch_size: Optional[int] = None,
+) -> List[List[int]]:
+    """
+    Group item indices into batches whose padded size stays under a token budget.
+
+    Items are sorted by token length so each batch holds similar-length texts and
+    short notes are not padded up to a long one. A batch's padded size is
+    len(batch) * longest item; a new batch starts when adding the next item would
+    exceed max_batch_tokens (or max_batch_size items, if given). An item longer
+    than the budget on its own gets a batch to itself.
+
+    Returns batches of original indices; callers scatter results back by index.
+    """
+    budget = max(1, max_batch_tokens)
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i])
+
+    batches: List[List[int]] = []
+    current: List[int] = []
+    longest = 0
+    for i in order:
+        n = max(1, int(lengths[i]))
+        grown = max(longest, n)
+        full = max_batch_size is not None and len(current) >= max_batch_size
+        if current and (full or (len(current) + 1) * grown > budget):
+            batches.append(current)
+            current = []
+            grown = n
+        current.append(i)
+        longest = grown
+    if current:
+        batches.append(current)
+    return batches
+
+
+def padded_token_count(lengths: Sequence[int], batches: Sequence[Sequence[int]]) -> int:
+    """Total tokens the model processes for these batches, padding included."""
+    return sum(len(b) * max(lengths[i] for i in b) for b in batches if b)
+
+
+def plan_token_windows(n_tokens: int, window: int, overlap: int) -> List[Tuple[int, int, int, int]]:
+    """
+    Split n_tokens into overlapping windows for long-text inference.
+
+    Returns (start, end, own_start, own_end) token ranges per window. Consecutive
+    windows share `overlap` tokens; the owned ranges split each overlap down the
+    middle and partition [0, n_tokens), so every entity can be attributed to exactly
+    one window (the one owning its first token) while still seeing context on both sides.
+    """
+    if window <= 0:
+        raise ValueError("window must be positive")
+    if not 0 <= overlap < window:
+        raise ValueError("overlap must be >= 0 and smaller than window")
+    if n_tokens <= window:
+        return [(0, n_tokens, 0, n_tokens)]
+
+    step = window - overlap
+    starts: List[int] = []
+    s = 0
+    while True:
+        starts.append(s)
+        if s + window >= n_tokens:
+            break
+        s += step
+
+    windows: List[Tuple[int, int, int, int]] = []
+    for k, start in enumerate(starts):
+        end = min(start + window, n_tokens)
+        own_start = 0 if k == 0 else start + overlap // 2
+        own_end = n_tokens if k == len(starts) - 1 else starts[k + 1] + overlap // 2
+        windows.append((start, end, own_start, own_end))
+    return windows
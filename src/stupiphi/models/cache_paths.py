@@ -0,0 +1,40 @@
+"""
+Shared helpers for StupiPHI's on-disk caches (exported ONNX graphs, NER results).
+
+Pure standard library so cache users do not import numpy/transformers just to find a path.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+from pathlib import Path
+from typing import Optional, Union
+
+CACHE_ENV = "STUPIPHI_CACHE_DIR"
+
+
+def default_cache_dir() -> Path:
+    """STUPIPHI_CACHE_DIR if set, else ~/.cache/stupiphi."""
+    env = os.getenv(CACHE_ENV)
+    return Path(env) if env else Path.home() / ".cache" / "stupiphi"
+
+
+def resolve_cache_dir(cache_dir: Optional[Union[str, Path]] = None) -> Path:
+    """The configured cache_dir, or the default."""
+    return Path(cache_dir) if cache_dir else default_cache_dir()
+
+
+def model_fingerprint(model_name: str) -> str:
+    """
+    Cache key for a model. For a local directory, include file sizes and mtimes so
+    re-saving weights in place invalidates anything cached for the old weights.
+    """
+    parts = [model_name]
+    path = Path(model_name)
+    if path.is_dir():
+        parts = [str(path.resolve())]
+        for f in sorted(path.iterdir()):
+            if f.is_file():
+                st = f.stat()
+                parts.append(f"{f.name}:{st.st_size}:{int(st.st_mtime)}")
+    return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()[:16]
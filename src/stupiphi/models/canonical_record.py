@@ -48,6 +48,18 @@ class CanonicalRecord:
         """
         return asdict(self)
 
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "CanonicalRecord":
+        """
+        Inverse of to_dict (e.g. records sent to `stupiphi serve` as JSON).
+        """
+        return cls(
+            record_id=str(data["record_id"]),
+            patient=PatientInfo(**data["patient"]),
+            encounter_notes=str(data.get("encounter_notes", "")),
+            metadata=Metadata(**data["metadata"]),
+        )
+
     def to_json(self) -> str:
         """
         Serialize to a JSON string.
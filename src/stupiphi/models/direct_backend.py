@@ -0,0 +1,50 @@
+"""
+Direct PyTorch backend for token classification.
+
+Skips transformers' pipeline machinery (per-item preprocess/postprocess, dataset iteration):
+tokenizes each batch once with the fast tokenizer, runs one forward pass on the padded
+tensors and decodes spans with the vectorized NumPy decoder. Output dicts match the
+pipeline's aggregation_strategy="simple" exactly.
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, Union
+
+from stupiphi.models.token_decoding import decode_batch, encode_for_decoding
+
+
+class DirectTokenClassificationPipeline:
+    """
+    Pipeline-compatible callable (pipe(text), pipe(texts, batch_size=n), pipe.tokenizer,
+    pipe.model) backed by a plain model forward pass.
+    """
+
+    def __init__(self, model_name: str, device: int = -1, model: Optional[Any] = None) -> None:
+        import torch
+        from transformers import AutoModelForTokenClassification, AutoTokenizer
+
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        if model is None:
+            model = AutoModelForTokenClassification.from_pretrained(model_name)
+        self.device = torch.device("cpu" if device < 0 else f"cuda:{device}")
+        self.model = model.to(self.device).eval()
+        self.id2label = {int(k): str(v) for k, v in self.model.config.id2label.items()}
+        self._torch = torch
+
+    def __call__(self, inputs: Union[str, List[str]], batch_size: int = 1) -> Any:
+        if isinstance(inputs, str):
+            return self._run_batch([inputs])[0]
+        results: List[List[Dict[str, Any]]] = []
+        step = max(1, batch_size)
+        for i in range(0, len(inputs), step):
+            results.extend(self._run_batch(inputs[i : i + step]))
+        return results
+
+    def _run_batch(self, texts: List[str]) -> List[List[Dict[str, Any]]]:
+        enc = encode_for_decoding(self.tokenizer, texts, return_tensors="pt")
+        offsets = enc.pop("offset_mapping").numpy()
+        special = enc.pop("special_tokens_mask").numpy()
+        feeds = {k: v.to(self.device) for k, v in enc.items()}
+        with self._torch.inference_mode():
+            logits = self.model(**feeds).logits.float().cpu().numpy()
+        return decode_batch(texts, logits, offsets, special, enc["attention_mask"].numpy(), self.id2label)
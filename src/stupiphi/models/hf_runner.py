@@ -1,9 +1,11 @@
 from __future__ import annotations
 
+import copy
+import threading
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Sequence
 
-from transformers import pipeline
+from stupiphi.models.batching import plan_token_budget_batches, plan_token_windows
 
 
 @dataclass(frozen=True)
@@ -18,6 +20,11 @@ class HFEntity:
     text: str
 
 
+# Inference backends: "torch" = transformers pipeline (PyTorch eager), "onnx" = ONNX Runtime on CPU,
+# "direct" = PyTorch forward pass with NumPy span decoding (no pipeline overhead; same output as "torch").
+BACKENDS = ("torch", "onnx", "direct")
+
+
 class HFTokenClassifier:
     """
     Small wrapper around Hugging Face token-classification pipeline.
@@ -28,14 +35,49 @@ class HFTokenClassifier:
         self,
         model_name: str = "dslim/bert-base-NER",
         device: int = -1,  # -1 CPU, 0+ GPU
+        max_batch_tokens: Optional[int] = None,  # None = fixed-size batches
+        chunk_tokens: Optional[int] = None,  # None = whole note per forward pass (truncated at model max)
+        chunk_overlap: int = 64,
+        backend: str = "torch",
+        cache_dir: Optional[str] = None,  # where exported ONNX graphs are cached
+        quantized: bool = False,  # dynamic int8 quantization of linear layers (CPU only)
+        pipe: Any = None,  # preloaded backend (e.g. from the model registry); skips loading
     ) -> None:
+        if chunk_tokens is not None and not 0 <= chunk_overlap < chunk_tokens:
+            raise ValueError("chunk_overlap must be >= 0 and smaller than chunk_tokens")
         self.model_name = model_name
-        self._pipe = pipeline(
-            "token-classification",
-            model=model_name,
-            aggregation_strategy="simple",
-            device=device,
+        self.backend = backend
+        self.quantized = quantized
+        self.max_batch_tokens = max_batch_tokens
+        self.chunk_tokens = chunk_tokens
+        self.chunk_overlap = chunk_overlap
+        self.device = device
+        self._pipe = pipe if pipe is not None else _load_backend(
+            model_name, device=device, backend=backend, cache_dir=cache_dir, quantized=quantized
         )
+        _check_window_fits(self._pipe, chunk_tokens)
+        # Serializes inference: pipelines and fast tokenizers are not safe to call concurrently.
+        self._lock = threading.RLock()
+
+    def with_options(
+        self,
+        max_batch_tokens: Optional[int] = None,
+        chunk_tokens: Optional[int] = None,
+        chunk_overlap: int = 64,
+    ) -> "HFTokenClassifier":
+        """Return a classifier sharing this one's loaded model and lock, with different batching options."""
+        if chunk_tokens is not None and not 0 <= chunk_overlap < chunk_tokens:
+            raise ValueError("chunk_overlap must be >= 0 and smaller than chunk_tokens")
+        _check_window_fits(self._pipe, chunk_tokens)
+        clone = copy.copy(self)
+        clone.max_batch_tokens = max_batch_tokens
+        clone.chunk_tokens = chunk_tokens
+        clone.chunk_overlap = chunk_overlap
+        return clone
+
+    def memory_bytes(self) -> int:
+        """Approximate resident size of the loaded model weights."""
+        return _memory_bytes(self._pipe)
 
     def predict(self, text: str) -> List[HFEntity]:
         """
@@ -43,25 +85,246 @@ class HFTokenClassifier:
         """
         if not text.strip():
             return []
+        if self.chunk_tokens is not None:
+            return self.predict_batch([text])[0]
+
+        with self._lock:
+            raw: List[Dict[str, Any]] = self._pipe(text)  # type: ignore[assignment]
+        return _to_entities(text, raw)
+
+    def predict_batch(self, texts: Sequence[str], batch_size: int = 8) -> List[List[HFEntity]]:
+        """
+        Batched variant of predict: one entity list per input text, in input order.
+
+        Non-blank texts go through the pipeline together so the model runs padded
+        batches of up to batch_size notes instead of one forward pass per note.
+        When max_batch_tokens is set, batch_size is ignored: texts are sorted by
+        token length and grouped under that padded-token budget instead, so short
+        notes are not padded up to long ones.
+
+        When chunk_tokens is set, notes longer than chunk_tokens are split into
+        overlapping token windows that run in the same batches as everything else;
+        entity offsets are mapped back to the note and de-duplicated across overlaps.
+        """
+        results: List[List[HFEntity]] = [[] for _ in texts]
+        with self._lock:
+            segments = self._segments(texts)
+            if not segments:
+                return results
+            seg_raw = self._run([seg.text for seg in segments], batch_size)
 
-        raw: List[Dict[str, Any]] = self._pipe(text)  # type: ignore[assignment]
-        entities: List[HFEntity] = []
-
-        for r in raw:
-            start = int(r.get("start", 0))
-            end = int(r.get("end", 0))
-            label = str(r.get("entity_group") or r.get("entity") or "UNKNOWN")
-            score = float(r.get("score", 0.0))
-            span_text = text[start:end] if 0 <= start <= end <= len(text) else str(r.get("word", ""))
-
-            entities.append(
-                HFEntity(
-                    label=label,
-                    start=start,
-                    end=end,
-                    score=score,
-                    text=span_text,
+        raw_by_text: Dict[int, List[Dict[str, Any]]] = {}
+        windowed: set[int] = set()
+        for seg, raw in zip(segments, seg_raw):
+            if seg.windowed:
+                windowed.add(seg.index)
+            collected = raw_by_text.setdefault(seg.index, [])
+            for r in raw:
+                start = int(r.get("start", 0)) + seg.offset
+                if seg.windowed and not seg.own_start <= start < seg.own_end:
+                    continue
+                collected.append({**r, "start": start, "end": int(r.get("end", 0)) + seg.offset})
+
+        for i, raw in raw_by_text.items():
+            if i in windowed:
+                raw = _merge_overlapping(raw)
+            results[i] = _to_entities(texts[i], raw)
+        return results
+
+    def _run(self, texts: List[str], batch_size: int) -> List[List[Dict[str, Any]]]:
+        """Run texts through the pipeline in fixed-size or token-budget batches; results in input order."""
+        if self.max_batch_tokens:
+            batches = plan_token_budget_batches(self._token_lengths(texts), self.max_batch_tokens)
+        else:
+            batches = [list(range(len(texts)))]
+
+        out: List[List[Dict[str, Any]]] = [[] for _ in texts]
+        for batch in batches:
+            raw_lists: List[List[Dict[str, Any]]] = self._pipe(  # type: ignore[assignment]
+                [texts[i] for i in batch],
+                batch_size=len(batch) if self.max_batch_tokens else max(1, batch_size),
+            )
+            for i, raw in zip(batch, raw_lists):
+                out[i] = raw
+        return out
+
+    def _segments(self, texts: Sequence[str]) -> List["_Segment"]:
+        """One segment per non-blank text, or overlapping windows for texts over chunk_tokens."""
+        pending = [i for i, t in enumerate(texts) if t.strip()]
+        if self.chunk_tokens is None:
+            return [_Segment(index=i, text=texts[i]) for i in pending]
+
+        encoded = self._pipe.tokenizer(
+            [texts[i] for i in pending],
+            add_special_tokens=False,
+            return_offsets_mapping=True,
+        )
+        segments: List[_Segment] = []
+        for i, offsets in zip(pending, encoded["offset_mapping"]):
+            text = texts[i]
+            if len(offsets) <= self.chunk_tokens:
+                segments.append(_Segment(index=i, text=text))
+                continue
+            for start, end, own_start, own_end in plan_token_windows(
+                len(offsets), self.chunk_tokens, self.chunk_overlap
+            ):
+                char_start = offsets[start][0]
+                char_end = offsets[end - 1][1]
+                segments.append(
+                    _Segment(
+                        index=i,
+                        text=text[char_start:char_end],
+                        offset=char_start,
+                        windowed=True,
+                        own_start=offsets[own_start][0] if own_start > 0 else 0,
+                        own_end=offsets[own_end][0] if own_end < len(offsets) else len(text),
+                    )
                 )
+        return segments
+
+    def _token_lengths(self, texts: List[str]) -> List[int]:
+        """Token count per text as the pipeline will see it (special tokens, truncation)."""
+        encoded = self._pipe.tokenizer(texts, truncation=True)
+        return [len(ids) for ids in encoded["input_ids"]]
+
+
+def _check_window_fits(pipe: Any, chunk_tokens: Optional[int]) -> None:
+    """A window plus the special tokens the model adds must fit its context, or its tail is truncated unseen."""
+    tokenizer = getattr(pipe, "tokenizer", None)
+    if chunk_tokens is None or tokenizer is None:
+        return
+    limit = tokenizer.model_max_length
+    special = tokenizer.num_special_tokens_to_add()
+    if chunk_tokens + special > limit:
+        raise ValueError(
+            f"chunk_tokens={chunk_tokens} plus {special} special tokens exceeds the model's "
+            f"{limit}-token context; use chunk_tokens <= {limit - special}"
+        )
+
+
+def _load_backend(
+    model_name: str,
+    device: int,
+    backend: str,
+    cache_dir: Optional[str],
+    quantized: bool = False,
+) -> Any:
+    """Build a pipeline-like callable for the requested backend."""
+    # Imported here so importing stupiphi (e.g. rule-only runs, CLI --help) does not load torch.
+    from transformers import pipeline
+
+    if quantized and device != -1:
+        raise ValueError("Quantized models run on CPU only; use device=-1")
+    if backend == "torch":
+        if quantized:
+            return pipeline(
+                "token-classification",
+                model=_load_quantized_torch_model(model_name),
+                tokenizer=model_name,
+                aggregation_strategy="simple",
+                device=device,
             )
+        return pipeline(
+            "token-classification",
+            model=model_name,
+            aggregation_strategy="simple",
+            device=device,
+        )
+    if backend == "direct":
+        from stupiphi.models.direct_backend import DirectTokenClassificationPipeline
+
+        model = _load_quantized_torch_model(model_name) if quantized else None
+        return DirectTokenClassificationPipeline(model_name, device=device, model=model)
+    if backend == "onnx":
+        if device != -1:
+            raise ValueError("The onnx backend runs on CPU only; use device=-1")
+        from stupiphi.models.onnx_backend import OnnxTokenClassificationPipeline
+
+        return OnnxTokenClassificationPipeline(model_name, cache_dir=cache_dir, quantized=quantized)
+    raise ValueError(f"Unknown HF backend {backend!r}; expected one of: {', '.join(BACKENDS)}")
+
+
+def _memory_bytes(pipe: Any) -> int:
+    """Bytes held by model tensors (torch), or the graph file size (onnx)."""
+    model_path = getattr(pipe, "model_path", None)
+    if model_path is not None:
+        return int(model_path.stat().st_size)
+    model = getattr(pipe, "model", None)
+    if model is None or not hasattr(model, "state_dict"):
+        return 0
+
+    def _size(value: Any) -> int:
+        if isinstance(value, (tuple, list)):
+            return sum(_size(v) for v in value)
+        if hasattr(value, "element_size") and hasattr(value, "numel"):
+            return int(value.numel() * value.element_size())
+        return 0
+
+    return sum(_size(v) for v in model.state_dict().values())
+
+
+def _load_quantized_torch_model(model_name: str) -> Any:
+    """Load the checkpoint and dynamically quantize its nn.Linear layers to int8."""
+    import torch
+    from transformers import AutoModelForTokenClassification
+
+    model = AutoModelForTokenClassification.from_pretrained(model_name).eval()
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+@dataclass(frozen=True)
+class _Segment:
+    """A text (or window of one) sent to the model; offset maps window chars back to the note."""
+    index: int
+    text: str
+    offset: int = 0
+    windowed: bool = False
+    own_start: int = 0
+    own_end: int = 0
+
+
+def _merge_overlapping(raw: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    De-duplicate entities from adjacent windows that still overlap after ownership filtering.
+    Same rule as transformers' stride mode: keep the longer span, then the higher score.
+    """
+    if not raw:
+        return raw
+    ordered = sorted(raw, key=lambda r: r["start"])
+    merged: List[Dict[str, Any]] = []
+    previous = ordered[0]
+    for r in ordered[1:]:
+        if previous["start"] <= r["start"] < previous["end"]:
+            r_len = r["end"] - r["start"]
+            p_len = previous["end"] - previous["start"]
+            if r_len > p_len or (r_len == p_len and r.get("score", 0.0) > previous.get("score", 0.0)):
+                previous = r
+        else:
+            merged.append(previous)
+            previous = r
+    merged.append(previous)
+    return merged
+
+
+def _to_entities(text: str, raw: List[Dict[str, Any]]) -> List[HFEntity]:
+    """Normalize raw pipeline dicts for one text into HFEntity objects."""
+    entities: List[HFEntity] = []
+
+    for r in raw:
+        start = int(r.get("start", 0))
+        end = int(r.get("end", 0))
+        label = str(r.get("entity_group") or r.get("entity") or "UNKNOWN")
+        score = float(r.get("score", 0.0))
+        span_text = text[start:end] if 0 <= start <= end <= len(text) else str(r.get("word", ""))
+
+        entities.append(
+            HFEntity(
+                label=label,
+                start=start,
+                end=end,
+                score=score,
+                text=span_text,
+            )
+        )
 
-        return entities
+    return entities
@@ -0,0 +1,157 @@
+"""
+Micro-batching for concurrent single-note callers.
+
+A service that calls sanitize_record from many request threads would otherwise run the model
+at batch size 1 under load. MicroBatchingClassifier queues texts from all threads and a
+background thread sends them to the wrapped classifier's predict_batch together, flushing when
+max_batch_size texts are waiting or the oldest has waited max_wait_ms. Each caller blocks until
+its own result is back, so the interface is the same as HFTokenClassifier.predict.
+
+Tuning: max_wait_ms is the latency added to a lone request; max_batch_size bounds the forward
+pass. Start with a wait well under the latency SLO and raise the batch size while p99 holds;
+stats() reports the observed batch sizes and queue waits.
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Any, List, Optional, Sequence
+
+from stupiphi.models.hf_runner import HFEntity, HFTokenClassifier
+
+
+@dataclass(frozen=True)
+class MicroBatchStats:
+    """Counters for tuning batch size and wait window (no PHI)."""
+    requests: int
+    batches: int
+    mean_batch_size: float
+    max_batch_size: int
+    mean_wait_ms: float
+
+
+@dataclass
+class _Pending:
+    text: str
+    enqueued_at: float
+    future: "Future[List[HFEntity]]"
+
+
+class MicroBatchingClassifier:
+    """
+    Coalesce concurrent predict() calls into batched predict_batch() calls.
+
+    predict_batch() with more than one text goes straight to the wrapped classifier: callers
+    that already have a batch gain nothing from waiting. Other attributes (model_name,
+    backend, chunk_tokens, ...) are read from the wrapped classifier, so NER cache keys are
+    unchanged.
+    """
+
+    def __init__(
+        self,
+        classifier: HFTokenClassifier,
+        max_batch_size: int = 16,
+        max_wait_ms: float = 5.0,
+    ) -> None:
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be >= 1")
+        if max_wait_ms < 0:
+            raise ValueError("max_wait_ms must be >= 0")
+        self.classifier = classifier
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self._cond = threading.Condition()
+        self._queue: List[_Pending] = []
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._closed = False
+        self._requests = 0
+        self._batches = 0
+        self._largest = 0
+        self._wait_total = 0.0
+
+    def __getattr__(self, name: str) -> Any:
+        # Only called for attributes not set on the batcher itself.
+        if name == "classifier":
+            raise AttributeError(name)
+        return getattr(self.classifier, name)
+
+    def predict(self, text: str) -> List[HFEntity]:
+        """Queue text with other callers' texts and block until its entities are ready."""
+        if not text.strip():
+            return []
+        pending = _Pending(text=text, enqueued_at=time.monotonic(), future=Future())
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("MicroBatchingClassifier is closed")
+            self._ensure_worker()
+            self._queue.append(pending)
+            self._cond.notify()
+        return pending.future.result()
+
+    def predict_batch(self, texts: Sequence[str], batch_size: int = 8) -> List[List[HFEntity]]:
+        if len(texts) == 1:  # e.g. HFDetector.detect with a cache: still worth coalescing
+            return [self.predict(texts[0])]
+        return self.classifier.predict_batch(texts, batch_size=batch_size)
+
+    def close(self) -> None:
+        """Flush queued texts and stop the background thread."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+
+    def stats(self) -> MicroBatchStats:
+        with self._cond:
+            return MicroBatchStats(
+                requests=self._requests,
+                batches=self._batches,
+                mean_batch_size=round(self._requests / self._batches, 2) if self._batches else 0.0,
+                max_batch_size=self._largest,
+                mean_wait_ms=round(1000 * self._wait_total / self._requests, 3) if self._requests else 0.0,
+            )
+
+    def _ensure_worker(self) -> None:
+        # Threads do not survive fork (e.g. ParallelSanitizer workers): start one per process.
+        if self._thread is None or self._pid != os.getpid():
+            self._queue = []  # anything inherited belongs to the parent's callers
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="stupiphi-micro-batcher", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._queue and not self._closed:
+                    self._cond.wait()
+                if not self._queue:
+                    return
+                deadline = self._queue[0].enqueued_at + self.max_wait_ms / 1000
+                while len(self._queue) < self.max_batch_size and not self._closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = self._queue[: self.max_batch_size]
+                del self._queue[: self.max_batch_size]
+                flushed_at = time.monotonic()
+                self._requests += len(batch)
+                self._batches += 1
+                self._largest = max(self._largest, len(batch))
+                self._wait_total += sum(flushed_at - p.enqueued_at for p in batch)
+            self._flush(batch)
+
+    def _flush(self, batch: List[_Pending]) -> None:
+        try:
+            results = self.classifier.predict_batch([p.text for p in batch], batch_size=len(batch))
+        except BaseException as exc:  # the callers are waiting on these futures; hand them the error
+            for p in batch:
+                p.future.set_exception(exc)
+            return
+        for p, entities in zip(batch, results):
+            p.future.set_result(entities)
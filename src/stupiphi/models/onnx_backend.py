@@ -0,0 +1,145 @@
+"""
+ONNX Runtime backend for token classification (CPU).
+
+The model is exported from its transformers checkpoint (hub id or local directory) once and
+the graph is cached on disk; later loads only read the cached .onnx file plus the tokenizer.
+The backend is called like a transformers pipeline so HFTokenClassifier can use either.
+"""
+from __future__ import annotations
+
+import inspect
+import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+from stupiphi.models.cache_paths import model_fingerprint, resolve_cache_dir
+from stupiphi.models.token_decoding import decode_batch, encode_for_decoding
+
+_ONNX_INPUT_NAMES = ("input_ids", "attention_mask", "token_type_ids")
+
+
+def export_onnx_model(model_name: str, cache_dir: Optional[Union[str, Path]] = None) -> Path:
+    """
+    Export a token-classification checkpoint to ONNX and return the cached graph path.
+    Reuses the cached file when it already exists.
+    """
+    target = resolve_cache_dir(cache_dir) / "onnx" / model_fingerprint(model_name) / "model.onnx"
+    if target.is_file():
+        return target
+
+    import torch
+    from transformers import AutoModelForTokenClassification, AutoTokenizer
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModelForTokenClassification.from_pretrained(model_name).eval()
+    dummy = tokenizer(["StupiPHI export"], return_tensors="pt")
+    input_names = [n for n in _ONNX_INPUT_NAMES if n in dummy]
+
+    target.parent.mkdir(parents=True, exist_ok=True)
+    export_kwargs: Dict[str, Any] = {}
+    if "dynamo" in inspect.signature(torch.onnx.export).parameters:
+        export_kwargs["dynamo"] = False  # TorchScript exporter: no onnxscript dependency
+    with _atomic_write(target) as tmp, torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(dummy[n] for n in input_names),
+            str(tmp),
+            input_names=input_names,
+            output_names=["logits"],
+            dynamic_axes={n: {0: "batch", 1: "sequence"} for n in [*input_names, "logits"]},
+            opset_version=14,
+            **export_kwargs,
+        )
+    return target
+
+
+def quantize_onnx_model(model_path: Union[str, Path]) -> Path:
+    """
+    Dynamically quantize an exported graph's weights to int8 (cached next to the fp32 graph).
+    """
+    source = Path(model_path)
+    target = source.with_name(source.stem + ".int8.onnx")
+    if target.is_file():
+        return target
+
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    with _atomic_write(target) as tmp:
+        quantize_dynamic(str(source), str(tmp), weight_type=QuantType.QInt8)
+    return target
+
+
+@contextmanager
+def _atomic_write(target: Path) -> Iterator[Path]:
+    """
+    Yield a temporary path next to target, then move it into place. The name is unique per
+    writer, so processes exporting the same model at once (spawned workers, the server and a
+    CLI run) never write into each other's file; the last rename wins with a complete graph
+    and readers never see a partial one.
+    """
+    fd, name = tempfile.mkstemp(dir=target.parent, prefix=target.name + ".", suffix=".tmp")
+    os.close(fd)
+    tmp = Path(name)
+    try:
+        yield tmp
+        os.replace(tmp, target)
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
+class OnnxTokenClassificationPipeline:
+    """
+    Minimal stand-in for transformers' token-classification pipeline backed by ONNX Runtime.
+
+    Supports the calls HFTokenClassifier makes: pipe(text), pipe(texts, batch_size=n) and
+    pipe.tokenizer. Output dicts match aggregation_strategy="simple".
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        cache_dir: Optional[Union[str, Path]] = None,
+        intra_op_threads: Optional[int] = None,
+        quantized: bool = False,
+    ) -> None:
+        import onnxruntime as ort
+        from transformers import AutoConfig, AutoTokenizer
+
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        config = AutoConfig.from_pretrained(model_name)
+        self.id2label = {int(k): str(v) for k, v in config.id2label.items()}
+        self.model_path = export_onnx_model(model_name, cache_dir=cache_dir)
+        if quantized:
+            self.model_path = quantize_onnx_model(self.model_path)
+
+        options = ort.SessionOptions()
+        if intra_op_threads:
+            options.intra_op_num_threads = intra_op_threads
+        self.session = ort.InferenceSession(
+            str(self.model_path), sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        self._input_names = [i.name for i in self.session.get_inputs()]
+
+    def __call__(self, inputs: Union[str, List[str]], batch_size: int = 1) -> Any:
+        if isinstance(inputs, str):
+            return self._run_batch([inputs])[0]
+        results: List[List[Dict[str, Any]]] = []
+        step = max(1, batch_size)
+        for i in range(0, len(inputs), step):
+            results.extend(self._run_batch(inputs[i : i + step]))
+        return results
+
+    def _run_batch(self, texts: List[str]) -> List[List[Dict[str, Any]]]:
+        enc = encode_for_decoding(self.tokenizer, texts, return_tensors="np")
+        feeds = {n: enc[n].astype("int64") for n in self._input_names}
+        logits = self.session.run(["logits"], feeds)[0]
+        return decode_batch(
+            texts,
+            logits,
+            enc["offset_mapping"],
+            enc["special_tokens_mask"],
+            enc["attention_mask"],
+            self.id2label,
+        )
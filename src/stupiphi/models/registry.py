@@ -0,0 +1,218 @@
+"""
+Process-wide registry of loaded HF token-classification models.
+
+Pipelines get their classifier from here instead of loading weights themselves, so every
+SanitizationPipeline in a process (e.g. one per run_case_transfer call) shares one loaded
+model per (model_name, device, backend, quantized). Classifiers with different batching or
+chunking options share the same weights and inference lock; with micro_batch_size set, the
+returned classifier also coalesces concurrent predict() calls (see micro_batcher).
+"""
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from stupiphi.models.hf_runner import HFTokenClassifier
+from stupiphi.models.micro_batcher import MicroBatchingClassifier
+
+ModelKey = Tuple[str, int, str, bool]  # (model_name, device, backend, quantized)
+# (max_batch_tokens, chunk_tokens, chunk_overlap, micro_batch_size, micro_batch_wait_ms)
+VariantKey = Tuple[Optional[int], Optional[int], int, int, float]
+
+_WARM_UP_TEXTS = ("Patient John Smith reports headache. Call 555-123-4567.",)
+
+
+@dataclass
+class _Entry:
+    base: HFTokenClassifier
+    loaded_at: float
+    load_seconds: float
+    memory_bytes: int
+    variants: Dict[VariantKey, HFTokenClassifier] = field(default_factory=dict)
+    hits: int = 0
+
+
+@dataclass(frozen=True)
+class RegistryStats:
+    """Snapshot of registry state (no PHI): resident models, their memory and cache counters."""
+    resident_models: int
+    memory_bytes: int
+    loads: int
+    hits: int
+    evictions: int
+    models: List[Dict[str, Any]]
+
+
+class ModelRegistry:
+    """
+    Thread-safe cache of loaded classifiers.
+
+    Loading is done at most once per key even under concurrent get() calls; a per-key lock
+    keeps other models available while one is loading.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._key_locks: Dict[ModelKey, threading.Lock] = {}
+        self._entries: Dict[ModelKey, _Entry] = {}
+        self._loads = 0
+        self._evictions = 0
+
+    def get(
+        self,
+        model_name: str = "dslim/bert-base-NER",
+        device: int = -1,
+        backend: str = "torch",
+        quantized: bool = False,
+        cache_dir: Optional[str] = None,
+        max_batch_tokens: Optional[int] = None,
+        chunk_tokens: Optional[int] = None,
+        chunk_overlap: int = 64,
+        micro_batch_size: int = 0,
+        micro_batch_wait_ms: float = 5.0,
+    ) -> HFTokenClassifier:
+        """
+        Return the shared classifier for this model, loading it on first use.
+        micro_batch_size > 0 returns a shared MicroBatchingClassifier, so concurrent callers
+        with the same options are coalesced into one queue.
+        """
+        key: ModelKey = (model_name, device, backend, quantized)
+        entry = self._entry(key, cache_dir)
+        options: VariantKey = (
+            max_batch_tokens,
+            chunk_tokens,
+            chunk_overlap,
+            micro_batch_size,
+            micro_batch_wait_ms if micro_batch_size > 0 else 0.0,
+        )
+        with self._lock:
+            entry.hits += 1
+            classifier = entry.variants.get(options)
+            if classifier is None:
+                classifier = entry.base.with_options(
+                    max_batch_tokens=max_batch_tokens,
+                    chunk_tokens=chunk_tokens,
+                    chunk_overlap=chunk_overlap,
+                )
+                if micro_batch_size > 0:
+                    classifier = MicroBatchingClassifier(  # type: ignore[assignment]
+                        classifier, max_batch_size=micro_batch_size, max_wait_ms=micro_batch_wait_ms
+                    )
+                entry.variants[options] = classifier
+            return classifier
+
+    def load(
+        self,
+        model_name: str = "dslim/bert-base-NER",
+        device: int = -1,
+        backend: str = "torch",
+        quantized: bool = False,
+        cache_dir: Optional[str] = None,
+    ) -> HFTokenClassifier:
+        """Load a model ahead of time (e.g. at service start). Returns the base classifier."""
+        return self._entry((model_name, device, backend, quantized), cache_dir).base
+
+    def warm_up(
+        self,
+        model_name: str = "dslim/bert-base-NER",
+        device: int = -1,
+        backend: str = "torch",
+        quantized: bool = False,
+        cache_dir: Optional[str] = None,
+        texts: Sequence[str] = _WARM_UP_TEXTS,
+    ) -> None:
+        """Load the model and run a throwaway inference so the first real request is not slow."""
+        self.load(model_name, device, backend, quantized, cache_dir).predict_batch(list(texts))
+
+    def evict(
+        self,
+        model_name: Optional[str] = None,
+        device: Optional[int] = None,
+        backend: Optional[str] = None,
+        quantized: Optional[bool] = None,
+    ) -> int:
+        """
+        Drop matching models (all when no filter is given) and return how many were evicted.
+        Classifiers already handed out keep working; memory is freed once they are released.
+        """
+        with self._lock:
+            doomed = [
+                key
+                for key in self._entries
+                if (model_name is None or key[0] == model_name)
+                and (device is None or key[1] == device)
+                and (backend is None or key[2] == backend)
+                and (quantized is None or key[3] == quantized)
+            ]
+            for key in doomed:
+                del self._entries[key]
+                self._key_locks.pop(key, None)
+            self._evictions += len(doomed)
+            return len(doomed)
+
+    def stats(self) -> RegistryStats:
+        with self._lock:
+            models = [
+                {
+                    "model_name": key[0],
+                    "device": key[1],
+                    "backend": key[2],
+                    "quantized": key[3],
+                    "memory_bytes": entry.memory_bytes,
+                    "load_seconds": round(entry.load_seconds, 3),
+                    "variants": len(entry.variants),
+                    "hits": entry.hits,
+                }
+                for key, entry in self._entries.items()
+            ]
+            return RegistryStats(
+                resident_models=len(self._entries),
+                memory_bytes=sum(m["memory_bytes"] for m in models),
+                loads=self._loads,
+                hits=sum(m["hits"] for m in models),
+                evictions=self._evictions,
+                models=models,
+            )
+
+    def _entry(self, key: ModelKey, cache_dir: Optional[str]) -> _Entry:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                return entry
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            with self._lock:
+                entry = self._entries.get(key)
+            if entry is not None:
+                return entry
+
+            model_name, device, backend, quantized = key
+            started = time.perf_counter()
+            base = HFTokenClassifier(
+                model_name=model_name,
+                device=device,
+                backend=backend,
+                cache_dir=cache_dir,
+                quantized=quantized,
+            )
+            entry = _Entry(
+                base=base,
+                loaded_at=time.time(),
+                load_seconds=time.perf_counter() - started,
+                memory_bytes=base.memory_bytes(),
+            )
+            with self._lock:
+                self._entries[key] = entry
+                self._loads += 1
+            return entry
+
+
+_DEFAULT_REGISTRY = ModelRegistry()
+
+
+def default_registry() -> ModelRegistry:
+    """The process-wide registry used by SanitizationPipeline."""
+    return _DEFAULT_REGISTRY
@@ -0,0 +1,120 @@
+"""
+Decode token-classification logits into entity spans.
+
+Mirrors transformers' TokenClassificationPipeline with aggregation_strategy="simple" so
+backends that bypass the pipeline (e.g. ONNX Runtime) return the same raw entity dicts:
+{"entity_group", "score", "word", "start", "end"}.
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, List, Mapping, Sequence, Tuple
+
+import numpy as np
+
+
+def _get_tag(label: str) -> Tuple[str, str]:
+    """Split a BIO label into (B|I, tag). Labels without a prefix count as continuations."""
+    if label.startswith("B-"):
+        return "B", label[2:]
+    if label.startswith("I-"):
+        return "I", label[2:]
+    return "I", label
+
+
+def softmax(logits: np.ndarray) -> np.ndarray:
+    """Row-wise softmax over the label axis, computed the way the pipeline does."""
+    maxes = np.max(logits, axis=-1, keepdims=True)
+    shifted_exp = np.exp(logits - maxes)
+    return shifted_exp / shifted_exp.sum(axis=-1, keepdims=True)
+
+
+def decode_simple_entities(
+    text: str,
+    logits: np.ndarray,
+    offsets: Sequence[Tuple[int, int]],
+    skip_mask: Sequence[int],
+    id2label: Mapping[int, str],
+    ignore_labels: Sequence[str] = ("O",),
+) -> List[Dict[str, Any]]:
+    """
+    Group per-token predictions for one sequence into entity dicts.
+
+    logits: (seq_len, num_labels) for one sequence.
+    offsets: character (start, end) per token.
+    skip_mask: truthy for special and padding tokens, which are ignored.
+    """
+    scores = softmax(logits.astype(np.float32, copy=False))
+    label_ids = scores.argmax(axis=-1)
+
+    kept = np.flatnonzero(~np.asarray(skip_mask, dtype=bool))
+    if kept.size == 0:
+        return []
+    kept_labels = label_ids[kept]
+    kept_scores = scores[kept, kept_labels]
+
+    # Per-label lookup tables so grouping is array ops over tokens.
+    num_labels = scores.shape[-1]
+    tag_names = [_get_tag(id2label[i]) for i in range(num_labels)]
+    tag_index = {tag: i for i, tag in enumerate(dict.fromkeys(tag for _, tag in tag_names))}
+    label_tag = np.array([tag_index[tag] for _, tag in tag_names])
+    label_is_b = np.array([bi == "B" for bi, _ in tag_names])
+
+    # Run-length grouping: a token starts a new entity unless it continues the previous
+    # token's tag with an I- (or unprefixed) label.
+    tags = label_tag[kept_labels]
+    starts = np.ones(kept.size, dtype=bool)
+    starts[1:] = (tags[1:] != tags[:-1]) | label_is_b[kept_labels[1:]]
+    group_starts = np.flatnonzero(starts)
+    group_ends = np.append(group_starts[1:], kept.size)
+
+    offsets_arr = np.asarray(offsets, dtype=np.int64).reshape(-1, 2)
+    entities: List[Dict[str, Any]] = []
+    for g_start, g_end in zip(group_starts.tolist(), group_ends.tolist()):
+        entity_group = id2label[int(kept_labels[g_start])].split("-", 1)[-1]
+        if entity_group in ignore_labels:
+            continue
+        start = int(offsets_arr[kept[g_start], 0])
+        end = int(offsets_arr[kept[g_end - 1], 1])
+        entities.append(
+            {
+                "entity_group": entity_group,
+                # Same reduction as the pipeline (nanmean over float32 token scores).
+                "score": np.mean(np.nanmean(kept_scores[g_start:g_end])),
+                "word": text[start:end],
+                "start": start,
+                "end": end,
+            }
+        )
+    return entities
+
+
+def encode_for_decoding(tokenizer: Any, texts: List[str], return_tensors: str) -> Any:
+    """
+    Tokenize a batch the way the pipeline does (padding, truncation at model_max_length),
+    keeping the offsets and special-token mask decode_batch needs.
+    """
+    max_length = tokenizer.model_max_length
+    return tokenizer(
+        texts,
+        padding=True,
+        truncation=bool(max_length and max_length > 0),
+        return_special_tokens_mask=True,
+        return_offsets_mapping=True,
+        return_tensors=return_tensors,
+    )
+
+
+def decode_batch(
+    texts: List[str],
+    logits: np.ndarray,
+    offset_mapping: np.ndarray,
+    special_tokens_mask: np.ndarray,
+    attention_mask: np.ndarray,
+    id2label: Mapping[int, str],
+) -> List[List[Dict[str, Any]]]:
+    """decode_simple_entities for each sequence of a padded batch (padding tokens skipped)."""
+    skip = (np.asarray(special_tokens_mask) != 0) | (np.asarray(attention_mask) == 0)
+    return [
+        decode_simple_entities(text, logits[i], offset_mapping[i], skip[i], id2label)
+        for i, text in enumerate(texts)
+    ]
@@ -1,8 +1,9 @@
 """End-to-end sanitization pipeline."""
 from stupiphi.sanitizer.pipeline import (
+    PatientMemo,
     PipelineConfig,
     SanitizationPipeline,
     SanitizeResult,
 )
 
-__all__ = ["PipelineConfig", "SanitizationPipeline", "SanitizeResult"]
+__all__ = ["PatientMemo", "PipelineConfig", "SanitizationPipeline", "SanitizeResult"]
@@ -0,0 +1,275 @@
+"""
+Multi-process bulk sanitization.
+
+ParallelSanitizer builds one SanitizationPipeline (loading the HF model) in the parent and
+then forks its workers, so every worker shares the parent's model weights copy-on-write
+instead of loading its own copy. Records go to workers in chunks; each chunk is sanitized
+with sanitize_batch, so results are the same as a single-process run (faker_seed and
+pseudonym_salt are applied per record, independent of which worker handles it).
+
+Fork only copies the calling thread: a lock held by another thread at that moment (the
+micro-batcher's queue, a thread pool, logging) stays locked forever in the children, and
+native thread pools (OpenMP, onnxruntime) come up empty. Workers are therefore forked only
+while the parent runs no other Python thread and, unless torch_threads == 1 keeps the workers'
+inference single-threaded, no native threads either. Otherwise they start from a forkserver
+(or spawn) and each builds its own pipeline from cfg.
+
+Audit payloads are collected in the workers and sent to audit_sink from the parent, in
+the order results are yielded, so sinks do not need to be process-safe.
+"""
+from __future__ import annotations
+
+import multiprocessing
+import os
+import sys
+import threading
+import warnings
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from stupiphi.models.canonical_record import CanonicalRecord
+from stupiphi.sanitizer.pipeline import PipelineConfig, SanitizationPipeline, SanitizeResult
+
+# This worker process's pipeline, set by _init_worker (each worker belongs to one pool).
+_WORKER_PIPELINE: Optional[SanitizationPipeline] = None
+
+_ChunkResult = Tuple[List[SanitizeResult], List[Dict[str, Any]]]
+
+
+def _init_worker(
+    cfg: PipelineConfig, torch_threads: Optional[int], pipeline: Optional[SanitizationPipeline]
+) -> None:
+    """
+    pipeline is the parent's, passed unpickled when the worker is forked; forkserver/spawn
+    workers get None and build their own. Threads are set after that, once the pipeline has
+    imported torch (if it uses it).
+    """
+    global _WORKER_PIPELINE
+    _WORKER_PIPELINE = pipeline if pipeline is not None else SanitizationPipeline(cfg)
+    if torch_threads is not None and "torch" in sys.modules:
+        import torch
+
+        torch.set_num_threads(torch_threads)
+
+
+def _sanitize_chunk(records: List[CanonicalRecord]) -> _ChunkResult:
+    if _WORKER_PIPELINE is None:
+        raise RuntimeError("worker pipeline not initialized")
+    payloads: List[Dict[str, Any]] = []
+    results = _WORKER_PIPELINE.sanitize_batch(records, batch_size=len(records), audit_sink=payloads.append)
+    return results, payloads
+
+
+class ParallelSanitizer:
+    """
+    Fan records out across worker processes.
+
+    workers: number of processes (default: CPU count).
+    torch_threads: intra-op threads per worker; keep workers * torch_threads <= cores.
+    chunk_size: records per task (also the HF batch size inside a worker).
+    max_restarts: how many times a crashed pool is rebuilt before giving up; chunks that
+      had not finished are resubmitted, finished ones are not redone.
+    pipeline: optional prebuilt pipeline to share with workers (defaults to one built from cfg);
+      only forked workers can share it, see start_method().
+    """
+
+    def __init__(
+        self,
+        cfg: PipelineConfig,
+        workers: Optional[int] = None,
+        torch_threads: Optional[int] = 1,
+        chunk_size: int = 16,
+        max_restarts: int = 3,
+        pipeline: Optional[SanitizationPipeline] = None,
+    ) -> None:
+        self.cfg = cfg
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.torch_threads = torch_threads
+        self.chunk_size = max(1, chunk_size)
+        self.max_restarts = max_restarts
+        self.restarts = 0
+        self.pipeline = pipeline if pipeline is not None else SanitizationPipeline(cfg)
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def __enter__(self) -> "ParallelSanitizer":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+    def sanitize_batch(
+        self,
+        records: Iterable[CanonicalRecord],
+        audit_sink: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ) -> List[SanitizeResult]:
+        """All results in input order (same as SanitizationPipeline.sanitize_batch)."""
+        return list(self.imap(records, ordered=True, audit_sink=audit_sink))
+
+    def imap(
+        self,
+        records: Iterable[CanonicalRecord],
+        ordered: bool = True,
+        audit_sink: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ) -> Iterator[SanitizeResult]:
+        """
+        Stream results. ordered=True yields in input order; ordered=False yields each chunk
+        as soon as it finishes (use result.record.record_id to match inputs).
+        At most 2 * workers chunks are in flight, so large inputs are not loaded at once.
+        """
+        chunks = _chunked(records, self.chunk_size)
+        in_flight: Dict[Future, Tuple[int, List[CanonicalRecord]]] = {}
+        done: Dict[int, _ChunkResult] = {}
+        retry: Deque[Tuple[int, List[CanonicalRecord]]] = deque()
+        completed = False
+        try:
+            yield from self._run(chunks, in_flight, done, retry, ordered, audit_sink)
+            completed = True
+        finally:
+            # A worker exception, a failing audit_sink or a caller abandoning the iterator: do not
+            # leave workers running chunks nobody will collect.
+            if not completed:
+                self.close()
+
+    def _run(
+        self,
+        chunks: Iterator[Tuple[int, List[CanonicalRecord]]],
+        in_flight: Dict[Future, Tuple[int, List[CanonicalRecord]]],
+        done: Dict[int, _ChunkResult],
+        retry: Deque[Tuple[int, List[CanonicalRecord]]],
+        ordered: bool,
+        audit_sink: Optional[Callable[[Dict[str, Any]], None]],
+    ) -> Iterator[SanitizeResult]:
+        next_to_yield = 0
+        exhausted = False
+        while True:
+            while len(in_flight) < 2 * self.workers and (retry or not exhausted):
+                if retry:
+                    index, chunk = retry.popleft()
+                else:
+                    item = next(chunks, None)
+                    if item is None:
+                        exhausted = True
+                        break
+                    index, chunk = item
+                try:
+                    in_flight[self._ensure_pool().submit(_sanitize_chunk, chunk)] = (index, chunk)
+                except BrokenProcessPool:
+                    retry.appendleft((index, chunk))
+                    self._restart(in_flight, retry, done)
+            if not in_flight:
+                return
+
+            finished, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+            crashed = False
+            for fut in finished:
+                index, chunk = in_flight.pop(fut)
+                try:
+                    done[index] = fut.result()
+                except BrokenProcessPool:
+                    crashed = True
+                    retry.append((index, chunk))
+            if crashed:
+                self._restart(in_flight, retry, done)
+
+            if ordered:
+                while next_to_yield in done:
+                    yield from _emit(done.pop(next_to_yield), audit_sink)
+                    next_to_yield += 1
+            else:
+                for index in sorted(done):
+                    yield from _emit(done.pop(index), audit_sink)
+
+    def start_method(self) -> str:
+        """
+        "fork" when it is safe right now (see the module docstring), else "forkserver" or "spawn".
+        The pipeline's own HF worker thread is stopped first; it restarts on demand.
+        """
+        methods = multiprocessing.get_all_start_methods()
+        if "fork" in methods:
+            self.pipeline.close()
+            python_threads = threading.active_count()
+            if python_threads == 1 and (self.torch_threads == 1 or _native_threads() <= python_threads):
+                return "fork"
+        return "forkserver" if "forkserver" in methods else "spawn"
+
+    def _ensure_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            method = self.start_method()
+            if method != "fork" and "fork" in multiprocessing.get_all_start_methods():
+                warnings.warn(
+                    "ParallelSanitizer: other threads are running, so workers are not forked and each "
+                    f"loads its own pipeline from cfg ({method})",
+                    RuntimeWarning,
+                    stacklevel=3,
+                )
+            # Fork hands process arguments to the child as they are, so the loaded model is shared
+            # copy-on-write; other start methods would pickle it.
+            shared = self.pipeline if method == "fork" else None
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context(method),
+                initializer=_init_worker,
+                initargs=(self.cfg, self.torch_threads, shared),
+            )
+        return self._pool
+
+    def _restart(
+        self,
+        in_flight: Dict[Future, Tuple[int, List[CanonicalRecord]]],
+        retry: Deque[Tuple[int, List[CanonicalRecord]]],
+        done: Dict[int, _ChunkResult],
+    ) -> None:
+        """A worker died: the whole pool is broken, so resubmit everything unfinished on a new pool."""
+        self.restarts += 1
+        if self.restarts > self.max_restarts:
+            self.close()
+            raise RuntimeError(f"Sanitization worker crashed; gave up after {self.max_restarts} restart(s)")
+        for fut, (index, chunk) in in_flight.items():
+            if fut.done() and not fut.cancelled() and fut.exception() is None:
+                done[index] = fut.result()
+            else:
+                retry.append((index, chunk))
+        in_flight.clear()
+        if self._pool is not None:
+            # Join the broken pool's manager thread, or the new pool could not fork.
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+
+def _native_threads() -> int:
+    """OS threads in this process (Linux), including native pools Python does not see."""
+    try:
+        return len(os.listdir("/proc/self/task"))
+    except OSError:
+        return threading.active_count()
+
+
+def _chunked(records: Iterable[CanonicalRecord], size: int) -> Iterator[Tuple[int, List[CanonicalRecord]]]:
+    chunk: List[CanonicalRecord] = []
+    index = 0
+    for rec in records:
+        chunk.append(rec)
+        if len(chunk) == size:
+            yield index, chunk
+            index += 1
+            chunk = []
+    if chunk:
+        yield index, chunk
+
+
+def _emit(
+    chunk_result: _ChunkResult,
+    audit_sink: Optional[Callable[[Dict[str, Any]], None]],
+) -> Iterator[SanitizeResult]:
+    results, payloads = chunk_result
+    if audit_sink is not None:
+        for payload in payloads:
+            audit_sink(payload)
+    yield from results
@@ -1,30 +1,81 @@
 from __future__ import annotations
 
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Any, Callable, Dict, List, Optional
+from functools import partial
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
 
-from stupiphi.models.canonical_record import CanonicalRecord
-from stupiphi.detection.hf_detector import HFDetector
+from stupiphi.models.cache_paths import resolve_cache_dir
+from stupiphi.models.canonical_record import CanonicalRecord, PatientInfo
+from stupiphi.detection.cascade import PROFILES, covered_spans, ner_segments
+from stupiphi.detection.known_entities import KnownEntityDetector, KnownEntityScanner
+from stupiphi.detection.pattern_packs import load_rule_packs
+from stupiphi.detection.patterns import PatternScanner, registered_patterns
 from stupiphi.detection.rule_detector import RuleBasedDetector
 from stupiphi.detection.structured_detector import StructuredFieldDetector
-from stupiphi.detection.detector_base import Finding
+from stupiphi.detection.detector_base import DetectionCounts, Finding
 from stupiphi.transformation.plan import build_conservative_plan
-from stupiphi.transformation.apply import apply_plan
+from stupiphi.transformation.apply import apply_plan, replace_patient
+from stupiphi.transformation.pseudonym_vault import PseudonymVault, shared_pseudonym_vault
 from stupiphi.audit.audit_log import build_audit_event, to_audit_payload, AuditEvent
 from stupiphi.verification.verify import verify_basic
 
+if TYPE_CHECKING:
+    from stupiphi.detection.hf_detector import HFDetector
+
 
 VALID_DB_POLICY_ACTIONS = frozenset({"preserve", "redact", "pseudonymize", "mask", "placeholder"})
 
 
 @dataclass(frozen=True)
 class PipelineConfig:
+    # Detector cascade (see detection.cascade): "thorough" runs NER on every note; "balanced" only on
+    # notes with capitalized words outside rule/known spans; "fast" only on such sentences.
+    detector_profile: str = "thorough"
+    # Run HF inference on a background thread (torch releases the GIL) while the rule, known-entity
+    # and structured detectors, and the previous batch's redaction/verification, run on the caller's.
+    concurrent_detectors: bool = False
     hf_min_confidence: float = 0.40
     faker_seed: int = 99
     enable_hf: bool = True
+    hf_model_name: str = "dslim/bert-base-NER"  # hub id or local model directory
+    # Token budget per HF batch (length-bucketed scheduling). None = fixed-size batches.
+    hf_max_batch_tokens: Optional[int] = None
+    # Sliding-window inference for long notes: window size and overlap in tokens. None = off.
+    hf_chunk_tokens: Optional[int] = None
+    hf_chunk_overlap: int = 64
+    hf_backend: str = "torch"  # "torch" (transformers pipeline), "direct" (forward pass + NumPy decode) or "onnx"
+    hf_quantized: bool = False  # dynamic int8 quantized model (CPU); gate with evals before enabling
+    cache_dir: Optional[str] = None  # on-disk caches (e.g. exported ONNX graphs); None = ~/.cache/stupiphi
+    # NER result cache keyed by note hash (offsets/labels/scores only). 0 = off.
+    hf_cache_entries: int = 0
+    hf_cache_disk: bool = False  # also persist to <cache_dir>/ner_cache.sqlite3
+    hf_cache_disk_entries: Optional[int] = None  # None = unbounded
+    # Per-sentence NER memo for templated notes: only unseen sentences reach the model. 0 = off.
+    hf_sentence_memo_entries: int = 0
+    # Coalesce concurrent single-record calls (multithreaded services) into batches of up to
+    # this many notes, waiting at most hf_micro_batch_wait_ms for a batch to fill. 0 = off.
+    hf_micro_batch_size: int = 0
+    hf_micro_batch_wait_ms: float = 5.0
     enable_rule: bool = True
+    rule_backend: str = "re"  # "re" or "re2" (linear time, needs google-re2) for the rule patterns
+    rule_scan_budget_ms: Optional[float] = None  # per-note rule scan budget; overruns are counted
+    # Extra rule patterns compiled into the same scanner: built-in pack names (identifiers, dates,
+    # urls, zip; see detection.pattern_packs) and YAML pack files.
+    rule_packs: Tuple[str, ...] = ()
+    rule_pack_files: Tuple[str, ...] = ()
     enable_structured: bool = True  # Structured-field detector (patient.*)
+    # Case-scoped known identifiers (patient/therapist names, emails, phones) passed by the caller,
+    # e.g. transfer-case. With them, HF findings below known_entities_hf_min_confidence are dropped.
+    enable_known_entities: bool = True
+    known_entities_hf_min_confidence: Optional[float] = None
     pseudonym_salt: str | None = None  # When set, same value -> same pseudonym across records
+    # With pseudonym_salt: keep issued pseudonyms in <cache_dir>/pseudonym_vault.sqlite3 so re-runs reuse
+    # them even if the generator changes, behind an in-memory LRU of pseudonym_vault_entries.
+    pseudonym_vault: bool = False
+    pseudonym_vault_entries: int = 10_000
     # Column-level sanitization during replay: { table_name: { column_name: action } }.
     # None = preserve everything (current behavior). Actions: preserve, redact, pseudonymize, mask, placeholder.
     database_policy: Optional[Dict[str, Dict[str, str]]] = None
@@ -32,6 +83,47 @@ class PipelineConfig:
     database_policy_placeholders: Optional[Dict[str, str]] = None
 
 
+class _CheapFindings(NamedTuple):
+    """Per-record findings of the detectors that run before (or alongside) HF."""
+
+    rules: List[List[Finding]]
+    known: List[List[Finding]]
+    structured: List[List[Finding]]
+    covered: List[List[Tuple[int, int]]]
+    known_supplied: bool = False  # the case's identifiers were scanned for (even if none were found)
+
+
+class PatientMemo:
+    """
+    Per-patient work shared by the records of one batch or case. A case slice repeats the
+    patient on every appointment; structured findings and the synthetic replacement depend only
+    on the patient, so each is computed once per distinct PatientInfo and reused. Holds PHI:
+    scope it to one batch or case (sanitize_batch makes one per call).
+    """
+
+    def __init__(self) -> None:
+        self._findings: Dict[PatientInfo, List[Finding]] = {}
+        self._replacements: Dict[PatientInfo, PatientInfo] = {}
+        self.computed = 0
+        self.reused = 0
+
+    def structured_findings(self, patient: PatientInfo, detect: Callable[[], List[Finding]]) -> List[Finding]:
+        return self._get(self._findings, patient, detect)
+
+    def replacement(self, patient: PatientInfo, replace: Callable[[], PatientInfo]) -> PatientInfo:
+        return self._get(self._replacements, patient, replace)
+
+    def _get(self, table: Dict[PatientInfo, Any], patient: PatientInfo, compute: Callable[[], Any]) -> Any:
+        try:
+            value = table[patient]
+        except KeyError:
+            value = table[patient] = compute()
+            self.computed += 1
+        else:
+            self.reused += 1
+        return value
+
+
 @dataclass(frozen=True)
 class SanitizeResult:
     """Result of sanitizing a single record: sanitized record, audit event, and verification outcome."""
@@ -44,10 +136,68 @@ class SanitizeResult:
 
 class SanitizationPipeline:
     def __init__(self, cfg: PipelineConfig) -> None:
+        if cfg.detector_profile not in PROFILES:
+            raise ValueError(f"Unknown detector profile {cfg.detector_profile!r}; expected one of: {', '.join(PROFILES)}")
         self.cfg = cfg
-        self.hf = HFDetector(min_confidence=cfg.hf_min_confidence) if cfg.enable_hf else None
-        self.rules = RuleBasedDetector() if cfg.enable_rule else None
+        self.hf: Optional["HFDetector"] = None
+        if cfg.enable_hf:
+            # Imported here so rule-only pipelines never import transformers/torch.
+            from stupiphi.detection.hf_detector import HFDetector
+            from stupiphi.detection.ner_cache import shared_ner_cache
+            from stupiphi.models.registry import default_registry
+
+            disk_path = resolve_cache_dir(cfg.cache_dir) / "ner_cache.sqlite3" if cfg.hf_cache_disk else None
+            cache = sentence_memo = None
+            if cfg.hf_cache_entries > 0 or cfg.hf_cache_disk:
+                cache = shared_ner_cache(
+                    max_entries=cfg.hf_cache_entries,
+                    path=disk_path,
+                    max_disk_entries=cfg.hf_cache_disk_entries,
+                )
+            if cfg.hf_sentence_memo_entries > 0:
+                sentence_memo = shared_ner_cache(
+                    max_entries=cfg.hf_sentence_memo_entries,
+                    path=disk_path,
+                    max_disk_entries=cfg.hf_cache_disk_entries,
+                    name="sentences",
+                )
+            self.hf = HFDetector(
+                min_confidence=cfg.hf_min_confidence,
+                cache=cache,
+                sentence_memo=sentence_memo,
+                # Shared per process: building many pipelines does not reload the model.
+                classifier=default_registry().get(
+                    model_name=cfg.hf_model_name,
+                    backend=cfg.hf_backend,
+                    quantized=cfg.hf_quantized,
+                    cache_dir=cfg.cache_dir,
+                    max_batch_tokens=cfg.hf_max_batch_tokens,
+                    chunk_tokens=cfg.hf_chunk_tokens,
+                    chunk_overlap=cfg.hf_chunk_overlap,
+                    micro_batch_size=cfg.hf_micro_batch_size,
+                    micro_batch_wait_ms=cfg.hf_micro_batch_wait_ms,
+                ),
+            )
+        # None = the shared default scanner (Python re, no budget, no packs), which follows
+        # register_pattern(). Otherwise all patterns are compiled once, here.
+        self.rule_scanner: Optional[PatternScanner] = None
+        packs = load_rule_packs(cfg.rule_packs, cfg.rule_pack_files)
+        if packs or cfg.rule_backend != "re" or cfg.rule_scan_budget_ms is not None:
+            self.rule_scanner = PatternScanner(
+                registered_patterns() + packs, backend=cfg.rule_backend, scan_budget_ms=cfg.rule_scan_budget_ms
+            )
+        self.rules = RuleBasedDetector(scanner=self.rule_scanner) if cfg.enable_rule else None
         self.structured = StructuredFieldDetector() if cfg.enable_structured else None
+        self.pseudonym_vault: Optional[PseudonymVault] = None
+        if cfg.pseudonym_vault and cfg.pseudonym_salt is not None:
+            self.pseudonym_vault = shared_pseudonym_vault(
+                max_entries=cfg.pseudonym_vault_entries,
+                path=resolve_cache_dir(cfg.cache_dir) / "pseudonym_vault.sqlite3",
+            )
+        self._cascade_counts = {"notes": 0, "ner_notes": 0, "chars": 0, "ner_chars": 0}
+        self._counts_lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_pid: Optional[int] = None
 
     @classmethod
     def from_yaml(cls, path: str) -> "SanitizationPipeline":
@@ -55,33 +205,275 @@ class SanitizationPipeline:
         from stupiphi.config.load import load_config
         return cls(load_config(path))
 
-    def detect_ensemble(self, record: CanonicalRecord) -> List[Finding]:
-        findings: List[Finding] = []
-        if self.hf is not None:
-            findings.extend(self.hf.detect(record))
-        if self.rules is not None:
-            findings.extend(self.rules.detect(record))
-        if self.structured is not None:
-            findings.extend(self.structured.detect(record))
+    def detect_ensemble(
+        self,
+        record: CanonicalRecord,
+        known_entities: Optional[KnownEntityScanner] = None,
+    ) -> List[Finding]:
+        """All detectors' findings for record; known_entities holds the case's own identifiers."""
+        return self._detect_ensemble([record], 1, known_entities, None, single=True)[0]
+
+    def detect_ensemble_batch(
+        self,
+        records: Sequence[CanonicalRecord],
+        batch_size: int = 16,
+        known_entities: Optional[KnownEntityScanner] = None,
+        patient_memo: Optional[PatientMemo] = None,
+        counts: Optional[DetectionCounts] = None,
+    ) -> List[List[Finding]]:
+        """
+        Batched detect_ensemble. Cheap detectors (rules, known entities, structured) run first
+        over all records; HF then runs, batched, on what the profile's gate lets through. With
+        concurrent_detectors and the thorough profile (no gate), HF overlaps the cheap detectors.
+        Findings are the same, in the same order, either way.
+        """
+        return self._detect_ensemble(records, batch_size, known_entities, patient_memo, counts=counts)
+
+    def _detect_ensemble(
+        self,
+        records: Sequence[CanonicalRecord],
+        batch_size: int,
+        known_entities: Optional[KnownEntityScanner],
+        patient_memo: Optional[PatientMemo],
+        single: bool = False,
+        counts: Optional[DetectionCounts] = None,
+    ) -> List[List[Finding]]:
+        if self._overlap_hf_with_cheap():
+            future = self._hf_executor().submit(self._detect_hf, records, None, batch_size, single, counts)
+            cheap = self._detect_cheap(records, known_entities, patient_memo, counts)
+            hf_lists = future.result()
+        else:
+            cheap = self._detect_cheap(records, known_entities, patient_memo, counts)
+            hf_lists = self._detect_hf(records, cheap.covered, batch_size, single, counts)
+        return self._merge(records, hf_lists, cheap)
+
+    def cascade_stats(self) -> Dict[str, int]:
+        """Notes and characters seen, and how many of them went through NER."""
+        with self._counts_lock:
+            return dict(self._cascade_counts)
+
+    def close(self) -> None:
+        """Stop the HF worker thread used by concurrent_detectors (idempotent)."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def _overlap_hf_with_cheap(self) -> bool:
+        # Gated profiles need the cheap detectors' spans before HF can start.
+        return self.cfg.concurrent_detectors and self.hf is not None and self.cfg.detector_profile == "thorough"
+
+    def _hf_executor(self) -> ThreadPoolExecutor:
+        # Threads do not survive fork (e.g. ParallelSanitizer workers): one executor per process.
+        # With micro-batching, up to max_size request threads must be able to reach the batcher at once.
+        if self._executor is None or self._executor_pid != os.getpid():
+            self._executor = ThreadPoolExecutor(
+                max_workers=max(1, self.cfg.hf_micro_batch_size), thread_name_prefix="stupiphi-hf"
+            )
+            self._executor_pid = os.getpid()
+        return self._executor
+
+    def _detect_cheap(
+        self,
+        records: Sequence[CanonicalRecord],
+        known_entities: Optional[KnownEntityScanner],
+        patient_memo: Optional[PatientMemo] = None,
+        counts: Optional[DetectionCounts] = None,
+    ) -> _CheapFindings:
+        rule_lists = self.rules.detect_batch(records, counts) if self.rules is not None else [[] for _ in records]
+        known_supplied = known_entities is not None and self.cfg.enable_known_entities
+        if known_supplied:
+            known_detector = KnownEntityDetector(known_entities)  # type: ignore[arg-type]
+            known_lists = [known_detector.detect(rec) for rec in records]
+        else:
+            known_lists = [[] for _ in records]
+        structured = self.structured
+        if structured is None:
+            structured_lists: List[List[Finding]] = [[] for _ in records]
+        elif patient_memo is None:
+            structured_lists = [structured.detect(rec) for rec in records]
+        else:
+            structured_lists = [
+                patient_memo.structured_findings(rec.patient, partial(structured.detect, rec)) for rec in records
+            ]
+        return _CheapFindings(
+            rules=rule_lists,
+            known=known_lists,
+            structured=structured_lists,
+            covered=[covered_spans(rules, known) for rules, known in zip(rule_lists, known_lists)],
+            known_supplied=known_supplied,
+        )
+
+    def _merge(
+        self,
+        records: Sequence[CanonicalRecord],
+        hf_lists: List[List[Finding]],
+        cheap: _CheapFindings,
+    ) -> List[List[Finding]]:
+        return [
+            self._combine_findings(hf, rules, known, structured, cheap.known_supplied)
+            for hf, rules, known, structured in zip(hf_lists, cheap.rules, cheap.known, cheap.structured)
+        ]
+
+    def _detect_hf(
+        self,
+        records: Sequence[CanonicalRecord],
+        covered: Optional[List[List[Tuple[int, int]]]],
+        batch_size: int,
+        single: bool = False,
+        counts: Optional[DetectionCounts] = None,
+    ) -> List[List[Finding]]:
+        """
+        HF findings per record; covered (cheap detectors' spans) is only needed by gated profiles.
+        single: records is one sanitize_record note, sent through hf.detect (and so the
+        micro-batcher) rather than detect_batch; batch chunks of one stay on detect_batch.
+        """
+        hf = self.hf
+        profile = self.cfg.detector_profile
+        segments: List[List[Tuple[int, int]]] = []
+        selected: List[int] = []
+        if hf is not None and profile == "fast":
+            segments = [ner_segments(rec.encounter_notes, spans) for rec, spans in zip(records, covered)]  # type: ignore[arg-type]
+        elif hf is not None and profile == "balanced":
+            selected = [i for i, rec in enumerate(records) if hf.applies_to(rec, covered[i])]  # type: ignore[index]
+        elif hf is not None:
+            selected = list(range(len(records)))
+        with self._counts_lock:
+            counts = self._cascade_counts
+            counts["notes"] += len(records)
+            counts["chars"] += sum(len(rec.encounter_notes) for rec in records)
+            counts["ner_notes"] += sum(1 for spans in segments if spans) + len(selected)
+            counts["ner_chars"] += sum(e - s for spans in segments for s, e in spans)
+            counts["ner_chars"] += sum(len(records[i].encounter_notes) for i in selected)
+        if hf is None:
+            return [[] for _ in records]
+        if profile == "fast":
+            return hf.detect_segments(records, segments, batch_size=batch_size, counts=counts)
+        if single and selected:
+            return [hf.detect(records[0], counts=counts)]
+        results: List[List[Finding]] = [[] for _ in records]
+        batch = hf.detect_batch([records[i] for i in selected], batch_size=batch_size, counts=counts)
+        for i, findings in zip(selected, batch):
+            results[i] = findings
+        return results
+
+    def _combine_findings(
+        self,
+        hf_findings: List[Finding],
+        rule_findings: List[Finding],
+        known_findings: List[Finding],
+        structured_findings: List[Finding],
+        known_supplied: bool = False,
+    ) -> List[Finding]:
+        # Order matters for audit output: HF first, then rules, then known entities, then structured.
+        findings: List[Finding] = list(hf_findings) + list(rule_findings)
+        if known_supplied:
+            findings = [f for f in findings if not self._superseded_by_known(f, known_findings)]
+            findings.extend(known_findings)
+        findings.extend(structured_findings)
         return findings
 
+    def _superseded_by_known(self, finding: Finding, known: List[Finding]) -> bool:
+        """Low-confidence HF findings, and findings inside a known identifier, add nothing."""
+        threshold = self.cfg.known_entities_hf_min_confidence
+        if finding.detector_source == "huggingface" and threshold is not None and finding.confidence < threshold:
+            return True
+        if finding.start is None or finding.end is None:
+            return False
+        return any(k.start <= finding.start and finding.end <= k.end for k in known)  # type: ignore[operator]
+
     def sanitize_record(
         self,
         record: CanonicalRecord,
         audit_sink: Optional[Callable[[Dict[str, Any]], None]] = None,
+        known_entities: Optional[KnownEntityScanner] = None,
+        patient_memo: Optional[PatientMemo] = None,
+        counts: Optional[DetectionCounts] = None,
+    ) -> SanitizeResult:
+        """
+        patient_memo: shared by the calls for one case so its patient is handled once.
+        counts: collects this call's detector counters (see DetectionCounts).
+        """
+        findings = self._detect_ensemble([record], 1, known_entities, patient_memo, single=True, counts=counts)[0]
+        return self._finalize(record, findings, audit_sink, patient_memo)
+
+    def sanitize_batch(
+        self,
+        records: Iterable[CanonicalRecord],
+        batch_size: int = 16,
+        audit_sink: Optional[Callable[[Dict[str, Any]], None]] = None,
+        known_entities: Optional[KnownEntityScanner] = None,
+        patient_memo: Optional[PatientMemo] = None,
+    ) -> List[SanitizeResult]:
+        """Sanitize many records, running HF inference in batches of batch_size.
+
+        Returns the same SanitizeResults (and sends the same audit payloads, in order)
+        as calling sanitize_record on each record. Records sharing a patient share its
+        structured findings and replacement (a PatientMemo per call unless one is given).
+        """
+        batch_size = max(1, batch_size)
+        memo = patient_memo if patient_memo is not None else PatientMemo()
+        pending = list(records)
+        chunks = [pending[i : i + batch_size] for i in range(0, len(pending), batch_size)]
+        results: List[SanitizeResult] = []
+        if not self.cfg.concurrent_detectors or self.hf is None:
+            for chunk in chunks:
+                detected = self.detect_ensemble_batch(
+                    chunk, batch_size=batch_size, known_entities=known_entities, patient_memo=memo
+                )
+                for rec, findings in zip(chunk, detected):
+                    results.append(self._finalize(rec, findings, audit_sink, memo))
+            return results
+
+        # Pipelined: while HF runs on chunk k, the caller's thread runs the cheap detectors for
+        # chunk k (thorough) or k+1, and plans, redacts and verifies chunk k-1.
+        in_flight: Optional[Tuple[List[CanonicalRecord], _CheapFindings, "Future[List[List[Finding]]]"]] = None
+        for chunk in chunks:
+            if self._overlap_hf_with_cheap():
+                future = self._hf_executor().submit(self._detect_hf, chunk, None, batch_size)
+                cheap = self._detect_cheap(chunk, known_entities, memo)
+            else:
+                cheap = self._detect_cheap(chunk, known_entities, memo)
+                future = self._hf_executor().submit(self._detect_hf, chunk, cheap.covered, batch_size)
+            if in_flight is not None:
+                self._finalize_chunk(*in_flight, results, audit_sink, memo)
+            in_flight = (chunk, cheap, future)
+        if in_flight is not None:
+            self._finalize_chunk(*in_flight, results, audit_sink, memo)
+        return results
+
+    def _finalize_chunk(
+        self,
+        chunk: List[CanonicalRecord],
+        cheap: _CheapFindings,
+        future: "Future[List[List[Finding]]]",
+        results: List[SanitizeResult],
+        audit_sink: Optional[Callable[[Dict[str, Any]], None]],
+        patient_memo: Optional[PatientMemo] = None,
+    ) -> None:
+        for rec, findings in zip(chunk, self._merge(chunk, future.result(), cheap)):
+            results.append(self._finalize(rec, findings, audit_sink, patient_memo))
+
+    def _finalize(
+        self,
+        record: CanonicalRecord,
+        findings: List[Finding],
+        audit_sink: Optional[Callable[[Dict[str, Any]], None]],
+        patient_memo: Optional[PatientMemo] = None,
     ) -> SanitizeResult:
-        findings = self.detect_ensemble(record)
+        """Plan, apply, audit and verify one record given its findings."""
         plan = build_conservative_plan(record_id=record.record_id, findings=findings)
-        sanitized, redaction_count = apply_plan(
-            record, plan, seed=self.cfg.faker_seed, pseudonym_salt=self.cfg.pseudonym_salt
+        replace = partial(
+            replace_patient, record.patient, self.cfg.faker_seed, self.cfg.pseudonym_salt, self.pseudonym_vault
         )
+        patient = patient_memo.replacement(record.patient, replace) if patient_memo is not None else replace()
+        sanitized, redaction_count = apply_plan(record, plan, patient=patient)
         audit_event = build_audit_event(
             record_id=record.record_id,
             findings=findings,
             plan=plan,
             redaction_count=redaction_count,
         )
-        verification_ok, verification_issues = verify_basic(sanitized)
+        verification_ok, verification_issues = verify_basic(sanitized, scanner=self.rule_scanner)
         result = SanitizeResult(
             record=sanitized,
             audit_event=audit_event,
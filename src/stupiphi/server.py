@@ -0,0 +1,425 @@
+"""
+Local sanitization server: `stupiphi serve`.
+
+Keeps one warm SanitizationPipeline per config file so CLI calls (with --server) and other
+local clients skip interpreter start-up, imports and model loading. Listens on a Unix domain
+socket (mode 0600, the default) or loopback HTTP; there is no authentication, so never expose
+it beyond the host.
+
+Endpoints (JSON in, JSON out; records use CanonicalRecord.to_dict):
+  GET  /health          -> {"ok": true, "pipelines": n}
+  POST /sanitize        {"config": path?, "record": {...}}       -> {"result": {...}, "audit": [...]}
+  POST /sanitize-batch  {"config": path?, "records": [...]}      -> {"results": [...], "audit": [...]}
+  POST /transfer-case   {"config": path?, "case_id": n, ...}     -> {"report": {...}, "audit": [...]}
+
+Requests from a browser cannot reach the endpoints: POSTs must be Content-Type
+application/json (not a "simple" request, so a cross-origin page needs a CORS preflight the
+server never grants), and any request with an Origin header or a Host other than loopback
+(DNS rebinding) is refused. A request can only name a config the server was started with, and
+the server writes no files for a request: /transfer-case returns the report and the client
+writes it.
+
+Concurrent requests sharing a config are coalesced into model batches by the micro-batcher
+(hf_micro_batch_size; the server turns it on unless the config sets it). Config paths are
+resolved by the client; a pipeline is rebuilt when its config file changes.
+"""
+from __future__ import annotations
+
+import http.client
+import ipaddress
+import json
+import os
+import socket
+import threading
+from contextlib import contextmanager
+from dataclasses import replace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from socketserver import ThreadingMixIn, UnixStreamServer
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from stupiphi.audit.audit_log import AuditEvent, to_dict
+from stupiphi.models.cache_paths import default_cache_dir
+from stupiphi.models.canonical_record import CanonicalRecord
+from stupiphi.sanitizer.pipeline import PipelineConfig, SanitizationPipeline, SanitizeResult
+
+# Owner-only socket in the cache directory; TCP ("http://127.0.0.1:PORT") must be asked for.
+DEFAULT_ADDRESS = f"unix:{default_cache_dir() / 'serve.sock'}"
+DEFAULT_PORT = 8765
+
+_LOOPBACK_NAMES = {"localhost"}
+
+
+class ServerError(RuntimeError):
+    """Error response from the server. payload is the JSON body (no PHI: error kind and counts only)."""
+
+    def __init__(self, status: int, payload: Dict[str, Any]) -> None:
+        super().__init__(str(payload.get("message") or payload.get("error") or f"HTTP {status}"))
+        self.status = status
+        self.payload = payload
+
+
+class PipelineCache:
+    """
+    Warm pipelines keyed by config path (None = defaults), rebuilt when the file changes.
+    A replaced pipeline is closed once the last request using it (see use) has finished.
+    """
+
+    def __init__(self, micro_batch_size: int = 16, micro_batch_wait_ms: float = 5.0) -> None:
+        self.micro_batch_size = micro_batch_size
+        self.micro_batch_wait_ms = micro_batch_wait_ms
+        self._lock = threading.Lock()
+        self._pipelines: Dict[str, Tuple[int, SanitizationPipeline]] = {}
+        self._in_flight: Dict[int, int] = {}  # id(pipeline) -> requests using it
+        self._retired: Dict[int, SanitizationPipeline] = {}  # replaced, still in flight
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._pipelines)
+
+    def get(self, config_path: Optional[str] = None) -> SanitizationPipeline:
+        """The current pipeline for config_path, not tracked as in flight (e.g. warm-up at start)."""
+        pipeline, replaced = self._current(config_path, acquire=False)
+        if replaced is not None:
+            replaced.close()
+        return pipeline
+
+    @contextmanager
+    def use(self, config_path: Optional[str] = None) -> Iterator[SanitizationPipeline]:
+        """The current pipeline for config_path, kept open until the block exits even if replaced meanwhile."""
+        pipeline, replaced = self._current(config_path, acquire=True)
+        if replaced is not None:
+            replaced.close()
+        try:
+            yield pipeline
+        finally:
+            done: Optional[SanitizationPipeline] = None
+            with self._lock:
+                pid = id(pipeline)
+                self._in_flight[pid] -= 1
+                if not self._in_flight[pid]:
+                    del self._in_flight[pid]
+                    done = self._retired.pop(pid, None)
+            if done is not None:
+                done.close()
+
+    def _current(
+        self, config_path: Optional[str], acquire: bool
+    ) -> Tuple[SanitizationPipeline, Optional[SanitizationPipeline]]:
+        """(pipeline, the replaced pipeline if nothing uses it any more and it should be closed)."""
+        key = str(Path(config_path).resolve()) if config_path else ""
+        mtime = Path(key).stat().st_mtime_ns if key else 0
+        replaced: Optional[SanitizationPipeline] = None
+        # Building under the lock keeps concurrent first requests from loading the config twice;
+        # the model itself is shared through the registry either way.
+        with self._lock:
+            cached = self._pipelines.get(key)
+            if cached is not None and cached[0] == mtime:
+                pipeline = cached[1]
+            else:
+                pipeline = SanitizationPipeline(self._config(key))
+                self._pipelines[key] = (mtime, pipeline)
+                if cached is not None:
+                    if id(cached[1]) in self._in_flight:
+                        self._retired[id(cached[1])] = cached[1]
+                    else:
+                        replaced = cached[1]
+            if acquire:
+                self._in_flight[id(pipeline)] = self._in_flight.get(id(pipeline), 0) + 1
+        return pipeline, replaced
+
+    def _config(self, path: str) -> PipelineConfig:
+        if path:
+            from stupiphi.config.load import load_config
+
+            cfg = load_config(path)
+        else:
+            cfg = PipelineConfig()
+        if cfg.hf_micro_batch_size == 0 and self.micro_batch_size > 0:
+            cfg = replace(
+                cfg,
+                hf_micro_batch_size=self.micro_batch_size,
+                hf_micro_batch_wait_ms=self.micro_batch_wait_ms,
+            )
+        return cfg
+
+
+class SanitizationServer:
+    """
+    HTTP server over a Unix socket ("unix:/path/to.sock") or loopback TCP ("http://127.0.0.1:port").
+    Each request runs on its own thread.
+
+    configs: the config paths requests may name (None = the defaults); anything else is refused.
+    """
+
+    def __init__(
+        self,
+        address: str = DEFAULT_ADDRESS,
+        pipelines: Optional[PipelineCache] = None,
+        configs: Iterable[Optional[str]] = (None,),
+    ) -> None:
+        self.pipelines = pipelines if pipelines is not None else PipelineCache()
+        self.configs = {_config_key(c) for c in configs}
+        socket_path = _unix_socket_path(address)
+        if socket_path is not None:
+            Path(socket_path).parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+            if os.path.exists(socket_path):
+                os.unlink(socket_path)
+            self._httpd: Any = _ThreadingUnixHTTPServer(socket_path, _Handler)
+            os.chmod(socket_path, 0o600)  # records carry PHI: owner only
+            self.address = f"unix:{socket_path}"
+        else:
+            url = urlparse(address)
+            host = url.hostname or "127.0.0.1"
+            if not _is_loopback(host):
+                raise ValueError(f"Refusing to serve on {host!r}: the server has no authentication (use loopback)")
+            self._httpd = ThreadingHTTPServer((host, url.port or DEFAULT_PORT), _Handler)
+            host, port = self._httpd.server_address[:2]
+            self.address = f"http://{host}:{port}"
+        self._httpd.daemon_threads = True
+        self._httpd.app = self
+
+    def serve_forever(self) -> None:
+        try:
+            self._httpd.serve_forever()
+        finally:
+            self._httpd.server_close()
+            socket_path = _unix_socket_path(self.address)
+            if socket_path is not None and os.path.exists(socket_path):
+                os.unlink(socket_path)
+
+    def shutdown(self) -> None:
+        self._httpd.shutdown()
+
+    def handle(self, path: str, body: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        """Dispatch one POST request; returns (status, JSON payload)."""
+        audit: List[Dict[str, Any]] = []
+        if path in ("/sanitize", "/sanitize-batch", "/transfer-case") and not self._config_allowed(body):
+            return 403, {"error": "config_not_allowed", "message": "Config was not loaded at server start"}
+        try:
+            if path == "/sanitize":
+                with self.pipelines.use(body.get("config")) as pipeline:
+                    res = pipeline.sanitize_record(CanonicalRecord.from_dict(body["record"]), audit_sink=audit.append)
+                return 200, {"result": _result_to_dict(res), "audit": audit}
+            if path == "/sanitize-batch":
+                records = [CanonicalRecord.from_dict(r) for r in body["records"]]
+                with self.pipelines.use(body.get("config")) as pipeline:
+                    results = pipeline.sanitize_batch(
+                        records, batch_size=int(body.get("batch_size", 16)), audit_sink=audit.append
+                    )
+                return 200, {"results": [_result_to_dict(r) for r in results], "audit": audit}
+            if path == "/transfer-case":
+                return self._transfer_case(body, audit)
+        except (KeyError, TypeError, ValueError) as e:
+            return 400, {"error": "bad_request", "message": f"Invalid request: {type(e).__name__}"}
+        return 404, {"error": "not_found", "message": f"Unknown endpoint {path}"}
+
+    def _config_allowed(self, body: Dict[str, Any]) -> bool:
+        config = body.get("config")
+        return (config is None or isinstance(config, str)) and _config_key(config) in self.configs
+
+    def _transfer_case(self, body: Dict[str, Any], audit: List[Dict[str, Any]]) -> Tuple[int, Dict[str, Any]]:
+        from stupiphi.jobs.case_transfer import (
+            DBVerificationFailedError,
+            VerificationFailedError,
+            run_case_transfer,
+        )
+
+        if "report_out" in body:  # the server writes no files on a request's behalf
+            return 400, {"error": "bad_request", "message": "report_out is not accepted; the client writes the report"}
+        config_path = body.get("config")
+        reports: List[Any] = []
+        try:
+            with self.pipelines.use(config_path) as pipeline:
+                report = run_case_transfer(
+                    case_id=int(body["case_id"]),
+                    config_path=config_path,
+                    dry_run=bool(body.get("dry_run", False)),
+                    audit_sink=audit.append,
+                    fail_on_verification=bool(body.get("fail_on_verification", False)),
+                    verify_dev=bool(body.get("verify_dev", True)),
+                    fail_on_db_verify=bool(body.get("fail_on_db_verify", False)),
+                    pipeline=pipeline,
+                    report_sink=reports.append,
+                )
+        except (VerificationFailedError, DBVerificationFailedError) as e:  # messages are counts only (no PHI)
+            error = "verification_failed" if isinstance(e, VerificationFailedError) else "db_verification_failed"
+            payload = {"error": error, "message": str(e), "audit": audit}
+            if reports:
+                payload["report"] = reports[-1].to_dict()
+            return 409, payload
+        except RuntimeError as e:  # e.g. STUPIPHI_ALLOW_PROD_TO_DEV not set where the server runs
+            return 500, {"error": "transfer_failed", "message": str(e), "audit": audit}
+        return 200, {"report": report.to_dict(), "audit": audit}
+
+
+class _ThreadingUnixHTTPServer(ThreadingMixIn, UnixStreamServer):
+    allow_reuse_address = True
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "stupiphi"
+
+    def do_GET(self) -> None:
+        if self._refused():
+            return
+        if self.path == "/health":
+            self._send(200, {"ok": True, "pipelines": len(self.server.app.pipelines)})  # type: ignore[attr-defined]
+        else:
+            self._send(404, {"error": "not_found", "message": f"Unknown endpoint {self.path}"})
+
+    def do_POST(self) -> None:
+        if self._refused():
+            return
+        if self.headers.get_content_type() != "application/json":
+            self._send(415, {"error": "unsupported_media_type", "message": "Content-Type must be application/json"})
+            return
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        except ValueError:
+            self._send(400, {"error": "bad_request", "message": "Body must be JSON"})
+            return
+        try:
+            status, payload = self.server.app.handle(self.path, body)  # type: ignore[attr-defined]
+        except Exception as e:  # never echo exception text: it may contain record values
+            status, payload = 500, {"error": "internal", "message": type(e).__name__}
+        self._send(status, payload)
+
+    def _refused(self) -> bool:
+        """Browser-originated (Origin header) or DNS-rebound (non-loopback Host) requests get 403."""
+        host = self.headers.get("Host", "")
+        hostname = urlparse(f"//{host}").hostname if host else None
+        if self.headers.get("Origin") is not None or hostname is None or not _is_loopback(hostname):
+            self._send(403, {"error": "forbidden", "message": "Only local, non-browser clients are served"})
+            return True
+        return False
+
+    def address_string(self) -> str:
+        # Unix socket peers have no (host, port).
+        return self.client_address[0] if isinstance(self.client_address, tuple) else "unix"
+
+    def _send(self, status: int, payload: Dict[str, Any]) -> None:
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+# ---- client ----
+
+
+class RemotePipeline:
+    """
+    Client with the SanitizationPipeline sanitize_* interface, backed by a running server.
+    Results and audit payloads are the same as a local pipeline built from config_path.
+    """
+
+    def __init__(self, address: str = DEFAULT_ADDRESS, config_path: Optional[str] = None) -> None:
+        self.address = address
+        self.config_path = str(Path(config_path).resolve()) if config_path else None
+
+    def sanitize_record(
+        self,
+        record: CanonicalRecord,
+        audit_sink: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ) -> SanitizeResult:
+        response = request(self.address, "/sanitize", {"config": self.config_path, "record": record.to_dict()})
+        _replay_audit(response, audit_sink)
+        return _result_from_dict(response["result"])
+
+    def sanitize_batch(
+        self,
+        records: List[CanonicalRecord],
+        batch_size: int = 16,
+        audit_sink: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ) -> List[SanitizeResult]:
+        response = request(
+            self.address,
+            "/sanitize-batch",
+            {"config": self.config_path, "records": [r.to_dict() for r in records], "batch_size": batch_size},
+        )
+        _replay_audit(response, audit_sink)
+        return [_result_from_dict(r) for r in response["results"]]
+
+
+def request(
+    address: str,
+    path: str,
+    payload: Optional[Dict[str, Any]] = None,
+    timeout: Optional[float] = None,
+) -> Dict[str, Any]:
+    """GET (payload None) or POST JSON to the server; raises ServerError on an error status."""
+    socket_path = _unix_socket_path(address)
+    if socket_path is not None:
+        conn: http.client.HTTPConnection = _UnixHTTPConnection(socket_path, timeout=timeout)
+    else:
+        url = urlparse(address)
+        conn = http.client.HTTPConnection(url.hostname or "127.0.0.1", url.port or DEFAULT_PORT, timeout=timeout)
+    try:
+        if payload is None:
+            conn.request("GET", path)
+        else:
+            conn.request("POST", path, json.dumps(payload), {"Content-Type": "application/json"})
+        response = conn.getresponse()
+        body = json.loads(response.read() or b"{}")
+    finally:
+        conn.close()
+    if response.status >= 400:
+        raise ServerError(response.status, body)
+    return body
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, socket_path: str, timeout: Optional[float] = None) -> None:
+        super().__init__("localhost", timeout=timeout)
+        self._socket_path = socket_path
+
+    def connect(self) -> None:
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if self.timeout is not None:
+            self.sock.settimeout(self.timeout)
+        self.sock.connect(self._socket_path)
+
+
+def _unix_socket_path(address: str) -> Optional[str]:
+    return address[len("unix:"):] if address.startswith("unix:") else None
+
+
+def _config_key(config_path: Optional[str]) -> str:
+    return str(Path(config_path).resolve()) if config_path else ""
+
+
+def _is_loopback(host: str) -> bool:
+    if host.lower() in _LOOPBACK_NAMES:
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def _replay_audit(response: Dict[str, Any], audit_sink: Optional[Callable[[Dict[str, Any]], None]]) -> None:
+    if audit_sink is not None:
+        for payload in response.get("audit", []):
+            audit_sink(payload)
+
+
+def _result_to_dict(res: SanitizeResult) -> Dict[str, Any]:
+    return {
+        "record": res.record.to_dict(),
+        "audit_event": to_dict(res.audit_event),
+        "verification_ok": res.verification_ok,
+        "verification_issues": list(res.verification_issues),
+    }
+
+
+def _result_from_dict(data: Dict[str, Any]) -> SanitizeResult:
+    return SanitizeResult(
+        record=CanonicalRecord.from_dict(data["record"]),
+        audit_event=AuditEvent(**data["audit_event"]),
+        verification_ok=bool(data["verification_ok"]),
+        verification_issues=list(data["verification_issues"]),
+    )
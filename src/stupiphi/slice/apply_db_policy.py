@@ -5,12 +5,18 @@ This policy controls how DB columns are handled when replaying a case slice into
 the dev database. It is separate from free-text detection/redaction (CanonicalRecord
 and SanitizationPipeline). If database_policy is not defined in config, all columns
 are preserved (current behavior). Never log original row values.
+
+DbPolicy compiles the policy once per (table, column set) into a per-column plan and applies
+it column-wise to whole batches of rows: constants (redact, placeholder) are resolved once,
+masking runs over the column, and pseudonyms are resolved in one bulk call over the distinct
+values of the batch.
 """
 from __future__ import annotations
 
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
 
-from stupiphi.transformation.pseudonymizer import stable_pseudonym
+from stupiphi.transformation.pseudonym_vault import PseudonymVault
+from stupiphi.transformation.pseudonymizer import stable_pseudonyms
 
 REDACTED = "[REDACTED]"
 
@@ -29,53 +35,143 @@ def _column_to_field_kind(column: str) -> str:
     return _COLUMN_TO_FIELD_KIND.get(column, "email")
 
 
+class _ColumnPlan(NamedTuple):
+    column: str
+    op: str  # "keep" | "const" | "mask" | "pseudonymize"
+    const: Any = None  # op "const": the value for every row
+    field_path: str = ""  # op "pseudonymize"
+    field_kind: str = ""
+
+
+def _mask(value: Any) -> str:
+    s = str(value) if value is not None else ""
+    return "*" * (len(s) - 4) + s[-4:] if len(s) >= 4 else REDACTED
+
+
+class DbPolicy:
+    """
+    database_policy compiled for replay.
+
+    policy_config: { table_name: { column_name: "preserve"|"redact"|"pseudonymize"|"mask"|"placeholder" } }.
+    If None or table/column not defined, action is preserve (unknown actions too).
+    placeholders: For action "placeholder", { "table.column": value }. Row value is never used; if no placeholder, REDACTED.
+    vault: optional PseudonymVault for pseudonymized columns (one lookup per batch).
+    """
+
+    def __init__(
+        self,
+        policy_config: Optional[Dict[str, Dict[str, str]]],
+        pseudonym_salt: Optional[str],
+        placeholders: Optional[Dict[str, str]] = None,
+        vault: Optional[PseudonymVault] = None,
+    ) -> None:
+        self.pseudonym_salt = pseudonym_salt
+        self.vault = vault
+        self._placeholders = placeholders or {}
+        self._actions: Dict[str, Dict[str, str]] = {
+            table: {col: (action or "preserve").strip().lower() for col, action in (columns or {}).items()}
+            for table, columns in (policy_config or {}).items()
+        }
+        self._plans: Dict[Tuple[str, Tuple[str, ...]], List[_ColumnPlan]] = {}
+
+    def apply_row(self, table_name: str, row: Dict[str, Any]) -> Dict[str, Any]:
+        """Apply the policy to one row. Returns a new dict; does not mutate row."""
+        return self.apply_rows(table_name, [row])[0]
+
+    def apply_rows(self, table_name: str, rows: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Apply the policy to rows of one table, in order. Returns new dicts; rows are not mutated."""
+        groups: Dict[Tuple[str, ...], List[int]] = {}
+        for i, row in enumerate(rows):
+            groups.setdefault(tuple(row), []).append(i)
+        out: List[Dict[str, Any]] = [{} for _ in rows]
+        for columns, indexes in groups.items():
+            batch = [rows[i] for i in indexes]
+            for i, sanitized in zip(indexes, self._apply_plan(self._plan(table_name, columns), batch)):
+                out[i] = sanitized
+        return out
+
+    def _plan(self, table_name: str, columns: Tuple[str, ...]) -> List[_ColumnPlan]:
+        key = (table_name, columns)
+        plan = self._plans.get(key)
+        if plan is None:
+            plan = self._plans[key] = [self._compile(table_name, col) for col in columns]
+        return plan
+
+    def _compile(self, table_name: str, col: str) -> _ColumnPlan:
+        action = self._actions.get(table_name, {}).get(col, "preserve")
+        if action == "redact":
+            return _ColumnPlan(col, "const", REDACTED)
+        if action == "placeholder":
+            return _ColumnPlan(col, "const", self._placeholders.get(f"{table_name}.{col}", REDACTED))
+        if action == "mask":
+            return _ColumnPlan(col, "mask")
+        if action == "pseudonymize":
+            if not self.pseudonym_salt:
+                return _ColumnPlan(col, "const", REDACTED)
+            return _ColumnPlan(
+                col, "pseudonymize", field_path=f"{table_name}.{col}", field_kind=_column_to_field_kind(col)
+            )
+        return _ColumnPlan(col, "keep")
+
+    def _apply_plan(self, plan: List[_ColumnPlan], rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        n = len(rows)
+        out_columns: List[List[Any]] = []
+        pending: List[Tuple[int, List[Any]]] = []  # (index in out_columns, the column's raw values)
+        for step in plan:
+            values = [row[step.column] for row in rows]
+            if step.op == "keep":
+                out_columns.append(values)
+            elif step.op == "const":
+                out_columns.append([step.const] * n)
+            elif step.op == "mask":
+                out_columns.append([_mask(v) for v in values])
+            else:
+                out_columns.append(values)
+                pending.append((len(out_columns) - 1, values))
+        if pending:
+            self._pseudonymize(plan, out_columns, pending)
+        names = [step.column for step in plan]
+        return [dict(zip(names, values)) for values in zip(*out_columns)] if plan else [{} for _ in rows]
+
+    def _pseudonymize(
+        self, plan: List[_ColumnPlan], out_columns: List[List[Any]], pending: List[Tuple[int, List[Any]]]
+    ) -> None:
+        """Resolve every pseudonymized column of the batch with one call over the distinct values."""
+        unique: Dict[Tuple[str, str, str], int] = {}
+        for index, values in pending:
+            step = plan[index]
+            for v in values:
+                if not _is_blank(v):
+                    unique.setdefault((step.field_path, str(v), step.field_kind), len(unique))
+        items = list(unique)
+        resolved = stable_pseudonyms(self.pseudonym_salt or "", items, self.vault) if items else []
+        for index, values in pending:
+            step = plan[index]
+            out_columns[index] = [
+                REDACTED if _is_blank(v) else resolved[unique[(step.field_path, str(v), step.field_kind)]]
+                for v in values
+            ]
+
+
+def _is_blank(value: Any) -> bool:
+    return value is None or (isinstance(value, str) and value.strip() == "")
+
+
 def apply_db_policy_to_row(
     table_name: str,
     row: Dict[str, Any],
     policy_config: Optional[Dict[str, Dict[str, str]]],
     pseudonym_salt: Optional[str],
     placeholders: Optional[Dict[str, str]] = None,
+    vault: Optional[PseudonymVault] = None,
 ) -> Dict[str, Any]:
     """
     Apply database_policy to a single row. Returns a new dict; does not mutate row.
+    For many rows, build one DbPolicy and use apply_rows.
 
     policy_config: { table_name: { column_name: "preserve"|"redact"|"pseudonymize"|"mask"|"placeholder" } }.
     If None or table/column not defined, action is preserve.
     placeholders: For action "placeholder", { "table.column": value }. Row value is never used; if no placeholder, REDACTED.
+    vault: optional PseudonymVault; the row's pseudonymized columns are resolved in one lookup.
     """
-    table_policy = (policy_config or {}).get(table_name) or {}
-    placeholders_map = placeholders or {}
-    out: Dict[str, Any] = {}
-
-    for col, value in row.items():
-        action = (table_policy.get(col) or "preserve").strip().lower()
-        if action == "preserve":
-            out[col] = value
-        elif action == "redact":
-            out[col] = REDACTED
-        elif action == "placeholder":
-            key = f"{table_name}.{col}"
-            out[col] = placeholders_map.get(key, REDACTED)
-        elif action == "pseudonymize":
-            if value is None or (isinstance(value, str) and value.strip() == ""):
-                out[col] = REDACTED
-            elif pseudonym_salt:
-                s = str(value)
-                out[col] = stable_pseudonym(
-                    pseudonym_salt,
-                    f"{table_name}.{col}",
-                    s,
-                    _column_to_field_kind(col),
-                )
-            else:
-                out[col] = REDACTED
-        elif action == "mask":
-            s = str(value) if value is not None else ""
-            if len(s) >= 4:
-                out[col] = "*" * (len(s) - 4) + s[-4:]
-            else:
-                out[col] = REDACTED
-        else:
-            out[col] = value
-
-    return out
+    return DbPolicy(policy_config, pseudonym_salt, placeholders, vault).apply_row(table_name, row)
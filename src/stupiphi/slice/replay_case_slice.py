@@ -12,7 +12,8 @@ from typing import Any, Dict, Iterable, List, Optional, Sequence
 
 from stupiphi.connectors.postgres import PostgresClient
 from stupiphi.sanitizer.pipeline import SanitizeResult
-from stupiphi.slice.apply_db_policy import apply_db_policy_to_row
+from stupiphi.slice.apply_db_policy import DbPolicy
+from stupiphi.transformation.pseudonym_vault import PseudonymVault
 
 
 SliceDict = Dict[str, Any]
@@ -68,6 +69,7 @@ def replay_case_slice(
     database_policy: Optional[Dict[str, Dict[str, str]]] = None,
     pseudonym_salt: Optional[str] = None,
     placeholders: Optional[Dict[str, str]] = None,
+    vault: Optional[PseudonymVault] = None,
 ) -> None:
     """Replay a sanitized case slice into dev_db.
 
@@ -79,6 +81,7 @@ def replay_case_slice(
     database_policy and pseudonym_salt: optional column-level policy for replay;
     if None, all columns are preserved (current behavior).
     placeholders: optional map for action "placeholder" (e.g. users.password_hash -> dev hash).
+    vault: optional PseudonymVault for pseudonymized columns (keeps pseudonyms from earlier runs).
     """
     ids = _extract_ids(original_slice)
     patient_id = ids["patient_id"]
@@ -88,6 +91,8 @@ def replay_case_slice(
     payments = original_slice.get("payments_rows", []) or []
 
     sanitized_by_appt = _map_sanitized_by_appointment_id(sanitized_outputs)
+    # Compiled once; each table's rows go through it as one batch.
+    policy = DbPolicy(database_policy, pseudonym_salt, placeholders=placeholders, vault=vault)
 
     if not sanitized_outputs:
         # Nothing to replay; no appointments for this case.
@@ -156,7 +161,7 @@ def replay_case_slice(
             "email": sanitized_patient.email,
             "address": sanitized_patient.address,
         }
-        patient_out = apply_db_policy_to_row("patients", patient_row, database_policy, pseudonym_salt, placeholders=placeholders)
+        patient_out = policy.apply_row("patients", patient_row)
         dev_client.execute(
             """
             INSERT INTO patients (id, first_name, last_name, dob, phone, email, address)
@@ -174,12 +179,8 @@ def replay_case_slice(
         )
 
         # Insert therapists (with database_policy if configured).
-        for t in therapists:
-            old_tid = t["id"]
-            new_tid = therapist_id_map.get(old_tid, old_tid)
-            t_row = dict(t)
-            t_row["id"] = new_tid
-            t_sanitized = apply_db_policy_to_row("therapists", t_row, database_policy, pseudonym_salt, placeholders=placeholders)
+        therapist_rows = [{**t, "id": therapist_id_map.get(t["id"], t["id"])} for t in therapists]
+        for t_sanitized in policy.apply_rows("therapists", therapist_rows):
             dev_client.execute(
                 """
                 INSERT INTO therapists (id, first_name, last_name, email)
@@ -197,7 +198,7 @@ def replay_case_slice(
         case_row_copy = dict(case_row)
         case_row_copy["id"] = new_case_id
         case_row_copy["patient_id"] = new_patient_id
-        case_sanitized = apply_db_policy_to_row("cases", case_row_copy, database_policy, pseudonym_salt, placeholders=placeholders)
+        case_sanitized = policy.apply_row("cases", case_row_copy)
         dev_client.execute(
             """
             INSERT INTO cases (id, patient_id, status, created_at)
@@ -212,14 +213,11 @@ def replay_case_slice(
         )
 
         # Insert payments (with database_policy if configured).
-        for p in payments:
-            old_pid = p["id"]
-            new_pid = payment_id_map.get(old_pid, old_pid)
-            p_row = dict(p)
-            p_row["id"] = new_pid
-            # patient_id in payments should point to the new patient ID.
-            p_row["patient_id"] = new_patient_id
-            p_sanitized = apply_db_policy_to_row("payments", p_row, database_policy, pseudonym_salt, placeholders=placeholders)
+        # patient_id in payments should point to the new patient ID.
+        payment_rows = [
+            {**p, "id": payment_id_map.get(p["id"], p["id"]), "patient_id": new_patient_id} for p in payments
+        ]
+        for p_sanitized in policy.apply_rows("payments", payment_rows):
             dev_client.execute(
                 """
                 INSERT INTO payments (id, patient_id, method, last4, created_at)
@@ -235,21 +233,21 @@ def replay_case_slice(
             )
 
         # Insert appointments: notes from sanitized record; full row through policy.
+        appt_rows: List[Dict[str, Any]] = []
         for appt in appointments:
             appt_id = appt["id"]
             sanitized = sanitized_by_appt.get(appt_id)
             notes = sanitized.record.encounter_notes if sanitized is not None else (appt.get("notes") or "")
-            new_appt_id = appointment_id_map.get(appt_id, appt_id)
-            new_case_ref = new_case_id
-            new_therapist_ref = therapist_id_map.get(appt["therapist_id"], appt["therapist_id"])
-            appt_row = {
-                "id": new_appt_id,
-                "case_id": new_case_ref,
-                "therapist_id": new_therapist_ref,
-                "scheduled_at": appt["scheduled_at"],
-                "notes": notes,
-            }
-            appt_out = apply_db_policy_to_row("appointments", appt_row, database_policy, pseudonym_salt, placeholders=placeholders)
+            appt_rows.append(
+                {
+                    "id": appointment_id_map.get(appt_id, appt_id),
+                    "case_id": new_case_id,
+                    "therapist_id": therapist_id_map.get(appt["therapist_id"], appt["therapist_id"]),
+                    "scheduled_at": appt["scheduled_at"],
+                    "notes": notes,
+                }
+            )
+        for appt_out in policy.apply_rows("appointments", appt_rows):
             dev_client.execute(
                 """
                 INSERT INTO appointments (id, case_id, therapist_id, scheduled_at, notes)
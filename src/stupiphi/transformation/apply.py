@@ -3,11 +3,10 @@ from __future__ import annotations
 from dataclasses import replace
 from typing import Optional, Tuple
 
-from faker import Faker
-
 from stupiphi.models.canonical_record import CanonicalRecord, PatientInfo
 from stupiphi.transformation.plan import TransformationPlan, PlanAction
-from stupiphi.transformation.pseudonymizer import stable_pseudonym
+from stupiphi.transformation.pseudonym_vault import PseudonymVault
+from stupiphi.transformation.pseudonymizer import stable_pseudonym, stable_pseudonyms
 
 
 REDACTION_TOKEN = "[REDACTED]"
@@ -15,60 +14,105 @@ REDACTION_TOKEN = "[REDACTED]"
 
 def _apply_span_redactions(text: str, actions: list[PlanAction]) -> str:
     """
-    Apply redactions to text using (start, end) spans.
-    Actions must be sorted descending by start.
+    Apply redactions to text using (start, end) spans, in one pass over the original text.
+    Actions may come in any order; overlapping spans collapse into a single token.
     """
-    out = text
-    for a in actions:
-        if a.action_type != "REDACT_TEXT_SPAN":
-            continue
-        if a.start is None or a.end is None:
+    spans = sorted(
+        (a.start, a.end)
+        for a in actions
+        if a.action_type == "REDACT_TEXT_SPAN" and a.start is not None and a.end is not None
+    )
+    if not spans:
+        return text
+
+    parts: list[str] = []
+    pos = 0
+    for start, end in spans:
+        if start < pos:
+            # Overlaps the previous redaction: extend it rather than emit another token.
+            pos = max(pos, end)
             continue
-        out = out[: a.start] + REDACTION_TOKEN + out[a.end :]
-    return out
+        parts.append(text[pos:start])
+        parts.append(REDACTION_TOKEN)
+        pos = end
+    parts.append(text[pos:])
+    return "".join(parts)
 
 
-def _fake_patient_info(fake: Faker, patient: PatientInfo) -> PatientInfo:
+def _fake_patient_info(seed: int, patient: PatientInfo) -> PatientInfo:
     """
-    Replace structured fields with synthetic values (per-call, no cross-record stability).
-    DOB is left as-is in MVP (optional: perturb later).
+    Replace structured fields with synthetic values keyed on seed alone (as with a freshly seeded
+    Faker): reproducible per run and independent of the original values, so no cross-record
+    stability. DOB is left as-is in MVP (optional: perturb later).
     """
+    key = f"faker_seed:{seed}"
     return PatientInfo(
-        first_name=fake.first_name(),
-        last_name=fake.last_name(),
+        first_name=stable_pseudonym(key, "patient.first_name", "", "first_name"),
+        last_name=stable_pseudonym(key, "patient.last_name", "", "last_name"),
         dob=patient.dob,  # optional later: shift date within range
-        phone=fake.phone_number(),
-        address=fake.address().replace("\n", ", "),
-        email=fake.email() if patient.email else None,
+        phone=stable_pseudonym(key, "patient.phone", "", "phone"),
+        address=stable_pseudonym(key, "patient.address", "", "address"),
+        email=stable_pseudonym(key, "patient.email", "", "email") if patient.email else None,
     )
 
 
-def _fake_patient_info_stable(salt: str, patient: PatientInfo) -> PatientInfo:
+def _fake_patient_info_stable(
+    salt: str, patient: PatientInfo, vault: Optional[PseudonymVault] = None
+) -> PatientInfo:
     """
     Replace structured fields with deterministic pseudonyms: same (salt, field, value) -> same output
-    across all records (cross-record consistency). DOB is left as-is.
+    across all records (cross-record consistency). DOB is left as-is. With a vault, all fields are
+    resolved in one lookup.
     """
+    items = [
+        ("patient.first_name", patient.first_name, "first_name"),
+        ("patient.last_name", patient.last_name, "last_name"),
+        ("patient.phone", patient.phone, "phone"),
+        ("patient.address", patient.address, "address"),
+    ]
+    if patient.email:
+        items.append(("patient.email", patient.email, "email"))
+    first_name, last_name, phone, address, *email = stable_pseudonyms(salt, items, vault)
     return PatientInfo(
-        first_name=stable_pseudonym(salt, "patient.first_name", patient.first_name, "first_name"),
-        last_name=stable_pseudonym(salt, "patient.last_name", patient.last_name, "last_name"),
+        first_name=first_name,
+        last_name=last_name,
         dob=patient.dob,
-        phone=stable_pseudonym(salt, "patient.phone", patient.phone, "phone"),
-        address=stable_pseudonym(salt, "patient.address", patient.address, "address"),
-        email=stable_pseudonym(salt, "patient.email", patient.email, "email") if patient.email else None,
+        phone=phone,
+        address=address,
+        email=email[0] if email else None,
     )
 
 
+def replace_patient(
+    patient: PatientInfo,
+    seed: int = 1337,
+    pseudonym_salt: Optional[str] = None,
+    vault: Optional[PseudonymVault] = None,
+) -> PatientInfo:
+    """
+    Synthetic replacement for the structured patient fields (see apply_plan). Depends only on
+    the patient and these settings, so records sharing a patient can share the result.
+    """
+    if pseudonym_salt is not None:
+        return _fake_patient_info_stable(pseudonym_salt, patient, vault)
+    return _fake_patient_info(seed, patient)
+
+
 def apply_plan(
     record: CanonicalRecord,
     plan: TransformationPlan,
     seed: int = 1337,
     pseudonym_salt: Optional[str] = None,
+    vault: Optional[PseudonymVault] = None,
+    patient: Optional[PatientInfo] = None,
 ) -> Tuple[CanonicalRecord, int]:
     """
     Apply plan to free-text fields + always fake structured patient fields.
 
-    When pseudonym_salt is set, same original value across records maps to the same pseudonym.
-    When None, uses Faker with seed only (no cross-record consistency).
+    When pseudonym_salt is set, same original value across records maps to the same pseudonym;
+    a vault additionally keeps pseudonyms issued in earlier runs.
+    When None, values are keyed on seed only (no cross-record consistency).
+    patient: replacement already computed with replace_patient (e.g. once per case).
 
     Returns: (sanitized_record, redaction_count)
     """
@@ -76,16 +120,12 @@ def apply_plan(
     encounter_actions = [a for a in plan.actions if a.field_path == "encounter_notes"]
     new_notes = _apply_span_redactions(record.encounter_notes, encounter_actions)
 
-    if pseudonym_salt is not None:
-        new_patient = _fake_patient_info_stable(pseudonym_salt, record.patient)
-    else:
-        fake = Faker("en_US")
-        fake.seed_instance(seed)
-        new_patient = _fake_patient_info(fake, record.patient)
+    if patient is None:
+        patient = replace_patient(record.patient, seed, pseudonym_salt, vault)
 
     sanitized = CanonicalRecord(
         record_id=record.record_id,
-        patient=new_patient,
+        patient=patient,
         encounter_notes=new_notes,
         metadata=record.metadata,
     )
@@ -35,25 +35,42 @@ class TransformationPlan:
 def build_conservative_plan(record_id: str, findings: List[Finding]) -> TransformationPlan:
     """
     Conservative MVP plan:
-    - For any finding in encounter_notes, redact that span.
+    - For any finding in encounter_notes, redact that span. Overlapping or adjacent spans
+      (e.g. an email the NER model also tagged ORG) are merged into one action.
     - Structured field changes are handled separately (always fake).
     """
-    actions: List[PlanAction] = []
-
-    for f in findings:
-        if f.field_path == "encounter_notes" and f.start is not None and f.end is not None:
-            actions.append(
-                PlanAction(
-                    action_type="REDACT_TEXT_SPAN",
-                    field_path="encounter_notes",
-                    start=f.start,
-                    end=f.end,
-                    reason=f"redact detected entity_type={f.entity_type} source={f.detector_source}",
-                    entity_type=str(f.entity_type),
-                )
-            )
-
-    # Sort spans descending so redactions don't shift indices
-    actions.sort(key=lambda a: (a.start or 0), reverse=True)
+    spans = sorted(
+        (f for f in findings if f.field_path == "encounter_notes" and f.start is not None and f.end is not None),
+        key=lambda f: (f.start, f.end),
+    )
+
+    # Sweep line: extend the current group while the next span starts at or before its end.
+    groups: List[List[Finding]] = []
+    group_end = -1
+    for f in spans:
+        if groups and f.start <= group_end:
+            groups[-1].append(f)
+            group_end = max(group_end, f.end)
+        else:
+            groups.append([f])
+            group_end = f.end
+
+    # Descending by start so redactions don't shift indices
+    actions = [_redact_action(group) for group in reversed(groups)]
 
     return TransformationPlan(record_id=record_id, actions=actions)
+
+
+def _redact_action(group: List[Finding]) -> PlanAction:
+    """One REDACT_TEXT_SPAN covering a group of overlapping findings (sorted by start)."""
+    top = max(group, key=lambda f: f.confidence)
+    types = ",".join(dict.fromkeys(str(f.entity_type) for f in group))
+    sources = ",".join(dict.fromkeys(f.detector_source for f in group))
+    return PlanAction(
+        action_type="REDACT_TEXT_SPAN",
+        field_path="encounter_notes",
+        start=group[0].start,
+        end=max(f.end for f in group),
+        reason=f"redact detected entity_type={types} source={sources}",
+        entity_type=str(top.entity_type),
+    )
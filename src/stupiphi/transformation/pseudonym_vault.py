@@ -0,0 +1,136 @@
+"""
+Persistent store of issued pseudonyms, keyed by the HMAC of (salt, field_path, value).
+
+Pseudonyms are recomputed deterministically anyway; the vault pins the ones already issued,
+so a transfer re-run maps a patient to the same names, phones and emails even after the
+vocabulary or generator changes. Two tiers: an in-memory LRU and an optional SQLite file.
+Only the key digest and the pseudonym are stored, never the original value.
+"""
+from __future__ import annotations
+
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, Mapping, Optional, Tuple, Union
+
+# SQLite's default limit on host parameters per statement is 999 on older builds.
+_SQL_CHUNK = 500
+
+
+class PseudonymVault:
+    """
+    Two-tier key -> pseudonym map with bulk lookup.
+
+    max_entries bounds the in-memory LRU. When path is set, every pseudonym is also kept in a
+    SQLite file there (never evicted: dropping one would let a re-run issue a different value).
+    Thread-safe.
+    """
+
+    def __init__(self, max_entries: int = 10_000, path: Optional[Union[str, Path]] = None) -> None:
+        if max_entries < 0:
+            raise ValueError("max_entries must be >= 0")
+        self.max_entries = max_entries
+        self.path = Path(path) if path else None
+        self._memory: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters: Dict[str, int] = {"hits": 0, "memory_hits": 0, "disk_hits": 0, "misses": 0, "puts": 0}
+        self._db: Optional[sqlite3.Connection] = None
+        if self.path is not None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS pseudonyms (key TEXT PRIMARY KEY, pseudonym TEXT NOT NULL)")
+            self._db.commit()
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, str]:
+        """Pseudonyms for the keys found in either tier (one SQLite query per 500 memory misses)."""
+        found: Dict[str, str] = {}
+        with self._lock:
+            missing = []
+            for key in dict.fromkeys(keys):
+                value = self._memory.get(key)
+                if value is None:
+                    missing.append(key)
+                    continue
+                self._memory.move_to_end(key)
+                found[key] = value
+            self._counters["memory_hits"] += len(found)
+            from_disk = self._disk_get(missing)
+            for key, value in from_disk.items():
+                self._remember(key, value)
+            found.update(from_disk)
+            self._counters["disk_hits"] += len(from_disk)
+            self._counters["hits"] += len(found)
+            self._counters["misses"] += len(missing) - len(from_disk)
+        return found
+
+    def put_many(self, items: Mapping[str, str]) -> None:
+        """Store key -> pseudonym pairs (keys get_many missed); a key already stored keeps its pseudonym."""
+        if not items:
+            return
+        with self._lock:
+            for key, value in items.items():
+                if key not in self._memory:
+                    self._remember(key, value)
+            self._counters["puts"] += len(items)
+            if self._db is not None:
+                self._db.executemany("INSERT OR IGNORE INTO pseudonyms (key, pseudonym) VALUES (?, ?)", items.items())
+                self._db.commit()
+
+    def stats(self) -> Dict[str, float]:
+        """Hit/miss counters, hit rate and sizes (no PHI)."""
+        with self._lock:
+            out: Dict[str, float] = dict(self._counters)
+            lookups = self._counters["hits"] + self._counters["misses"]
+            out["hit_rate"] = self._counters["hits"] / lookups if lookups else 0.0
+            out["entries"] = len(self._memory)
+            if self._db is not None:
+                out["disk_entries"] = int(self._db.execute("SELECT COUNT(*) FROM pseudonyms").fetchone()[0])
+            return out
+
+    def clear(self) -> None:
+        """Drop all pseudonyms from both tiers (counters are kept)."""
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM pseudonyms")
+                self._db.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def _remember(self, key: str, value: str) -> None:
+        if self.max_entries == 0:
+            return
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _disk_get(self, keys: list) -> Dict[str, str]:
+        if self._db is None or not keys:
+            return {}
+        found: Dict[str, str] = {}
+        for i in range(0, len(keys), _SQL_CHUNK):
+            chunk = keys[i : i + _SQL_CHUNK]
+            marks = ",".join("?" * len(chunk))
+            found.update(self._db.execute(f"SELECT key, pseudonym FROM pseudonyms WHERE key IN ({marks})", chunk))
+        return found
+
+
+_SHARED: Dict[Tuple[int, Optional[str]], PseudonymVault] = {}
+_SHARED_LOCK = threading.Lock()
+
+
+def shared_pseudonym_vault(max_entries: int = 10_000, path: Optional[Union[str, Path]] = None) -> PseudonymVault:
+    """Process-wide vault for these settings, so pipelines built per job share the in-memory tier."""
+    key = (max_entries, str(Path(path).resolve()) if path else None)
+    with _SHARED_LOCK:
+        vault = _SHARED.get(key)
+        if vault is None:
+            vault = PseudonymVault(max_entries=max_entries, path=path)
+            _SHARED[key] = vault
+        return vault
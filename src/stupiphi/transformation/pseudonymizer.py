@@ -1,19 +1,95 @@
 """
 Deterministic pseudonymization: same (salt, field_path, original_value) yields same replacement.
 Used for cross-record consistency when pseudonym_salt is set in config.
+
+Replacements are built from the precomputed tables in pseudonym_vocab, indexed by an
+HMAC-SHA256 of (field_path, value) keyed with the salt; no Faker instance is created per value.
+Emails use the reserved example.com/.org/.net domains so a pseudonym can never be a real inbox.
 """
 from __future__ import annotations
 
 import hashlib
-from typing import Optional
+import hmac
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Sequence, Tuple
+
+from stupiphi.transformation.pseudonym_vocab import (
+    CITY_PREFIXES,
+    CITY_SUFFIXES,
+    FIRST_NAMES,
+    LAST_NAMES,
+    STATES,
+    STREET_SUFFIXES,
+)
+
+if TYPE_CHECKING:
+    from stupiphi.transformation.pseudonym_vault import PseudonymVault
+
+_EMAIL_DOMAINS = ("example.com", "example.org", "example.net")
+_PHONE_FORMATS = (
+    "{0}-{1}-{2}",
+    "({0}){1}-{2}",
+    "({0}) {1}-{2}",
+    "{0}.{1}.{2}",
+    "+1-{0}-{1}-{2}",
+    "{0}{1}{2}",
+)
+
+
+def _digest(salt: str, field_path: str, value: str) -> bytes:
+    return hmac.digest(salt.encode("utf-8"), f"{field_path}:{value}".encode("utf-8"), hashlib.sha256)
+
+
+def _pick(table, digest: bytes, offset: int):
+    """Table entry chosen by the 4 digest bytes at offset (32 bytes give 8 independent picks)."""
+    return table[int.from_bytes(digest[offset : offset + 4], "big") % len(table)]
+
+
+def _first_name(d: bytes) -> str:
+    return _pick(FIRST_NAMES, d, 0)
+
+
+def _last_name(d: bytes) -> str:
+    return _pick(LAST_NAMES, d, 4)
 
-from faker import Faker
 
+def _phone(d: bytes) -> str:
+    # NANP shape: area code and exchange start with 2-9.
+    area = 200 + int.from_bytes(d[0:2], "big") % 800
+    exchange = 200 + int.from_bytes(d[2:4], "big") % 800
+    line = int.from_bytes(d[4:6], "big") % 10000
+    return _pick(_PHONE_FORMATS, d, 6).format(area, exchange, f"{line:04d}")
 
-def _stable_seed(salt: str, field_path: str, value: str) -> int:
-    """Derive an integer seed from salt + field_path + value for deterministic Faker."""
-    h = hashlib.sha256(f"{salt}:{field_path}:{value}".encode("utf-8")).hexdigest()
-    return int(h[:16], 16) % (2**31 - 1)
+
+def _address(d: bytes) -> str:
+    building = 1 + int.from_bytes(d[0:4], "big") % 99999
+    street_word = _pick(FIRST_NAMES, d, 4) if d[28] & 1 else _pick(LAST_NAMES, d, 4)
+    street = f"{street_word} {_pick(STREET_SUFFIXES, d, 8)}"
+    name = _pick(LAST_NAMES, d, 12)
+    city_format = d[29] % 3
+    if city_format == 0:
+        city = f"{_pick(CITY_PREFIXES, d, 16)} {name}"
+    elif city_format == 1:
+        city = f"{name}{_pick(CITY_SUFFIXES, d, 16)}"
+    else:
+        city = f"{_pick(CITY_PREFIXES, d, 16)} {name}{_pick(CITY_SUFFIXES, d, 20)}"
+    postcode = int.from_bytes(d[24:28], "big") % 100000
+    return f"{building} {street}, {city}, {STATES[d[30] % len(STATES)]} {postcode:05d}"
+
+
+def _email(d: bytes) -> str:
+    first = _pick(FIRST_NAMES, d, 0).lower()
+    last = _pick(LAST_NAMES, d, 4).lower()
+    number = int.from_bytes(d[8:10], "big") % 100
+    return f"{first}.{last}{number}@{_pick(_EMAIL_DOMAINS, d, 12)}"
+
+
+_GENERATORS: Dict[str, Callable[[bytes], str]] = {
+    "first_name": _first_name,
+    "last_name": _last_name,
+    "phone": _phone,
+    "address": _address,
+    "email": _email,
+}
 
 
 def stable_pseudonym(
@@ -27,19 +103,38 @@ def stable_pseudonym(
     Same (salt, field_path, original_value) always returns the same string.
     field_kind: "first_name" | "last_name" | "phone" | "address" | "email"
     """
-    seed = _stable_seed(salt, field_path, original_value)
-    fake = Faker("en_US")
-    fake.seed_instance(seed)
-    if field_kind == "first_name":
-        return fake.first_name()
-    if field_kind == "last_name":
-        return fake.last_name()
-    if field_kind == "phone":
-        return fake.phone_number()
-    if field_kind == "address":
-        return fake.address().replace("\n", ", ")
-    if field_kind == "email":
-        return fake.email()
+    return _pseudonym(salt, field_path, original_value, field_kind, _digest(salt, field_path, original_value))
+
+
+def stable_pseudonyms(
+    salt: str,
+    items: Sequence[Tuple[str, str, str]],
+    vault: Optional["PseudonymVault"] = None,
+) -> List[str]:
+    """
+    stable_pseudonym for many (field_path, original_value, field_kind) items at once. With a
+    vault, pseudonyms issued before are reused and new ones stored, in one lookup and one write.
+    """
+    if vault is None:
+        return [stable_pseudonym(salt, path, value, kind) for path, value, kind in items]
+    digests = [_digest(salt, path, value) for path, value, _ in items]
+    keys = [d.hex() for d in digests]
+    found = vault.get_many(keys)
+    issued: Dict[str, str] = {}
+    out: List[str] = []
+    for (path, value, kind), digest, key in zip(items, digests, keys):
+        pseudonym = found.get(key) or issued.get(key)
+        if pseudonym is None:
+            pseudonym = issued[key] = _pseudonym(salt, path, value, kind, digest)
+        out.append(pseudonym)
+    vault.put_many(issued)
+    return out
+
+
+def _pseudonym(salt: str, field_path: str, original_value: str, field_kind: str, digest: bytes) -> str:
+    generate = _GENERATORS.get(field_kind)
+    if generate is not None:
+        return generate(digest)
     # fallback: hash-based placeholder
     h = hashlib.sha256(f"{salt}:{field_path}:{original_value}:alt".encode("utf-8")).hexdigest()
     return f"x{h[:8]}"
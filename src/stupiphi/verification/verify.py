@@ -1,38 +1,35 @@
 from __future__ import annotations
 
 import re
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 
+from stupiphi.detection.patterns import EMAIL_RE, PHONE_RE, PatternScanner, default_scanner
 from stupiphi.models.canonical_record import CanonicalRecord
 
-EMAIL_RE = re.compile(r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}\b")
-PHONE_RE = re.compile(
-    r"""
-    \b
-    (?:\+?1[\s\-\.]?)?                   # optional country code
-    (?:\(?\d{3}\)?[\s\-\.]?)             # area code
-    \d{3}[\s\-\.]?\d{4}                  # local number
-    (?:\s*(?:x|ext\.?|extension)\s*\d+)? # optional extension
-    \b
-    """,
-    re.IGNORECASE | re.VERBOSE,
-)
+__all__ = ["EMAIL_RE", "PHONE_RE", "verify_basic"]
 
 
-
-def verify_basic(record: CanonicalRecord) -> Tuple[bool, List[str]]:
+def verify_basic(record: CanonicalRecord, scanner: Optional[PatternScanner] = None) -> Tuple[bool, List[str]]:
     """
     MVP verification checks. This is NOT a compliance guarantee.
     It's a safety baseline to catch obvious leakage.
+    scanner: rule scanner to use (e.g. the pipeline's re2 one); default is the shared scanner.
     """
     issues: List[str] = []
 
-    # Check free text for obvious patterns
-    if EMAIL_RE.search(record.encounter_notes):
-        issues.append("encounter_notes still contains an email-like pattern")
-
-    if PHONE_RE.search(record.encounter_notes):
-        issues.append("encounter_notes still contains a phone-like pattern")
+    # Check free text for obvious patterns (one scan for all rule patterns)
+    scanner = scanner if scanner is not None else default_scanner()
+    found = scanner.names_in(record.encounter_notes)
+    for p in scanner.patterns:
+        if p.name in found:
+            issues.append(f"encounter_notes still contains {_article(p.description)} {p.description} pattern")
 
     ok = len(issues) == 0
     return ok, issues
+
+
+def _article(description: str) -> str:
+    word = re.split(r"[\s-]", description, maxsplit=1)[0]
+    if len(word) > 1 and word.isupper():  # acronyms are read letter by letter: "an SSN", "a URL"
+        return "an" if word[0] in "AEFHILMNORSX" else "a"
+    return "an" if word[:1].lower() in "aeiou" else "a"
@@ -8,6 +8,8 @@ from __future__ import annotations
 import sys
 from pathlib import Path
 
+import pytest
+
 
 REPO_ROOT = Path(__file__).resolve().parents[1]
 SRC_DIR = REPO_ROOT / "src"
@@ -15,3 +17,48 @@ SRC_DIR = REPO_ROOT / "src"
 if str(SRC_DIR) not in sys.path:
     sys.path.insert(0, str(SRC_DIR))
 
+
+_TINY_NER_LABELS = ["O", "B-MISC", "I-MISC", "B-PER", "I-PER", "B-ORG", "I-ORG", "B-LOC", "I-LOC"]
+
+
+@pytest.fixture(scope="session")
+def tiny_ner_model_dir(tmp_path_factory) -> str:
+    """Build a tiny randomly-initialized BERT token classifier on disk.
+
+    Lets HF code paths (batching, chunking, backends) run offline without
+    downloading dslim/bert-base-NER. Outputs are meaningless but deterministic,
+    which is all parity tests need.
+    """
+    pytest.importorskip("transformers", reason="transformers needed to build tiny NER model")
+    torch = pytest.importorskip("torch", reason="torch needed to build tiny NER model")
+    import string
+
+    from transformers import BertConfig, BertForTokenClassification, BertTokenizerFast
+
+    model_dir = tmp_path_factory.mktemp("tiny_ner")
+    chars = string.ascii_letters + string.digits
+    vocab = (
+        ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"]
+        + list(chars + string.punctuation)
+        + ["##" + c for c in chars]
+        + ["patient", "reports", "call", "john", "smith", "follow", "up", "##s", "##ing"]
+    )
+    vocab_file = model_dir / "vocab.txt"
+    vocab_file.write_text("\n".join(vocab) + "\n", encoding="utf-8")
+    tokenizer = BertTokenizerFast(vocab_file=str(vocab_file), do_lower_case=False, model_max_length=64)
+
+    torch.manual_seed(0)
+    config = BertConfig(
+        vocab_size=len(vocab),
+        hidden_size=16,
+        num_hidden_layers=1,
+        num_attention_heads=2,
+        intermediate_size=32,
+        max_position_embeddings=64,
+        num_labels=len(_TINY_NER_LABELS),
+        id2label=dict(enumerate(_TINY_NER_LABELS)),
+        label2id={label: i for i, label in enumerate(_TINY_NER_LABELS)},
+    )
+    BertForTokenClassification(config).save_pretrained(str(model_dir))
+    tokenizer.save_pretrained(str(model_dir))
+    return str(model_dir)
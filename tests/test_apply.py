@@ -47,6 +47,29 @@ def test_apply_span_redactions_skips_non_span() -> None:
     assert out == "Hello world"
 
 
+def test_apply_span_redactions_overlapping_spans_collapse() -> None:
+    text = "Contact jane@acme.com today"
+    actions = [
+        PlanAction("REDACT_TEXT_SPAN", "encounter_notes", "r", start=8, end=21),
+        PlanAction("REDACT_TEXT_SPAN", "encounter_notes", "r", start=13, end=17),
+        PlanAction("REDACT_TEXT_SPAN", "encounter_notes", "r", start=18, end=27),
+    ]
+    out = _apply_span_redactions(text, actions)
+    assert out == "Contact [REDACTED]"
+
+
+def test_apply_span_redactions_many_spans_any_order() -> None:
+    words = [f"w{i:03d}" for i in range(300)]
+    text = " ".join(words)
+    actions = [
+        PlanAction("REDACT_TEXT_SPAN", "encounter_notes", "r", start=i * 5, end=i * 5 + 4)
+        for i in range(0, 300, 2)
+    ]
+    out = _apply_span_redactions(text, actions[::-1][::2] + actions[::-1][1::2])
+    expected = " ".join(REDACTION_TOKEN if i % 2 == 0 else w for i, w in enumerate(words))
+    assert out == expected
+
+
 def test_apply_plan_redacts_and_fakes() -> None:
     patient = PatientInfo(
         first_name="Jane",
@@ -105,3 +128,17 @@ def test_apply_plan_stable_pseudonym_same_value_same_output() -> None:
     assert out1.patient.email == out2.patient.email
     assert out1.patient.first_name != "Alice"
     assert out1.patient.last_name != "Smith"
+
+
+def test_apply_plan_without_salt_is_reproducible_per_seed() -> None:
+    patient = PatientInfo("Jane", "Doe", "1990-01-15", "555-111-2222", "123 Main St", None)
+    meta = Metadata(source="test", created_at="2024-01-01T00:00:00Z")
+    plan = TransformationPlan(record_id="any", actions=[])
+    rec = CanonicalRecord(record_id="r1", patient=patient, encounter_notes="", metadata=meta)
+
+    first, _ = apply_plan(rec, plan, seed=7)
+    again, _ = apply_plan(rec, plan, seed=7)
+    other_seed, _ = apply_plan(rec, plan, seed=8)
+    assert first.patient == again.patient
+    assert first.patient != other_seed.patient
+    assert first.patient.email is None
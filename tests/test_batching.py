@@ -0,0 +1,51 @@
+"""Tests for token-budget batch planning (length-bucketed scheduling)."""
+from __future__ import annotations
+
+import random
+
+import pytest
+
+from stupiphi.models.batching import padded_token_count, plan_token_budget_batches
+
+
+def test_plan_covers_every_index_once() -> None:
+    lengths = [5, 40, 3, 12, 40, 7, 1]
+    batches = plan_token_budget_batches(lengths, max_batch_tokens=50)
+    flat = sorted(i for b in batches for i in b)
+    assert flat == list(range(len(lengths)))
+
+
+def test_plan_respects_budget() -> None:
+    lengths = [5, 40, 3, 12, 40, 7, 1, 22, 9]
+    for b in plan_token_budget_batches(lengths, max_batch_tokens=50):
+        assert len(b) == 1 or len(b) * max(lengths[i] for i in b) <= 50
+
+
+def test_oversized_item_gets_own_batch() -> None:
+    batches = plan_token_budget_batches([10, 500, 10], max_batch_tokens=64)
+    assert [1] in batches
+
+
+def test_max_batch_size_caps_count() -> None:
+    batches = plan_token_budget_batches([2] * 10, max_batch_tokens=1000, max_batch_size=4)
+    assert [len(b) for b in batches] == [4, 4, 2]
+
+
+def test_bucketing_pads_less_than_fixed_size_batches() -> None:
+    rng = random.Random(0)
+    lengths = [rng.choice([8, 12, 16, 300, 480]) for _ in range(64)]
+    fixed = [list(range(i, i + 8)) for i in range(0, 64, 8)]
+    bucketed = plan_token_budget_batches(lengths, max_batch_tokens=8 * 512)
+    assert padded_token_count(lengths, bucketed) < padded_token_count(lengths, fixed) // 2
+
+
+def test_predict_batch_with_token_budget_matches_predict(tiny_ner_model_dir: str) -> None:
+    from stupiphi.models.hf_runner import HFTokenClassifier
+
+    clf = HFTokenClassifier(model_name=tiny_ner_model_dir, max_batch_tokens=40)
+    texts = ["Call John", "Patient John Smith reports a very long story about follow up care", "", "Smith"]
+    batched = clf.predict_batch(texts)
+    for text, ents in zip(texts, batched):
+        single = clf.predict(text)
+        assert [(e.label, e.start, e.end) for e in ents] == [(e.label, e.start, e.end) for e in single]
+        assert [e.score for e in ents] == pytest.approx([e.score for e in single], abs=1e-5)
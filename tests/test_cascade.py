@@ -0,0 +1,99 @@
+"""Tests for the detector cascade: NER gates, profiles and the profile comparison harness."""
+from __future__ import annotations
+
+from dataclasses import replace
+from typing import List, Sequence
+
+import pytest
+
+from stupiphi.detection.cascade import covered_spans, needs_ner, ner_segments
+from stupiphi.detection.hf_detector import HFDetector
+from stupiphi.evals.labeled_dataset import generate_labeled_records
+from stupiphi.evals.profiles import compare_profiles
+from stupiphi.models.hf_runner import HFEntity
+from stupiphi.sanitizer.pipeline import PipelineConfig, SanitizationPipeline
+
+
+class FakeClassifier:
+    """Tags every capitalized word as PER; records the texts it was asked about."""
+
+    def __init__(self) -> None:
+        self.texts: List[str] = []
+
+    def predict(self, text: str) -> List[HFEntity]:
+        self.texts.append(text)
+        entities: List[HFEntity] = []
+        pos = 0
+        for word in text.split(" "):
+            if word[:1].isupper():
+                entities.append(HFEntity(label="PER", start=pos, end=pos + len(word), score=0.9, text=word))
+            pos += len(word) + 1
+        return entities
+
+    def predict_batch(self, texts: Sequence[str], batch_size: int = 8) -> List[List[HFEntity]]:
+        return [self.predict(t) for t in texts]
+
+
+def _pipeline(cfg: PipelineConfig, classifier: FakeClassifier) -> SanitizationPipeline:
+    pipeline = SanitizationPipeline(cfg)
+    pipeline.hf = HFDetector(min_confidence=0.4, classifier=classifier)  # type: ignore[arg-type]
+    return pipeline
+
+
+def test_gates() -> None:
+    text = "called back. Reach Ann at 555-123-4567. all good."
+    assert needs_ner(text)
+    assert not needs_ner("pt stable, I will follow up; call 555-123-4567.")
+    assert not needs_ner("Email a@b.co", covered=[(0, 5), (6, 12)])
+    assert [text[s:e] for s, e in ner_segments(text)] == ["Reach Ann at 555-123-4567."]
+
+
+def test_profiles_gate_ner_and_keep_offsets() -> None:
+    records = [lr.record for lr in generate_labeled_records(count=6, seed=3, difficulty="hard")]
+    records.append(replace(records[0], record_id="lower", encounter_notes="no names here; call 555-123-4567."))
+    outputs = {}
+    for profile in ("thorough", "balanced", "fast"):
+        classifier = FakeClassifier()
+        pipeline = _pipeline(PipelineConfig(enable_hf=False, detector_profile=profile), classifier)
+        outputs[profile] = pipeline.sanitize_batch(records)
+        stats = pipeline.cascade_stats()
+        assert stats["notes"] == len(records)
+        if profile == "thorough":
+            assert stats["ner_notes"] == len(records) and stats["ner_chars"] == stats["chars"]
+        else:
+            assert "no names here; call 555-123-4567." not in classifier.texts
+            assert stats["ner_notes"] == len(records) - 1
+        if profile == "fast":
+            assert stats["ner_chars"] < stats["chars"]
+    # The fake model tags capitalized words, which every gate lets through: same output everywhere.
+    thorough = [r.record.encounter_notes for r in outputs["thorough"]]
+    assert [r.record.encounter_notes for r in outputs["balanced"]] == thorough
+    assert [r.record.encounter_notes for r in outputs["fast"]] == thorough
+    assert _pipeline(PipelineConfig(enable_hf=False), FakeClassifier()).detect_ensemble(records[0]) == (
+        _pipeline(PipelineConfig(enable_hf=False), FakeClassifier()).detect_ensemble_batch(records[:1])[0]
+    )
+
+
+def test_unknown_profile_rejected() -> None:
+    with pytest.raises(ValueError, match="profile"):
+        SanitizationPipeline(PipelineConfig(enable_hf=False, detector_profile="turbo"))
+
+
+def test_compare_profiles_reports_each_profile() -> None:
+    labeled = generate_labeled_records(count=12, seed=5, difficulty="easy")
+    evals = compare_profiles(
+        labeled, PipelineConfig(enable_hf=False), build=lambda cfg: _pipeline(cfg, FakeClassifier())
+    )
+    assert [e.profile for e in evals] == ["fast", "balanced", "thorough"]
+    for e in evals:
+        assert e.records_per_second > 0 and 0.0 < e.ner_char_share <= 1.0
+        assert e.result.total_labels == evals[0].result.total_labels
+    assert evals[2].ner_char_share == 1.0
+
+
+def test_covered_spans_skips_structured() -> None:
+    rule = SanitizationPipeline(PipelineConfig(enable_hf=False)).rules
+    assert rule is not None
+    records = generate_labeled_records(count=1, seed=1)
+    spans = covered_spans(rule.detect(records[0].record), None)
+    assert spans and all(s < e for s, e in spans)
@@ -18,6 +18,8 @@ from stupiphi.jobs.case_transfer import (
 )
 from stupiphi.models.canonical_record import CanonicalRecord, PatientInfo, Metadata
 from stupiphi.sanitizer.pipeline import SanitizeResult
+from stupiphi.transformation.pseudonym_vault import PseudonymVault
+from stupiphi.transformation.pseudonymizer import stable_pseudonyms
 
 
 class FakeClient:
@@ -144,6 +146,9 @@ ALLOWED_REPORT_KEYS = {
     "db_findings_count",
     "db_findings_by_table",
     "db_findings_by_column",
+    "ner_cache",
+    "rule_hits",
+    "pseudonym_vault",
 }
 
 
@@ -181,6 +186,51 @@ def test_report_out_writes_valid_json_no_sensitive_fields(
     assert data["replay_skip_reason"] == "dry_run"
 
 
+@patch("stupiphi.jobs.case_transfer.replay_case_slice")
+@patch("stupiphi.jobs.case_transfer.case_slice_to_canonical_records")
+@patch("stupiphi.jobs.case_transfer.extract_case_slice")
+@patch("stupiphi.jobs.case_transfer.get_dev_client")
+@patch("stupiphi.jobs.case_transfer.get_prod_client")
+def test_report_pseudonym_vault_stats_are_counts_only(
+    mock_prod: MagicMock,
+    mock_dev: MagicMock,
+    mock_extract: MagicMock,
+    mock_map: MagicMock,
+    mock_replay: MagicMock,
+    tmp_path: Path,
+) -> None:
+    report_path = tmp_path / "report.json"
+    vault = PseudonymVault(path=tmp_path / "vault.sqlite3")
+    mock_prod.return_value = FakeClient()
+    mock_dev.return_value = FakeClient()
+    mock_extract.return_value = _minimal_slice()
+    mock_map.return_value = [_one_record()]
+    phi = [("patient.first_name", "Jonathan", "first_name"), ("patient.email", "jon@clinic.org", "email")]
+    with patch("stupiphi.jobs.case_transfer.SanitizationPipeline") as MockPipeline, patch.dict(
+        "os.environ", {"STUPIPHI_ALLOW_PROD_TO_DEV": "true"}
+    ):
+        pseudonyms = stable_pseudonyms("salt", phi, vault)
+
+        def _sanitize_side_effect(rec, **kwargs):
+            stable_pseudonyms("salt", phi, vault)
+            return _sanitize_result(True)
+
+        MockPipeline.return_value.pseudonym_vault = vault
+        MockPipeline.return_value.sanitize_record.side_effect = _sanitize_side_effect
+
+        run_case_transfer(case_id=1, dry_run=True, report_out=str(report_path))
+
+    text = report_path.read_text(encoding="utf-8")
+    data = json.loads(text)
+    assert set(data.keys()) <= ALLOWED_REPORT_KEYS
+    stats = data["pseudonym_vault"]
+    assert stats["hits"] == 2 and stats["misses"] == 0 and stats["disk_entries"] == 2
+    assert all(isinstance(v, (int, float)) for v in stats.values())
+    for value in [v for _, v, _ in phi] + pseudonyms:
+        assert value not in text
+    assert "@" not in text
+
+
 # Forbidden substrings that could indicate PHI in audit JSONL (conservative)
 FORBIDDEN_AUDIT_SUBSTRINGS = [
     "Patient ",
@@ -212,7 +262,7 @@ def test_audit_sink_writes_jsonl_no_phi(
     ):
         result = _sanitize_result(True)
 
-        def _sanitize_side_effect(rec, audit_sink=None):
+        def _sanitize_side_effect(rec, audit_sink=None, **kwargs):
             if audit_sink is not None:
                 payload = {
                     "record_id": result.record.record_id,
@@ -264,3 +314,32 @@ def test_transfer_report_to_dict_serializable() -> None:
     assert d["case_id"] == 1
     out = json.dumps(d)
     assert "2024-01-01T00:00:00Z" in out
+
+
+@patch("stupiphi.jobs.case_transfer.replay_case_slice")
+@patch("stupiphi.jobs.case_transfer.case_slice_to_canonical_records")
+@patch("stupiphi.jobs.case_transfer.extract_case_slice")
+@patch("stupiphi.jobs.case_transfer.get_dev_client")
+@patch("stupiphi.jobs.case_transfer.get_prod_client")
+def test_report_rule_hits_count_only_this_run(
+    mock_prod: MagicMock,
+    mock_dev: MagicMock,
+    mock_extract: MagicMock,
+    mock_map: MagicMock,
+    mock_replay: MagicMock,
+) -> None:
+    from dataclasses import replace
+
+    from stupiphi.sanitizer.pipeline import PipelineConfig, SanitizationPipeline
+
+    record = replace(_one_record(), encounter_notes="Call 555-123-4567 or front.desk@clinic.org")
+    mock_prod.return_value = FakeClient()
+    mock_dev.return_value = FakeClient()
+    mock_extract.return_value = _minimal_slice()
+    mock_map.return_value = [record]
+    pipeline = SanitizationPipeline(PipelineConfig(enable_hf=False))
+    pipeline.sanitize_batch([record, record])  # another caller sharing the pipeline (e.g. the server)
+    with patch.dict("os.environ", {"STUPIPHI_ALLOW_PROD_TO_DEV": "true"}):
+        report = run_case_transfer(case_id=1, dry_run=True, pipeline=pipeline)
+
+    assert report.rule_hits == {"phone": 1, "email": 1}
@@ -0,0 +1,88 @@
+"""Tests for concurrent_detectors: HF on a worker thread, same findings and audit order."""
+from __future__ import annotations
+
+import threading
+from dataclasses import replace
+from typing import List, Sequence
+
+import pytest
+
+from stupiphi.detection.hf_detector import HFDetector
+from stupiphi.evals.labeled_dataset import generate_labeled_records
+from stupiphi.models.hf_runner import HFEntity
+from stupiphi.sanitizer.pipeline import PipelineConfig, SanitizationPipeline
+
+
+class FakeClassifier:
+    """Tags every capitalized word as PER; records which thread ran it."""
+
+    def __init__(self, wait_for: threading.Event | None = None) -> None:
+        self.threads: List[str] = []
+        self.wait_for = wait_for
+        self.overlapped = False
+
+    def predict(self, text: str) -> List[HFEntity]:
+        return self.predict_batch([text])[0]
+
+    def predict_batch(self, texts: Sequence[str], batch_size: int = 8) -> List[List[HFEntity]]:
+        self.threads.append(threading.current_thread().name)
+        if self.wait_for is not None:
+            # Only returns early if the cheap detectors finished while "the model" was running.
+            self.overlapped = self.wait_for.wait(timeout=5)
+            self.wait_for.clear()
+        out = []
+        for text in texts:
+            entities: List[HFEntity] = []
+            pos = 0
+            for word in text.split(" "):
+                if word[:1].isupper():
+                    entities.append(HFEntity(label="PER", start=pos, end=pos + len(word), score=0.9, text=word))
+                pos += len(word) + 1
+            out.append(entities)
+        return out
+
+
+def _pipeline(cfg: PipelineConfig, classifier: FakeClassifier) -> SanitizationPipeline:
+    pipeline = SanitizationPipeline(cfg)
+    pipeline.hf = HFDetector(min_confidence=0.4, classifier=classifier)  # type: ignore[arg-type]
+    return pipeline
+
+
+@pytest.mark.parametrize("profile", ["thorough", "balanced", "fast"])
+def test_concurrent_matches_sequential(profile: str) -> None:
+    records = [lr.record for lr in generate_labeled_records(count=37, seed=11, difficulty="hard")]
+    cfg = PipelineConfig(enable_hf=False, detector_profile=profile)
+    sequential_payloads: list = []
+    concurrent_payloads: list = []
+    expected = _pipeline(cfg, FakeClassifier()).sanitize_batch(
+        records, batch_size=8, audit_sink=sequential_payloads.append
+    )
+    classifier = FakeClassifier()
+    pipeline = _pipeline(replace(cfg, concurrent_detectors=True), classifier)
+    try:
+        assert pipeline.sanitize_batch(records, batch_size=8, audit_sink=concurrent_payloads.append) == expected
+        assert classifier.threads and all(name.startswith("stupiphi-hf") for name in classifier.threads)
+        assert pipeline.detect_ensemble(records[0]) == _pipeline(cfg, FakeClassifier()).detect_ensemble(records[0])
+    finally:
+        pipeline.close()
+    assert concurrent_payloads == sequential_payloads
+
+
+def test_hf_overlaps_cheap_detectors() -> None:
+    records = [lr.record for lr in generate_labeled_records(count=4, seed=2)]
+    cheap_done = threading.Event()
+    classifier = FakeClassifier(wait_for=cheap_done)
+    pipeline = _pipeline(PipelineConfig(enable_hf=False, concurrent_detectors=True), classifier)
+    detect_cheap = pipeline._detect_cheap
+
+    def signalling_detect_cheap(*args, **kwargs):
+        result = detect_cheap(*args, **kwargs)
+        cheap_done.set()
+        return result
+
+    pipeline._detect_cheap = signalling_detect_cheap  # type: ignore[method-assign]
+    try:
+        pipeline.detect_ensemble_batch(records)
+    finally:
+        pipeline.close()
+    assert classifier.overlapped
@@ -6,7 +6,6 @@ from pathlib import Path
 
 import pytest
 
-pytest.importorskip("transformers", reason="pipeline imports HF detector which needs transformers")
 pytest.importorskip("yaml", reason="PyYAML needed for config")
 
 from stupiphi.config.load import load_config
@@ -60,6 +59,49 @@ def test_load_config_enable_structured_and_pseudonym_salt() -> None:
         cfg = load_config(path)
         assert cfg.enable_structured is False
         assert cfg.pseudonym_salt == "my-secret-salt"
+        assert cfg.pseudonym_vault is False
+    finally:
+        Path(path).unlink(missing_ok=True)
+
+
+def test_load_config_pseudonym_vault() -> None:
+    with tempfile.NamedTemporaryFile(mode="w", suffix=".yaml", delete=False) as f:
+        f.write("pseudonym_salt: s\npseudonym_vault:\n  enabled: true\n  entries: 250\n")
+        path = f.name
+    try:
+        cfg = load_config(path)
+        assert cfg.pseudonym_vault is True
+        assert cfg.pseudonym_vault_entries == 250
+    finally:
+        Path(path).unlink(missing_ok=True)
+
+
+def test_load_config_hf_cache() -> None:
+    with tempfile.NamedTemporaryFile(mode="w", suffix=".yaml", delete=False) as f:
+        f.write("detectors:\n  hf:\n    cache:\n      entries: 500\n      disk: true\n      disk_entries: 2000\n")
+        path = f.name
+    try:
+        cfg = load_config(path)
+        assert cfg.hf_cache_entries == 500
+        assert cfg.hf_cache_disk is True
+        assert cfg.hf_cache_disk_entries == 2000
+    finally:
+        Path(path).unlink(missing_ok=True)
+
+
+def test_load_config_rule_backend_and_known_entities() -> None:
+    with tempfile.NamedTemporaryFile(mode="w", suffix=".yaml", delete=False) as f:
+        f.write(
+            "detectors:\n  rule:\n    backend: RE2\n    scan_budget_ms: 25\n"
+            "  known_entities:\n    enabled: false\n    hf_min_confidence: 0.8\n"
+        )
+        path = f.name
+    try:
+        cfg = load_config(path)
+        assert cfg.rule_backend == "re2"
+        assert cfg.rule_scan_budget_ms == 25.0
+        assert cfg.enable_known_entities is False
+        assert cfg.known_entities_hf_min_confidence == 0.8
     finally:
         Path(path).unlink(missing_ok=True)
 
@@ -122,6 +164,7 @@ def test_load_config_database_policy_placeholders() -> None:
 
 
 def test_pipeline_from_yaml() -> None:
+    pytest.importorskip("transformers", reason="builds the HF detector")
     with tempfile.NamedTemporaryFile(mode="w", suffix=".yaml", delete=False) as f:
         f.write("detectors:\n  hf:\n    enabled: true\n    min_confidence: 0.35\n  rule:\n    enabled: true\n  structured:\n    enabled: true\nfaker_seed: 100\n")
         path = f.name
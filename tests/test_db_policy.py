@@ -5,7 +5,8 @@ import copy
 
 import pytest
 
-from stupiphi.slice.apply_db_policy import apply_db_policy_to_row, REDACTED
+from stupiphi.slice.apply_db_policy import DbPolicy, apply_db_policy_to_row, REDACTED
+from stupiphi.transformation.pseudonym_vault import PseudonymVault
 
 
 def test_pseudonymize_stable_same_value_same_output() -> None:
@@ -142,3 +143,45 @@ def test_placeholder_none_map_redacted() -> None:
     row = {"id": 1, "password_hash": "$2b$12$secret"}
     out = apply_db_policy_to_row("users", row, policy, None, placeholders=None)
     assert out["password_hash"] == REDACTED
+
+
+POLICY = {
+    "payments": {"last4": "mask", "method": " Redact ", "card_holder": "pseudonymize", "token": "placeholder"},
+}
+
+
+def _payment_rows(n: int) -> list:
+    return [
+        {"id": i, "last4": f"4111{i:04d}", "method": "card", "card_holder": f"Holder {i % 3}", "token": "t"}
+        for i in range(n)
+    ]
+
+
+def test_db_policy_apply_rows_matches_per_row() -> None:
+    rows = _payment_rows(20) + [{"id": 99, "card_holder": None, "last4": "12"}]
+    placeholders = {"payments.token": "dev-token"}
+    policy = DbPolicy(POLICY, "s", placeholders=placeholders)
+    expected = [apply_db_policy_to_row("payments", r, POLICY, "s", placeholders=placeholders) for r in rows]
+    assert policy.apply_rows("payments", rows) == expected
+    assert [list(r) for r in policy.apply_rows("payments", rows)] == [list(r) for r in rows]
+    assert expected[0]["method"] == REDACTED and expected[0]["token"] == "dev-token"
+    assert expected[-1] == {"id": 99, "card_holder": REDACTED, "last4": REDACTED}
+
+
+def test_db_policy_pseudonymizes_distinct_values_once() -> None:
+    vault = PseudonymVault()
+    policy = DbPolicy(POLICY, "s", vault=vault)
+    out = policy.apply_rows("payments", _payment_rows(30))
+    assert vault.stats()["misses"] == 3  # "Holder 0", "Holder 1", "Holder 2"
+    assert len({r["card_holder"] for r in out}) == 3
+    assert out[0]["card_holder"] == out[3]["card_holder"]
+
+
+def test_db_policy_compiles_once_per_table_and_columns() -> None:
+    policy = DbPolicy(POLICY, None)
+    policy.apply_rows("payments", _payment_rows(5))
+    policy.apply_rows("payments", _payment_rows(5))
+    policy.apply_rows("payments", [{"id": 1, "last4": "1234"}])
+    policy.apply_rows("cases", [{"id": 1}])
+    assert len(policy._plans) == 3
+    assert policy.apply_rows("payments", []) == []
@@ -0,0 +1,88 @@
+"""Tests for the direct (no pipeline) backend and the vectorized span decoder."""
+from __future__ import annotations
+
+from typing import Any, Dict, List, Tuple
+
+import pytest
+
+np = pytest.importorskip("numpy", reason="span decoding uses numpy")
+
+from stupiphi.models.token_decoding import _get_tag, decode_simple_entities, softmax
+
+LABELS = {0: "O", 1: "B-PER", 2: "I-PER", 3: "B-LOC", 4: "I-LOC", 5: "MISC"}
+
+TEXTS = [
+    "Patient John Smith reports headache. Call 555-123-4567.",
+    "",
+    "follow up",
+    "Smith called; John follow ups",
+    "John Smith " * 30,  # longer than the tiny model's 64-token limit: truncated like the pipeline
+]
+
+
+def _reference_decode(text: str, logits: np.ndarray, offsets, skip, id2label) -> List[Dict[str, Any]]:
+    """Token-by-token grouping, written like transformers' simple aggregation."""
+    scores = softmax(logits.astype(np.float32))
+    groups: List[List[Tuple[str, Any, int, int]]] = []
+    current: List[Tuple[str, Any, int, int]] = []
+    for idx, label_id in enumerate(scores.argmax(axis=-1)):
+        if skip[idx]:
+            continue
+        label = id2label[int(label_id)]
+        token = (label, scores[idx, label_id], int(offsets[idx][0]), int(offsets[idx][1]))
+        if current:
+            bi, tag = _get_tag(label)
+            if tag == _get_tag(current[-1][0])[1] and bi != "B":
+                current.append(token)
+                continue
+            groups.append(current)
+        current = [token]
+    if current:
+        groups.append(current)
+    out = []
+    for group in groups:
+        entity_group = group[0][0].split("-", 1)[-1]
+        if entity_group == "O":
+            continue
+        start, end = group[0][2], group[-1][3]
+        out.append(
+            {
+                "entity_group": entity_group,
+                "score": np.mean(np.nanmean([t[1] for t in group])),
+                "word": text[start:end],
+                "start": start,
+                "end": end,
+            }
+        )
+    return out
+
+
+def test_vectorized_decode_matches_reference() -> None:
+    rng = np.random.default_rng(7)
+    for _ in range(50):
+        n = int(rng.integers(1, 40))
+        text = "x" * (2 * n)
+        logits = rng.normal(size=(n, len(LABELS))).astype(np.float32) * 3
+        offsets = [(2 * i, 2 * i + 1) for i in range(n)]
+        skip = rng.random(n) < 0.15
+        got = decode_simple_entities(text, logits, offsets, skip, LABELS)
+        assert got == _reference_decode(text, logits, offsets, skip, LABELS)
+
+
+def test_decode_all_skipped() -> None:
+    logits = np.zeros((3, len(LABELS)), dtype=np.float32)
+    assert decode_simple_entities("abc", logits, [(0, 1)] * 3, [1, 1, 1], LABELS) == []
+
+
+def test_direct_backend_matches_pipeline(tiny_ner_model_dir: str) -> None:
+    pytest.importorskip("transformers", reason="direct backend uses transformers models")
+    from stupiphi.models.hf_runner import HFTokenClassifier
+
+    pipe_clf = HFTokenClassifier(model_name=tiny_ner_model_dir)
+    direct_clf = HFTokenClassifier(model_name=tiny_ner_model_dir, backend="direct")
+
+    expected = [pipe_clf.predict(t) for t in TEXTS]
+    assert [direct_clf.predict(t) for t in TEXTS] == expected
+    assert direct_clf.predict_batch(TEXTS, batch_size=1) == expected
+    assert direct_clf.predict_batch(TEXTS, batch_size=4) == pipe_clf.predict_batch(TEXTS, batch_size=4)
+    assert direct_clf.memory_bytes() == pipe_clf.memory_bytes()
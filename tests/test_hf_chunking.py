@@ -0,0 +1,77 @@
+"""Tests for sliding-window inference on notes longer than the model context."""
+from __future__ import annotations
+
+import pytest
+
+from stupiphi.models.batching import plan_token_windows
+
+
+def test_windows_cover_and_owned_ranges_partition() -> None:
+    windows = plan_token_windows(100, window=40, overlap=10)
+    assert windows[0][0] == 0
+    assert windows[-1][1] == 100
+    owned = [(own_start, own_end) for _, _, own_start, own_end in windows]
+    assert owned[0][0] == 0 and owned[-1][1] == 100
+    for (_, prev_end), (next_start, _) in zip(owned, owned[1:]):
+        assert prev_end == next_start
+    for start, end, own_start, own_end in windows:
+        assert start <= own_start < own_end <= end
+        assert end - start <= 40
+
+
+def test_short_input_is_one_window() -> None:
+    assert plan_token_windows(12, window=40, overlap=10) == [(0, 12, 0, 12)]
+
+
+def test_invalid_overlap_raises() -> None:
+    with pytest.raises(ValueError):
+        plan_token_windows(100, window=10, overlap=10)
+
+
+def test_chunked_predict_covers_tail_of_long_note(tiny_ner_model_dir: str) -> None:
+    from stupiphi.models.hf_runner import HFTokenClassifier
+
+    # The tiny model's context is 64 tokens; this note is several times longer.
+    text = " ".join(["Patient John Smith reports follow up."] * 20)
+    plain = HFTokenClassifier(model_name=tiny_ner_model_dir)
+    chunked = HFTokenClassifier(model_name=tiny_ner_model_dir, chunk_tokens=32, chunk_overlap=8)
+
+    truncated_end = max(e.end for e in plain.predict(text))
+    entities = chunked.predict(text)
+
+    assert max(e.end for e in entities) > truncated_end
+    for e in entities:
+        assert e.text == text[e.start:e.end]
+    spans = sorted((e.start, e.end) for e in entities)
+    for (_, prev_end), (next_start, _) in zip(spans, spans[1:]):
+        assert prev_end <= next_start, "entities from overlapping windows must be de-duplicated"
+
+
+def test_chunking_leaves_short_notes_unchanged(tiny_ner_model_dir: str) -> None:
+    from stupiphi.models.hf_runner import HFTokenClassifier
+
+    plain = HFTokenClassifier(model_name=tiny_ner_model_dir)
+    chunked = HFTokenClassifier(model_name=tiny_ner_model_dir, chunk_tokens=32, chunk_overlap=8)
+    texts = ["Call John Smith", "", "Patient reports"]
+    assert chunked.predict_batch(texts) == plain.predict_batch(texts)
+
+
+class _FakeTokenizer:
+    model_max_length = 64
+
+    def num_special_tokens_to_add(self) -> int:
+        return 2
+
+
+class _FakePipe:
+    tokenizer = _FakeTokenizer()
+
+
+def test_window_larger_than_model_context_raises() -> None:
+    from stupiphi.models.hf_runner import HFTokenClassifier
+
+    with pytest.raises(ValueError, match="chunk_tokens <= 62"):
+        HFTokenClassifier(pipe=_FakePipe(), chunk_tokens=64, chunk_overlap=8)
+    classifier = HFTokenClassifier(pipe=_FakePipe(), chunk_tokens=62, chunk_overlap=8)
+    with pytest.raises(ValueError, match="exceeds the model's 64-token context"):
+        classifier.with_options(chunk_tokens=63, chunk_overlap=8)
@@ -0,0 +1,98 @@
+"""Tests for the case-scoped known-entity scanner and its use in the pipeline."""
+from __future__ import annotations
+
+from dataclasses import replace
+from datetime import date
+
+from stupiphi.detection.detector_base import Finding
+from stupiphi.detection.known_entities import (
+    KnownEntity,
+    KnownEntityScanner,
+    known_entities_from_slice,
+    phone_variants,
+)
+from stupiphi.models.canonical_record import CanonicalRecord, Metadata, PatientInfo
+from stupiphi.sanitizer.pipeline import PipelineConfig, SanitizationPipeline
+
+
+def _slice():
+    return {
+        "patient_row": {
+            "first_name": "Ann",
+            "last_name": "Lee",
+            "dob": date(1990, 1, 2),
+            "phone": "+1 555 123 4567",
+            "address": "12 Elm St",
+            "email": "ann.lee@example.com",
+        },
+        "therapist_rows": [{"first_name": "Omar", "last_name": "Diaz", "email": "odiaz@clinic.example"}],
+    }
+
+
+def _spans(text: str, scanner: KnownEntityScanner):
+    return [(m.entity_type, text[m.start : m.end]) for m in scanner.scan(text)]
+
+
+def test_entities_from_slice() -> None:
+    entities = known_entities_from_slice(_slice())
+    assert KnownEntity("Ann Lee", "NAME") in entities
+    assert KnownEntity("Ann", "NAME", capitalized=True) in entities
+    assert KnownEntity("Diaz, Omar", "NAME") in entities
+    assert KnownEntity("odiaz@clinic.example", "EMAIL") in entities
+    assert KnownEntity("1990-01-02", "DOB") in entities
+    assert KnownEntity("(555) 123-4567", "PHONE") in entities
+    assert phone_variants("n/a") == ["n/a"]
+
+
+def test_scan_is_case_and_whitespace_insensitive_on_word_boundaries() -> None:
+    scanner = KnownEntityScanner.from_case_slice(_slice())
+    text = "Annual review. ANN\n  lee called 555.123.4567 and saw Dr. Diaz; email Ann.Lee@Example.com"
+    assert _spans(text, scanner) == [
+        ("NAME", "ANN\n  lee"),
+        ("PHONE", "555.123.4567"),
+        ("NAME", "Diaz"),
+        ("EMAIL", "Ann.Lee@Example.com"),
+    ]
+
+
+def test_lone_names_match_only_when_capitalized() -> None:
+    slice_dict = {"patient_row": {"first_name": "May", "last_name": "Will"}}
+    scanner = KnownEntityScanner.from_case_slice(slice_dict)
+    text = "May called; it may rain. WILL signed but will not return. Seen: may will"
+    # The full name matches in any case; the lone names only where capitalized.
+    assert _spans(text, scanner) == [("NAME", "May"), ("NAME", "WILL"), ("NAME", "may will")]
+
+
+def test_scan_prefers_leftmost_longest() -> None:
+    scanner = KnownEntityScanner([KnownEntity("Lee", "NAME"), KnownEntity("Lee Street", "ADDRESS")])
+    assert _spans("lee street, Lee", scanner) == [("ADDRESS", "lee street"), ("NAME", "Lee")]
+    assert KnownEntityScanner([KnownEntity("A", "NAME")]).scan("A note") == []
+
+
+def test_pipeline_uses_known_entities() -> None:
+    record = CanonicalRecord(
+        record_id="case:1:appt:1",
+        patient=PatientInfo(first_name="Ann", last_name="Lee", dob="1990-01-02", phone="", address=""),
+        encounter_notes="Ann Lee reached at ann.lee@example.com",
+        metadata=Metadata(source="test", created_at="2024-01-01T00:00:00Z"),
+    )
+    scanner = KnownEntityScanner.from_case_slice(_slice())
+    pipeline = SanitizationPipeline(PipelineConfig(enable_hf=False, known_entities_hf_min_confidence=0.8))
+
+    findings = pipeline.detect_ensemble(record, known_entities=scanner)
+    notes = [(f.detector_source, f.entity_type) for f in findings if f.field_path == "encounter_notes"]
+    # The rule email match lies inside the known email and is dropped as a duplicate.
+    assert sorted(notes) == [("known", "EMAIL"), ("known", "NAME")]
+    result = pipeline.sanitize_record(record, known_entities=scanner)
+    assert result.record.encounter_notes == "[REDACTED] reached at [REDACTED]"
+    assert pipeline.sanitize_batch([record], known_entities=scanner)[0] == result
+
+    weak = Finding("encounter_notes", "NAME", 0.5, "huggingface", start=0, end=3, text="Ann")
+    known = pipeline.detect_ensemble(record, known_entities=scanner)
+    known = [f for f in known if f.detector_source == "known"]
+    assert pipeline._combine_findings([weak], [], known, [], known_supplied=True).count(weak) == 0
+    # The threshold holds for every note of a case, including notes with no known identifier.
+    assert pipeline._combine_findings([weak], [], [], [], known_supplied=True) == []
+    assert pipeline._combine_findings([weak], [], [], []) == [weak]
+    off = SanitizationPipeline(replace(pipeline.cfg, enable_known_entities=False))
+    assert all(f.detector_source != "known" for f in off.detect_ensemble(record, known_entities=scanner))
@@ -0,0 +1,37 @@
+"""Import-time regression tests: the HF stack (transformers/torch) loads only when an HF detector is built."""
+from __future__ import annotations
+
+import subprocess
+import sys
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parents[1] / "src"
+
+
+def _loaded_heavy_modules(code: str) -> str:
+    """Run code in a fresh interpreter and return which heavy modules ended up imported."""
+    script = (
+        f"import sys; sys.path.insert(0, {str(SRC_DIR)!r})\n"
+        f"{code}\n"
+        "print(','.join(sorted(m for m in ('torch', 'transformers', 'psycopg') if m in sys.modules)))"
+    )
+    out = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True)
+    return out.stdout.strip().splitlines()[-1] if out.stdout.strip() else ""
+
+
+def test_import_package_does_not_load_hf_stack() -> None:
+    assert _loaded_heavy_modules("import stupiphi") == ""
+
+
+def test_cli_import_does_not_load_hf_stack_or_postgres() -> None:
+    assert _loaded_heavy_modules("import stupiphi.cli") == ""
+
+
+def test_rule_only_sanitize_does_not_load_hf_stack() -> None:
+    code = (
+        "from stupiphi import PipelineConfig, SanitizationPipeline\n"
+        "from stupiphi.ingestion.synthetic_generator import generate_records\n"
+        "pipeline = SanitizationPipeline(PipelineConfig(enable_hf=False))\n"
+        "pipeline.sanitize_batch(generate_records(count=3, seed=1))"
+    )
+    assert _loaded_heavy_modules(code) == ""
@@ -0,0 +1,71 @@
+"""Tests for the re2 rule backend: translation, parity with re, and the scan budget."""
+from __future__ import annotations
+
+import re
+
+import pytest
+
+from stupiphi.detection.linear_regex import to_re2_syntax
+from stupiphi.detection.patterns import PHONE_RE, PatternScanner, RulePattern, registered_patterns
+from stupiphi.evals.labeled_dataset import generate_labeled_records
+from stupiphi.evals.regex_corpus import worst_case_notes
+
+
+def test_translation_strips_verbose_and_widens_classes() -> None:
+    translated = to_re2_syntax(PHONE_RE)
+    assert "#" not in translated and "\n" not in translated and " " not in translated
+    assert r"\d" not in translated and r"\p{Nd}" in translated
+    assert to_re2_syntax(re.compile(r"[\s\-][]a]\\d")) == r"[\t-\r\x1c-\x20\x85\p{Z}\-][]a]\\d"
+
+
+@pytest.mark.parametrize("source", [r"a(?=b)", r"(?<!x)a", r"(a)\1", r"(?P<n>a)(?P=n)", r"[\S]"])
+def test_translation_rejects_non_linear_constructs(source: str) -> None:
+    with pytest.raises(ValueError):
+        to_re2_syntax(re.compile(source))
+
+
+def test_re2_backend_matches_re() -> None:
+    pytest.importorskip("re2", reason="google-re2 not installed")
+    py, linear = PatternScanner(registered_patterns()), PatternScanner(registered_patterns(), backend="re2")
+    texts = [lr.record.encounter_notes for lr in generate_labeled_records(count=200, seed=4, difficulty="hard")]
+    texts += list(worst_case_notes(size=300).values())
+    texts += ["Ring +1 (555) 123-4567 ext 89", "a@b.co and 555 123 4567"] 
+    for text in texts:
+        assert linear.scan(text) == py.scan(text)
+        assert linear.names_in(text) == py.names_in(text)
+    assert linear.scan_batch(texts) == py.scan_batch(texts)
+
+
+def test_re2_word_boundary_is_ascii_only() -> None:
+    # The one documented difference: RE2's \b does not see non-ASCII digits/letters as word characters.
+    pytest.importorskip("re2", reason="google-re2 not installed")
+    text = "\u0661\u0662\u0663-456-7890"
+    assert PatternScanner(registered_patterns()).scan(text)
+    assert PatternScanner(registered_patterns(), backend="re2").scan(text) == []
+
+
+def test_budget_counts_overruns_and_finishes_the_note() -> None:
+    slow = RulePattern(name="slow", entity_type="UNKNOWN", regex=re.compile(r"(?:a|a)*b"), description="slow")
+    fast = RulePattern(name="digit", entity_type="UNKNOWN", regex=re.compile(r"\d"), description="digit")
+    scanner = PatternScanner([fast, slow], scan_budget_ms=0.0)
+    text = "1 2 3 " + "a" * 18 + "c"
+    matches = scanner.scan(text)
+    assert [text[m.start:m.end] for m in matches] == ["1", "2", "3"]
+    assert scanner.stats()["budget_exceeded"] == 1
+
+    unbudgeted = PatternScanner([fast])
+    assert unbudgeted.scan(text) == PatternScanner([fast], scan_budget_ms=1000.0).scan(text)
+    assert unbudgeted.stats()["budget_exceeded"] == 0
+
+
+def test_unknown_backend_rejected() -> None:
+    with pytest.raises(ValueError):
+        PatternScanner(registered_patterns(), backend="pcre")
+
+
+def test_pipeline_accepts_rule_backend_and_budget() -> None:
+    from stupiphi.sanitizer.pipeline import PipelineConfig, SanitizationPipeline
+
+    pipeline = SanitizationPipeline(PipelineConfig(enable_hf=False, rule_scan_budget_ms=50.0))
+    assert pipeline.rule_scanner is not None and pipeline.rule_scanner.scan_budget_ms == 50.0
+    assert SanitizationPipeline(PipelineConfig(enable_hf=False)).rule_scanner is None
@@ -0,0 +1,44 @@
+"""Unit tests for evaluation metrics and the accuracy gate."""
+from __future__ import annotations
+
+from stupiphi.evals.metrics import EvalResult, passes_accuracy_gate
+
+
+def _result(fn_by_type: dict, total_by_type: dict) -> EvalResult:
+    total = sum(total_by_type.values())
+    fn = sum(fn_by_type.values())
+    return EvalResult(
+        total_labels=total,
+        false_negatives=fn,
+        false_negative_rate=fn / total if total else 0.0,
+        by_type_total=dict(total_by_type),
+        by_type_fn=dict(fn_by_type),
+    )
+
+
+TOTALS = {"NAME": 100, "PHONE": 100, "EMAIL": 100}
+
+
+def test_gate_passes_when_candidate_no_worse() -> None:
+    base = _result({"NAME": 5}, TOTALS)
+    cand = _result({"NAME": 5}, TOTALS)
+    assert passes_accuracy_gate(base, cand) is True
+
+
+def test_gate_fails_on_overall_regression() -> None:
+    base = _result({"NAME": 5}, TOTALS)
+    cand = _result({"NAME": 9}, TOTALS)
+    assert passes_accuracy_gate(base, cand) is False
+
+
+def test_gate_fails_on_per_type_regression_hidden_overall() -> None:
+    # Same overall FN count, but PHONE now leaks: the per-type check must catch it.
+    base = _result({"NAME": 4}, TOTALS)
+    cand = _result({"NAME": 2, "PHONE": 2}, TOTALS)
+    assert passes_accuracy_gate(base, cand) is False
+
+
+def test_gate_tolerance() -> None:
+    base = _result({"NAME": 5}, TOTALS)
+    cand = _result({"NAME": 6}, TOTALS)
+    assert passes_accuracy_gate(base, cand, max_fn_rate_increase=0.02) is True
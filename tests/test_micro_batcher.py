@@ -0,0 +1,106 @@
+"""Tests for MicroBatchingClassifier: coalescing, flush triggers and result routing."""
+from __future__ import annotations
+
+import threading
+import time
+from typing import List, Sequence
+
+import pytest
+
+from stupiphi.models.hf_runner import HFEntity
+from stupiphi.models.micro_batcher import MicroBatchingClassifier
+
+
+class RecordingClassifier:
+    """Tags each text with one entity spanning it; records the batches it was called with."""
+
+    model_name = "fake/model"
+
+    def __init__(self, fail_on: str = "") -> None:
+        self.batches: List[List[str]] = []
+        self.fail_on = fail_on
+
+    def predict_batch(self, texts: Sequence[str], batch_size: int = 8) -> List[List[HFEntity]]:
+        self.batches.append(list(texts))
+        if self.fail_on and any(self.fail_on in t for t in texts):
+            raise RuntimeError("model failed")
+        return [[HFEntity(label="PER", start=0, end=len(t), score=0.9, text=t)] for t in texts]
+
+
+def _call_concurrently(batcher: MicroBatchingClassifier, texts: List[str]) -> List[object]:
+    results: List[object] = [None] * len(texts)
+    barrier = threading.Barrier(len(texts))
+
+    def call(i: int) -> None:
+        barrier.wait()
+        try:
+            results[i] = batcher.predict(texts[i])
+        except Exception as exc:  # noqa: BLE001 - surfaced to the assertions
+            results[i] = exc
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(len(texts))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+def test_concurrent_calls_are_coalesced_and_routed() -> None:
+    inner = RecordingClassifier()
+    batcher = MicroBatchingClassifier(inner, max_batch_size=8, max_wait_ms=200)  # type: ignore[arg-type]
+    texts = [f"Note {i}" for i in range(8)]
+
+    results = _call_concurrently(batcher, texts)
+    batcher.close()
+
+    assert [r[0].text for r in results] == texts  # type: ignore[index]
+    assert len(inner.batches) < len(texts)
+    assert sorted(t for b in inner.batches for t in b) == sorted(texts)
+    stats = batcher.stats()
+    assert stats.requests == 8
+    assert stats.batches == len(inner.batches)
+    assert stats.max_batch_size <= 8
+
+
+def test_flushes_on_size_limit() -> None:
+    inner = RecordingClassifier()
+    batcher = MicroBatchingClassifier(inner, max_batch_size=2, max_wait_ms=10_000)  # type: ignore[arg-type]
+    started = time.monotonic()
+    _call_concurrently(batcher, ["a", "b", "c", "d"])
+    batcher.close()
+    assert time.monotonic() - started < 5
+    assert all(len(b) <= 2 for b in inner.batches)
+
+
+def test_lone_request_waits_at_most_the_window() -> None:
+    inner = RecordingClassifier()
+    batcher = MicroBatchingClassifier(inner, max_batch_size=64, max_wait_ms=20)  # type: ignore[arg-type]
+    started = time.monotonic()
+    assert batcher.predict("Solo")[0].text == "Solo"
+    assert time.monotonic() - started < 2
+    assert batcher.predict("   ") == []
+    assert inner.batches == [["Solo"]]
+    batcher.close()
+
+
+def test_errors_reach_every_caller_in_the_batch() -> None:
+    inner = RecordingClassifier(fail_on="bad")
+    batcher = MicroBatchingClassifier(inner, max_batch_size=2, max_wait_ms=200)  # type: ignore[arg-type]
+    results = _call_concurrently(batcher, ["bad", "good"])
+    batcher.close()
+    failed = [r for r in results if isinstance(r, RuntimeError)]
+    assert failed
+    if len(inner.batches) == 1:
+        assert len(failed) == 2
+
+
+def test_delegates_attributes_and_batches() -> None:
+    inner = RecordingClassifier()
+    batcher = MicroBatchingClassifier(inner)  # type: ignore[arg-type]
+    assert batcher.model_name == "fake/model"
+    assert len(batcher.predict_batch(["x", "y"])) == 2
+    assert inner.batches == [["x", "y"]]
+    batcher.close()
+    with pytest.raises(RuntimeError):
+        batcher.predict("late")
@@ -0,0 +1,84 @@
+"""Tests for the process-wide model registry (shared loading, options variants, eviction, stats)."""
+from __future__ import annotations
+
+import threading
+
+import pytest
+
+pytest.importorskip("transformers", reason="model registry loads HF classifiers")
+
+from stupiphi.models import hf_runner
+from stupiphi.models.registry import ModelRegistry
+
+
+def test_get_returns_shared_classifier(tiny_ner_model_dir: str) -> None:
+    registry = ModelRegistry()
+    first = registry.get(model_name=tiny_ner_model_dir)
+    second = registry.get(model_name=tiny_ner_model_dir)
+    assert first is second
+
+    chunked = registry.get(model_name=tiny_ner_model_dir, chunk_tokens=32, chunk_overlap=8)
+    assert chunked is not first
+    assert chunked.chunk_tokens == 32
+    assert chunked._pipe is first._pipe
+    assert chunked._lock is first._lock
+
+    stats = registry.stats()
+    assert stats.resident_models == 1
+    assert stats.loads == 1
+    assert stats.hits == 3
+    assert stats.memory_bytes > 0
+    assert stats.models[0]["variants"] == 2
+
+
+def test_evict_drops_model(tiny_ner_model_dir: str) -> None:
+    registry = ModelRegistry()
+    first = registry.get(model_name=tiny_ner_model_dir)
+    assert registry.evict(model_name="some/other-model") == 0
+    assert registry.evict(model_name=tiny_ner_model_dir) == 1
+    assert registry.stats().resident_models == 0
+
+    reloaded = registry.get(model_name=tiny_ner_model_dir)
+    assert reloaded is not first
+    stats = registry.stats()
+    assert stats.loads == 2
+    assert stats.evictions == 1
+
+
+def test_concurrent_get_loads_once(tiny_ner_model_dir: str, monkeypatch: pytest.MonkeyPatch) -> None:
+    calls = []
+    real_load = hf_runner._load_backend
+
+    def counting_load(*args, **kwargs):
+        calls.append(args)
+        return real_load(*args, **kwargs)
+
+    monkeypatch.setattr(hf_runner, "_load_backend", counting_load)
+    registry = ModelRegistry()
+    got = []
+    threads = [
+        threading.Thread(target=lambda: got.append(registry.get(model_name=tiny_ner_model_dir)))
+        for _ in range(4)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert all(clf is got[0] for clf in got)
+
+
+def test_warm_up_runs_inference(tiny_ner_model_dir: str) -> None:
+    registry = ModelRegistry()
+    registry.warm_up(model_name=tiny_ner_model_dir, texts=["Patient John Smith"])
+    assert registry.stats().resident_models == 1
+
+
+def test_pipelines_share_one_model(tiny_ner_model_dir: str) -> None:
+    from stupiphi.sanitizer.pipeline import PipelineConfig, SanitizationPipeline
+
+    first = SanitizationPipeline(PipelineConfig(hf_model_name=tiny_ner_model_dir))
+    second = SanitizationPipeline(PipelineConfig(hf_model_name=tiny_ner_model_dir, hf_chunk_tokens=32, hf_chunk_overlap=8))
+    assert first.hf is not None and second.hf is not None
+    assert first.hf.classifier._pipe is second.hf.classifier._pipe
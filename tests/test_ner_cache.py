@@ -0,0 +1,158 @@
+"""Tests for the NER result cache (LRU + SQLite tiers) and HFDetector's use of it."""
+from __future__ import annotations
+
+import sqlite3
+import threading
+from typing import List, Sequence
+
+from stupiphi.detection.detector_base import DetectionCounts
+from stupiphi.detection.hf_detector import HFDetector
+from stupiphi.detection.ner_cache import NERCache
+from stupiphi.models.canonical_record import CanonicalRecord, Metadata, PatientInfo
+from stupiphi.models.hf_runner import HFEntity
+
+NOTE = "Patient John Smith called about his refill."
+
+
+class CountingClassifier:
+    """Tags 'John Smith' as PER; counts how many texts went through inference."""
+
+    model_name = "fake/ner"
+    backend = "torch"
+
+    def __init__(self) -> None:
+        self.seen: List[str] = []
+
+    def predict(self, text: str) -> List[HFEntity]:
+        self.seen.append(text)
+        start = text.find("John Smith")
+        if start < 0:
+            return []
+        return [HFEntity(label="PER", start=start, end=start + 10, score=0.97, text="John Smith")]
+
+    def predict_batch(self, texts: Sequence[str], batch_size: int = 8) -> List[List[HFEntity]]:
+        return [self.predict(t) for t in texts]
+
+
+def _record(notes: str, record_id: str = "r1") -> CanonicalRecord:
+    return CanonicalRecord(
+        record_id=record_id,
+        patient=PatientInfo(
+            first_name="A", last_name="B", dob="2000-01-01", phone="", email="", address=""
+        ),
+        encounter_notes=notes,
+        metadata=Metadata(source="test", created_at="2024-01-01T00:00:00Z"),
+    )
+
+
+def test_memory_hit_skips_inference() -> None:
+    classifier = CountingClassifier()
+    detector = HFDetector(classifier=classifier, cache=NERCache(max_entries=10))  # type: ignore[arg-type]
+
+    first = detector.detect(_record(NOTE))
+    second = detector.detect(_record(NOTE, record_id="r2"))
+
+    assert first == second
+    assert classifier.seen == [NOTE]
+    stats = detector.cache.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 1 and stats["entries"] == 1
+
+
+def test_batch_only_runs_misses() -> None:
+    classifier = CountingClassifier()
+    detector = HFDetector(classifier=classifier, cache=NERCache())  # type: ignore[arg-type]
+    detector.detect(_record(NOTE))
+
+    other = "Follow up in two weeks."
+    results = detector.detect_batch([_record(NOTE), _record(other), _record(NOTE)])
+
+    assert classifier.seen == [NOTE, other]
+    assert [len(r) for r in results] == [1, 0, 1]
+    assert results[0][0].text == "John Smith"
+
+
+def test_lru_evicts_least_recently_used() -> None:
+    cache = NERCache(max_entries=2)
+    for k in ("a", "b"):
+        cache.put(k, [])
+    assert cache.get("a", "") == []  # a is now most recent
+    cache.put("c", [])
+    assert cache.get("b", "") is None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_disk_tier_survives_new_cache_and_stores_no_text(tmp_path) -> None:
+    path = tmp_path / "ner_cache.sqlite3"
+    classifier = CountingClassifier()
+    HFDetector(classifier=classifier, cache=NERCache(path=path)).detect(_record(NOTE))  # type: ignore[arg-type]
+
+    reopened = NERCache(path=path)
+    findings = HFDetector(classifier=classifier, cache=reopened).detect(_record(NOTE))  # type: ignore[arg-type]
+
+    assert classifier.seen == [NOTE]
+    assert findings[0].text == "John Smith"
+    assert reopened.stats()["disk_hits"] == 1
+
+    rows = sqlite3.connect(str(path)).execute("SELECT key, entities FROM ner_cache").fetchall()
+    assert all("John" not in key and "John" not in entities for key, entities in rows)
+
+
+def test_disk_entries_bounded(tmp_path) -> None:
+    cache = NERCache(max_entries=0, path=tmp_path / "c.sqlite3", max_disk_entries=2)
+    for k in ("a", "b", "c"):
+        cache.put(k, [])
+    stats = cache.stats()
+    assert stats["disk_entries"] == 2
+    assert stats["disk_evictions"] == 1
+
+
+def test_key_depends_on_model_identity() -> None:
+    assert NERCache.key("model-a", NOTE) != NERCache.key("model-b", NOTE)
+    assert NERCache.key("model-a", NOTE) == NERCache.key("model-a", NOTE)
+
+
+def test_sentence_memo_only_runs_unseen_sentences() -> None:
+    classifier = CountingClassifier()
+    detector = HFDetector(classifier=classifier, sentence_memo=NERCache())  # type: ignore[arg-type]
+    notes = [
+        "Patient reports headache. John Smith called back. Follow-up scheduled.",
+        "Patient reports nausea. John Smith called back. Follow-up scheduled.",
+        "Patient reports headache. Follow-up scheduled.",
+    ]
+
+    results = detector.detect_batch([_record(n, record_id=str(i)) for i, n in enumerate(notes)])
+
+    assert classifier.seen == [
+        "Patient reports headache.",
+        "John Smith called back.",
+        "Follow-up scheduled.",
+        "Patient reports nausea.",
+    ]
+    for note, findings in zip(notes, results):
+        for f in findings:
+            assert note[f.start : f.end] == f.text == "John Smith"
+    assert [len(r) for r in results] == [1, 1, 0]
+
+    detector.detect(_record(notes[0]))
+    assert len(classifier.seen) == 4
+    assert detector.sentence_memo.stats()["hits"] == 3
+
+
+def test_per_call_counts_exclude_other_callers() -> None:
+    detector = HFDetector(classifier=CountingClassifier(), cache=NERCache())  # type: ignore[arg-type]
+    detector.detect(_record(NOTE))
+    jobs = {name: DetectionCounts() for name in ("a", "b")}
+
+    def job(name: str, repeats: int) -> None:
+        for _ in range(repeats):
+            detector.detect(_record(NOTE), counts=jobs[name])
+
+    threads = [threading.Thread(target=job, args=("a", 50)), threading.Thread(target=job, args=("b", 20))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert jobs["a"].ner_cache == {"hits": 50, "memory_hits": 50}
+    assert jobs["b"].ner_cache == {"hits": 20, "memory_hits": 20}
+    assert detector.cache.stats()["hits"] == 70
@@ -0,0 +1,73 @@
+"""Tests for the ONNX Runtime backend: output parity with the torch pipeline and export caching."""
+from __future__ import annotations
+
+import pytest
+
+pytest.importorskip("onnxruntime", reason="onnxruntime needed for the onnx backend")
+pytest.importorskip("onnx", reason="onnx needed to export the model")
+
+from stupiphi.models.hf_runner import HFTokenClassifier
+from stupiphi.models.onnx_backend import _atomic_write, export_onnx_model
+
+TEXTS = [
+    "Patient John Smith reports headache. Call 555-123-4567.",
+    "",
+    "follow up",
+    "Smith called; John follow ups",
+]
+
+
+def _key(entities):
+    return [(e.label, e.start, e.end, e.text) for e in entities]
+
+
+def test_onnx_matches_torch(tiny_ner_model_dir: str, tmp_path) -> None:
+    torch_clf = HFTokenClassifier(model_name=tiny_ner_model_dir)
+    onnx_clf = HFTokenClassifier(model_name=tiny_ner_model_dir, backend="onnx", cache_dir=str(tmp_path))
+
+    for text in TEXTS:
+        expected = torch_clf.predict(text)
+        got = onnx_clf.predict(text)
+        assert _key(got) == _key(expected)
+        assert [e.score for e in got] == pytest.approx([e.score for e in expected], abs=1e-4)
+
+    batched = onnx_clf.predict_batch(TEXTS, batch_size=3)
+    assert [_key(ents) for ents in batched] == [_key(torch_clf.predict(t)) for t in TEXTS]
+
+
+def test_export_is_cached(tiny_ner_model_dir: str, tmp_path) -> None:
+    first = export_onnx_model(tiny_ner_model_dir, cache_dir=tmp_path)
+    mtime = first.stat().st_mtime_ns
+    second = export_onnx_model(tiny_ner_model_dir, cache_dir=tmp_path)
+    assert second == first
+    assert second.stat().st_mtime_ns == mtime
+
+
+def test_unknown_backend_raises(tiny_ner_model_dir: str) -> None:
+    with pytest.raises(ValueError):
+        HFTokenClassifier(model_name=tiny_ner_model_dir, backend="tensorrt")
+
+
+def test_quantized_onnx_graph_is_cached_separately(tiny_ner_model_dir: str, tmp_path) -> None:
+    clf = HFTokenClassifier(
+        model_name=tiny_ner_model_dir, backend="onnx", cache_dir=str(tmp_path), quantized=True
+    )
+    assert clf._pipe.model_path.name == "model.int8.onnx"
+    assert clf._pipe.model_path.with_name("model.onnx").is_file()
+    for ents in clf.predict_batch(TEXTS):
+        for e in ents:
+            assert 0.0 <= e.score <= 1.0
+
+
+def test_concurrent_writers_use_separate_temp_files(tmp_path) -> None:
+    target = tmp_path / "model.onnx"
+    with _atomic_write(target) as first, _atomic_write(target) as second:
+        assert first != second and first.parent == second.parent == tmp_path
+        first.write_text("first")
+        second.write_text("second")
+    assert target.read_text() == "first"  # the outer writer renamed last
+    with pytest.raises(RuntimeError), _atomic_write(target) as tmp:
+        tmp.write_text("partial")
+        raise RuntimeError("export failed")
+    assert target.read_text() == "first"
+    assert [p.name for p in tmp_path.iterdir()] == ["model.onnx"]
@@ -0,0 +1,156 @@
+"""Tests for ParallelSanitizer: parity with the single-process pipeline, ordering and crash recovery."""
+from __future__ import annotations
+
+import multiprocessing
+import os
+import sys
+import threading
+import types
+from pathlib import Path
+from typing import List, Sequence
+
+import pytest
+
+from stupiphi.detection.hf_detector import HFDetector
+from stupiphi.evals.labeled_dataset import generate_labeled_records
+from stupiphi.models.hf_runner import HFEntity
+from stupiphi.sanitizer import parallel as parallel_module
+from stupiphi.sanitizer.parallel import ParallelSanitizer
+from stupiphi.sanitizer.pipeline import PipelineConfig, SanitizationPipeline
+
+pytestmark = pytest.mark.skipif(
+    "fork" not in multiprocessing.get_all_start_methods(), reason="workers inherit the pipeline via fork"
+)
+
+
+class CrashOnceClassifier:
+    """Tags capitalized words as PER; the first worker to see a note with 'CRASH' exits hard."""
+
+    def __init__(self, marker: Path) -> None:
+        self.marker = marker
+
+    def predict(self, text: str) -> List[HFEntity]:
+        if "CRASH" in text and not self.marker.exists():
+            self.marker.touch()
+            os._exit(1)
+        entities: List[HFEntity] = []
+        pos = 0
+        for word in text.split(" "):
+            if word[:1].isupper():
+                entities.append(HFEntity(label="PER", start=pos, end=pos + len(word), score=0.9, text=word))
+            pos += len(word) + 1
+        return entities
+
+    def predict_batch(self, texts: Sequence[str], batch_size: int = 8) -> List[List[HFEntity]]:
+        return [self.predict(t) for t in texts]
+
+
+class RaisingClassifier:
+    def predict(self, text: str) -> List[HFEntity]:
+        raise ValueError("model failed")
+
+    def predict_batch(self, texts: Sequence[str], batch_size: int = 8) -> List[List[HFEntity]]:
+        raise ValueError("model failed")
+
+
+def _records(count: int = 11):
+    return [lr.record for lr in generate_labeled_records(count=count, seed=3, difficulty="hard")]
+
+
+@pytest.mark.parametrize("salt", [None, "salt-1"])
+def test_matches_single_process(salt) -> None:
+    cfg = PipelineConfig(enable_hf=False, faker_seed=7, pseudonym_salt=salt)
+    records = _records()
+    expected_payloads: list = []
+    expected = SanitizationPipeline(cfg).sanitize_batch(records, batch_size=3, audit_sink=expected_payloads.append)
+
+    payloads: list = []
+    with ParallelSanitizer(cfg, workers=2, chunk_size=3) as parallel:
+        got = parallel.sanitize_batch(records, audit_sink=payloads.append)
+
+    assert got == expected
+    assert payloads == expected_payloads
+
+
+def test_unordered_yields_every_record() -> None:
+    cfg = PipelineConfig(enable_hf=False)
+    records = _records()
+    with ParallelSanitizer(cfg, workers=3, chunk_size=2) as parallel:
+        got = list(parallel.imap(records, ordered=False))
+    expected = {r.record.record_id: r for r in SanitizationPipeline(cfg).sanitize_batch(records)}
+    assert sorted(r.record.record_id for r in got) == sorted(expected)
+    assert all(r == expected[r.record.record_id] for r in got)
+
+
+def test_worker_crash_is_restarted(tmp_path: Path) -> None:
+    cfg = PipelineConfig(enable_hf=False)
+    pipeline = SanitizationPipeline(cfg)
+    pipeline.hf = HFDetector(classifier=CrashOnceClassifier(tmp_path / "crashed"))  # type: ignore[arg-type]
+    records = _records()
+    crash_at = 5
+    records[crash_at] = records[crash_at].__class__(
+        record_id=records[crash_at].record_id,
+        patient=records[crash_at].patient,
+        encounter_notes=records[crash_at].encounter_notes + " CRASH",
+        metadata=records[crash_at].metadata,
+    )
+
+    with ParallelSanitizer(cfg, workers=2, chunk_size=2, pipeline=pipeline) as parallel:
+        got = parallel.sanitize_batch(records)
+        assert parallel.restarts >= 1
+
+    assert (tmp_path / "crashed").exists()
+    assert got == pipeline.sanitize_batch(records, batch_size=2)
+
+
+def test_shares_preloaded_hf_model(tiny_ner_model_dir: str) -> None:
+    cfg = PipelineConfig(hf_model_name=tiny_ner_model_dir, hf_min_confidence=0.0)
+    pipeline = SanitizationPipeline(cfg)
+    records = _records(6)
+    with ParallelSanitizer(cfg, workers=2, chunk_size=2, torch_threads=1, pipeline=pipeline) as parallel:
+        got = parallel.sanitize_batch(records)
+    assert got == pipeline.sanitize_batch(records, batch_size=2)
+
+
+def test_worker_exception_closes_pool() -> None:
+    cfg = PipelineConfig(enable_hf=False)
+    pipeline = SanitizationPipeline(cfg)
+    pipeline.hf = HFDetector(classifier=RaisingClassifier())  # type: ignore[arg-type]
+    parallel = ParallelSanitizer(cfg, workers=2, chunk_size=2, pipeline=pipeline)
+    with pytest.raises(ValueError, match="model failed"):
+        parallel.sanitize_batch(_records())
+    assert parallel._pool is None
+
+
+def test_does_not_fork_while_other_threads_run() -> None:
+    cfg = PipelineConfig(enable_hf=False)
+    records = _records(5)
+    stop = threading.Event()
+    thread = threading.Thread(target=stop.wait)
+    thread.start()
+    try:
+        with ParallelSanitizer(cfg, workers=2, chunk_size=2) as parallel:
+            assert parallel.start_method() != "fork"
+            with pytest.warns(RuntimeWarning, match="not forked"):
+                got = parallel.sanitize_batch(records)
+    finally:
+        stop.set()
+        thread.join()
+    assert got == SanitizationPipeline(cfg).sanitize_batch(records, batch_size=2)
+
+
+def test_worker_sets_torch_threads_after_building_pipeline(monkeypatch) -> None:
+    fake_torch = types.SimpleNamespace(threads=None)
+    fake_torch.set_num_threads = lambda n: setattr(fake_torch, "threads", n)
+
+    def build(cfg):  # a spawned worker imports torch while loading the model
+        monkeypatch.setitem(sys.modules, "torch", fake_torch)
+        return "pipeline"
+
+    monkeypatch.delitem(sys.modules, "torch", raising=False)
+    monkeypatch.setattr(parallel_module, "SanitizationPipeline", build)
+    monkeypatch.setattr(parallel_module, "_WORKER_PIPELINE", None)
+    parallel_module._init_worker(PipelineConfig(), 2, None)
+
+    assert parallel_module._WORKER_PIPELINE == "pipeline"
+    assert fake_torch.threads == 2
@@ -0,0 +1,59 @@
+"""Tests for per-case reuse of structured patient findings and replacements (PatientMemo)."""
+from __future__ import annotations
+
+from dataclasses import replace
+from typing import List
+
+import pytest
+
+from stupiphi.models.canonical_record import CanonicalRecord, Metadata, PatientInfo
+from stupiphi.sanitizer.pipeline import PatientMemo, PipelineConfig, SanitizationPipeline
+
+PATIENT = PatientInfo("Jane", "Doe", "1990-01-15", "555-111-2222", "1 Main St", "jane@x.org")
+OTHER = PatientInfo("Omar", "Reyes", "1980-03-02", "555-333-4444", "9 Elm Ave", None)
+
+
+def _records(patients: List[PatientInfo]) -> List[CanonicalRecord]:
+    meta = Metadata(source="test", created_at="2024-01-01T00:00:00Z")
+    return [
+        CanonicalRecord(
+            record_id=f"case:1:appt:{i}",
+            patient=p,
+            encounter_notes=f"Session {i}. Call 555-987-6543 or mail care{i}@clinic.org.",
+            metadata=meta,
+        )
+        for i, p in enumerate(patients)
+    ]
+
+
+@pytest.mark.parametrize("salt", [None, "case-salt"])
+def test_memo_gives_same_results_and_audit_payloads(salt) -> None:
+    pipeline = SanitizationPipeline(PipelineConfig(enable_hf=False, pseudonym_salt=salt))
+    records = _records([PATIENT, PATIENT, OTHER, PATIENT])
+
+    plain_payloads: list = []
+    memo_payloads: list = []
+    expected = [pipeline.sanitize_record(r, audit_sink=plain_payloads.append) for r in records]
+    memo = PatientMemo()
+    got = [pipeline.sanitize_record(r, audit_sink=memo_payloads.append, patient_memo=memo) for r in records]
+
+    assert got == expected
+    assert memo_payloads == plain_payloads
+    assert pipeline.sanitize_batch(records, batch_size=3) == expected
+    # Each record's audit still counts its own structured findings.
+    for result in got:
+        assert result.audit_event.finding_counts["NAME"] == 2
+        assert "structured" in result.audit_event.detector_sources
+
+
+def test_memo_computes_once_per_distinct_patient() -> None:
+    pipeline = SanitizationPipeline(PipelineConfig(enable_hf=False, pseudonym_salt="s"))
+    records = _records([PATIENT] * 50 + [OTHER] * 10 + [replace(PATIENT, phone="555-000-0000")])
+    memo = PatientMemo()
+    results = pipeline.sanitize_batch(records, batch_size=16, patient_memo=memo)
+
+    # structured findings + replacement for each of the 3 distinct patients
+    assert memo.computed == 6
+    assert memo.reused == 2 * len(records) - 6
+    assert len({r.record.patient for r in results[:50]}) == 1
+    assert results[-1].record.patient.phone != results[0].record.patient.phone
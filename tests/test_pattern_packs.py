@@ -0,0 +1,113 @@
+"""Tests for rule pattern packs: built-in packs, YAML pack files, prefilters and counters."""
+from __future__ import annotations
+
+import re
+from pathlib import Path
+
+import pytest
+
+from stupiphi.detection.pattern_packs import BUILTIN_PACKS, load_pattern_file, load_rule_packs
+from stupiphi.detection.patterns import PatternScanner, RulePattern, registered_patterns
+from stupiphi.evals.labeled_dataset import generate_labeled_records
+from stupiphi.models.canonical_record import CanonicalRecord, Metadata, PatientInfo
+from stupiphi.sanitizer.pipeline import PipelineConfig, SanitizationPipeline
+from stupiphi.verification.verify import verify_basic
+
+ALL_PACKS = tuple(BUILTIN_PACKS)
+
+
+def _found(text: str, scanner: PatternScanner):
+    return [(m.name, text[m.start : m.end]) for m in scanner.scan(text)]
+
+
+def test_builtin_packs_match_expected_spans() -> None:
+    scanner = PatternScanner(registered_patterns() + load_rule_packs(ALL_PACKS))
+    text = (
+        "SSN 123-45-6789, MRN: A1234567, member ID XZ-99812; seen 03/14/2024 and March 3rd, 2024 "
+        "(follow-up 2024-04-01). See https://portal.example.org/p?id=7. Lives in Austin, TX 78701-1234. "
+        "Call 555-123-4567."
+    )
+    assert _found(text, scanner) == [
+        ("ssn", "123-45-6789"),
+        ("mrn", "MRN: A1234567"),
+        ("member_id", "member ID XZ-99812"),
+        ("date_numeric", "03/14/2024"),
+        ("date_text", "March 3rd, 2024"),
+        ("date_numeric", "2024-04-01"),
+        ("url", "https://portal.example.org/p?id=7"),
+        ("zip", "TX 78701-1234"),
+        ("phone", "555-123-4567"),
+    ]
+    assert _found("member number verified; may visit", scanner) == []
+
+
+def test_prefilters_do_not_change_results() -> None:
+    packs = load_rule_packs(ALL_PACKS)
+    unfiltered = [RulePattern(p.name, p.entity_type, p.regex, p.description, p.guard) for p in packs]
+    filtered = PatternScanner(registered_patterns() + packs)
+    plain = PatternScanner(registered_patterns() + unfiltered)
+    texts = [lr.record.encounter_notes for lr in generate_labeled_records(count=150, seed=8, difficulty="hard")]
+    texts += ["MRN 55512", "see www.example.com today", "Dec 1, 2023 no dashes", "", "ssn 123-45-6789"]
+    assert filtered.scan_batch(texts) == plain.scan_batch(texts) == [plain.scan(t) for t in texts]
+    assert [filtered.names_in(t) for t in texts] == [plain.names_in(t) for t in texts]
+
+
+def test_counters_and_profile() -> None:
+    scanner = PatternScanner(registered_patterns() + load_rule_packs(["identifiers"]))
+    scanner.scan("ssn 123-45-6789")
+    scanner.scan_batch(["no digits here", "a@b.co"])
+    stats = scanner.pattern_stats()
+    assert stats["ssn"] == {"hits": 1, "prefilter_skips": 2}
+    assert stats["email"]["hits"] == 1
+    assert stats["mrn"]["prefilter_skips"] == 3
+    assert scanner.stats()["texts"] == 3
+    assert set(scanner.profile(["ssn 123-45-6789"])) == {p.name for p in scanner.patterns}
+
+
+def test_pack_file(tmp_path: Path) -> None:
+    path = tmp_path / "site.yaml"
+    path.write_text(
+        "patterns:\n"
+        "  - name: employee_id\n"
+        "    entity_type: id\n"
+        "    regex: '\\bEMP-\\d{6}\\b'\n"
+        "    flags: [ignorecase]\n"
+        "    prefilter: [EMP-]\n",
+        encoding="utf-8",
+    )
+    (pattern,) = load_pattern_file(path)
+    assert pattern.entity_type == "ID" and pattern.description == "employee_id-like"
+    assert pattern.regex.flags & re.IGNORECASE
+    scanner = PatternScanner(registered_patterns() + [pattern])
+    assert _found("badge emp-123456", scanner) == [("employee_id", "emp-123456")]
+
+    path.write_text("patterns:\n  - name: bad\n    entity_type: NOPE\n    regex: x\n", encoding="utf-8")
+    with pytest.raises(ValueError, match="entity_type"):
+        load_pattern_file(path)
+    with pytest.raises(ValueError, match="Unknown rule pack"):
+        load_rule_packs(["nope"])
+
+
+def test_pipeline_redacts_and_verifies_pack_entities() -> None:
+    record = CanonicalRecord(
+        record_id="r1",
+        patient=PatientInfo(first_name="A", last_name="B", dob="1990-01-01", phone="", address=""),
+        encounter_notes="SSN 123-45-6789 on file.",
+        metadata=Metadata(source="test", created_at="2024-01-01T00:00:00Z"),
+    )
+    pipeline = SanitizationPipeline(PipelineConfig(enable_hf=False, rule_packs=("identifiers",)))
+    result = pipeline.sanitize_record(record)
+    assert result.record.encounter_notes == "SSN [REDACTED] on file."
+    assert result.verification_ok
+    assert pipeline.rule_scanner is not None and pipeline.rule_scanner.pattern_stats()["ssn"]["hits"] == 1
+    assert verify_basic(record, scanner=pipeline.rule_scanner) == (
+        False,
+        ["encounter_notes still contains an SSN-like pattern"],
+    )
+
+
+def test_builtin_packs_run_on_re2() -> None:
+    pytest.importorskip("re2", reason="google-re2 not installed")
+    patterns = registered_patterns() + load_rule_packs(ALL_PACKS)
+    text = "SSN 123-45-6789, seen 03/14/2024, www.example.com, TX 78701, MRN 123456"
+    assert PatternScanner(patterns, backend="re2").scan(text) == PatternScanner(patterns).scan(text)
@@ -0,0 +1,156 @@
+"""Tests for the shared multi-pattern scanner and pattern registry."""
+from __future__ import annotations
+
+import re
+import threading
+
+import pytest
+
+from stupiphi.detection.patterns import (
+    EMAIL_RE,
+    PHONE_RE,
+    PatternScanner,
+    RulePattern,
+    default_scanner,
+    register_pattern,
+    unregister_pattern,
+)
+from stupiphi.detection.rule_detector import RuleBasedDetector
+from stupiphi.evals.labeled_dataset import generate_labeled_records
+from stupiphi.verification.verify import verify_basic
+
+
+def _per_pattern(text: str):
+    spans = [("email", m.start(), m.end()) for m in EMAIL_RE.finditer(text)]
+    spans += [("phone", m.start(), m.end()) for m in PHONE_RE.finditer(text)]
+    return sorted(spans, key=lambda s: s[1])
+
+
+def test_single_pass_matches_per_pattern_scans() -> None:
+    scanner = default_scanner()
+    for lr in generate_labeled_records(count=50, seed=5, difficulty="hard"):
+        text = lr.record.encounter_notes
+        assert [(m.name, m.start, m.end) for m in scanner.scan(text)] == _per_pattern(text)
+
+
+def test_overlapping_patterns_are_all_reported() -> None:
+    scanner = default_scanner()
+    for text in (
+        "Reach 5551234567@clinic.org today",
+        "Reach me at (555) 123-4567@example.com today",
+        "mail 5551234567@foo.org",
+    ):
+        assert [(m.name, m.start, m.end) for m in scanner.scan(text)] == _per_pattern(text)
+        assert [(m.name, m.start, m.end) for m in scanner.scan_batch(["x", text])[1]] == _per_pattern(text)
+    text = "Reach me at (555) 123-4567@example.com today"
+    assert [(m.entity_type, text[m.start:m.end]) for m in scanner.scan(text)] == [
+        ("PHONE", "555) 123-4567"),
+        ("EMAIL", "123-4567@example.com"),
+    ]
+
+
+def test_overlapping_email_and_phone_fully_redacted() -> None:
+    from stupiphi.sanitizer.pipeline import PipelineConfig, SanitizationPipeline
+    from tests.test_verify import _record
+
+    record = _record("Reach me at (555) 123-4567@example.com today")
+    assert sorted(f.entity_type for f in RuleBasedDetector().detect(record)) == ["EMAIL", "PHONE"]
+    result = SanitizationPipeline(PipelineConfig(enable_hf=False)).sanitize_record(record)
+    assert "example.com" not in result.record.encounter_notes
+    assert result.verification_ok
+
+
+def test_hidden_match_running_past_its_span_matches_per_pattern_scans() -> None:
+    # The date hides "2020@ex.com", which runs past it; the email scan must resume after it.
+    date = RulePattern(
+        name="date", entity_type="DATE", regex=re.compile(r"\b\d{1,2}/\d{1,2}/\d{4}\b"), description="date"
+    )
+    scanner = PatternScanner([date, *default_scanner().patterns])
+    text = "12/03/2020@ex.com.@ex.com"
+    expected = sorted(
+        [("date", m.start(), m.end()) for m in date.regex.finditer(text)] + _per_pattern(text), key=lambda s: s[1]
+    )
+    assert [(m.name, m.start, m.end) for m in scanner.scan(text)] == expected
+
+
+def test_hidden_matches_in_long_spans_match_per_pattern_scans() -> None:
+    # Spans longer than one windowed check are tried position by position instead.
+    for local in ("a." * 400 + "5551234567", "a." * 10 + "5551234567"):
+        text = f"mail {local}@clinic.org now"
+        assert [(m.name, m.start, m.end) for m in default_scanner().scan(text)] == _per_pattern(text)
+
+
+def test_counters_exact_under_concurrent_scans() -> None:
+    scanner = PatternScanner(default_scanner().patterns)
+    text = "Call (555) 123-4567 or a@b.com"
+    threads = [threading.Thread(target=lambda: [scanner.scan(text) for _ in range(500)]) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert scanner.stats()["texts"] == 4000
+    assert scanner.pattern_stats() == {
+        "email": {"hits": 4000, "prefilter_skips": 0},
+        "phone": {"hits": 4000, "prefilter_skips": 0},
+    }
+
+
+def test_names_in() -> None:
+    scanner = default_scanner()
+    assert scanner.names_in("a@b.com and (555) 123-4567") == {"email", "phone"}
+    assert scanner.names_in("nothing") == set()
+
+
+def test_registered_pattern_reaches_detection_and_verification() -> None:
+    from tests.test_verify import _record
+
+    register_pattern(
+        RulePattern(name="case_ref", entity_type="UNKNOWN", regex=re.compile(r"\bcase-\d{6}\b", re.I), description="case-id")
+    )
+    try:
+        record = _record("See CASE-123456 and a@b.com")
+        findings = RuleBasedDetector().detect(record)
+        assert [(f.entity_type, f.text) for f in findings] == [("EMAIL", "a@b.com"), ("UNKNOWN", "CASE-123456")]
+        ok, issues = verify_basic(record)
+        assert not ok
+        assert issues == [
+            "encounter_notes still contains an email-like pattern",
+            "encounter_notes still contains a case-id pattern",
+        ]
+    finally:
+        unregister_pattern("case_ref")
+    assert [p.name for p in default_scanner().patterns] == ["email", "phone"]
+
+
+def test_invalid_patterns_rejected() -> None:
+    email = RulePattern(name="email", entity_type="EMAIL", regex=EMAIL_RE, description="email-like")
+    with pytest.raises(ValueError):
+        PatternScanner([email, email])
+    with pytest.raises(ValueError):
+        register_pattern(RulePattern(name="bad name", entity_type="X", regex=re.compile("x"), description="x"))
+    with pytest.raises(ValueError):
+        PatternScanner([RulePattern(name="ascii", entity_type="X", regex=re.compile("x", re.ASCII), description="x")])
+    assert PatternScanner([]).scan("a@b.com") == []
+
+
+def test_scan_batch_matches_per_text_scan() -> None:
+    scanner = default_scanner()
+    texts = [lr.record.encounter_notes for lr in generate_labeled_records(count=200, seed=9, difficulty="hard")]
+    texts[3] = ""
+    texts[4] = "ends with a phone 555-123-4567"
+    texts[5] = "(555) 123-4567 starts this one\x00and a@b.com after a NUL"
+    assert scanner.scan_batch(texts) == [scanner.scan(t) for t in texts]
+
+
+def test_scan_batch_rescans_texts_a_match_crossed() -> None:
+    scanner = PatternScanner(
+        [RulePattern(name="tail", entity_type="UNKNOWN", regex=re.compile(r"end[\s\S]{3}"), description="tail")]
+    )
+    texts = ["the end", "xyz", "no match", "the end of it"]
+    assert scanner.scan_batch(texts) == [scanner.scan(t) for t in texts]
+
+
+def test_rule_detect_batch_matches_detect() -> None:
+    records = [lr.record for lr in generate_labeled_records(count=30, seed=2, difficulty="hard")]
+    detector = RuleBasedDetector()
+    assert detector.detect_batch(records) == [detector.detect(r) for r in records]
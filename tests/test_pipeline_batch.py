@@ -0,0 +1,90 @@
+"""Tests for batched sanitization (sanitize_batch / predict_batch) against the per-record path."""
+from __future__ import annotations
+
+from typing import List, Sequence
+
+import pytest
+
+pytest.importorskip("transformers", reason="HF detector imports transformers")
+
+from stupiphi.detection.hf_detector import HFDetector
+from stupiphi.evals.labeled_dataset import generate_labeled_records
+from stupiphi.models.hf_runner import HFEntity, HFTokenClassifier
+from stupiphi.sanitizer.pipeline import PipelineConfig, SanitizationPipeline
+
+
+class FakeClassifier:
+    """Tags every capitalized word as PER; records how it was called."""
+
+    def __init__(self) -> None:
+        self.batch_calls: List[int] = []
+
+    def predict(self, text: str) -> List[HFEntity]:
+        entities: List[HFEntity] = []
+        pos = 0
+        for word in text.split(" "):
+            if word[:1].isupper():
+                entities.append(HFEntity(label="PER", start=pos, end=pos + len(word), score=0.9, text=word))
+            pos += len(word) + 1
+        return entities
+
+    def predict_batch(self, texts: Sequence[str], batch_size: int = 8) -> List[List[HFEntity]]:
+        self.batch_calls.append(len(texts))
+        return [self.predict(t) for t in texts]
+
+
+def _pipeline(classifier: FakeClassifier) -> SanitizationPipeline:
+    pipeline = SanitizationPipeline(PipelineConfig(faker_seed=99, enable_hf=False))
+    pipeline.hf = HFDetector(min_confidence=0.4, classifier=classifier)  # type: ignore[arg-type]
+    return pipeline
+
+
+def test_sanitize_batch_matches_sanitize_record() -> None:
+    classifier = FakeClassifier()
+    pipeline = _pipeline(classifier)
+    records = [lr.record for lr in generate_labeled_records(count=7, seed=5, difficulty="hard")]
+
+    single_payloads: list = []
+    batch_payloads: list = []
+    expected = [pipeline.sanitize_record(r, audit_sink=single_payloads.append) for r in records]
+    got = pipeline.sanitize_batch(records, batch_size=3, audit_sink=batch_payloads.append)
+
+    assert got == expected
+    assert batch_payloads == single_payloads
+    assert classifier.batch_calls == [3, 3, 1]
+
+
+def test_sanitize_batch_empty() -> None:
+    assert _pipeline(FakeClassifier()).sanitize_batch([]) == []
+
+
+def test_predict_batch_matches_predict(tiny_ner_model_dir: str) -> None:
+    clf = HFTokenClassifier(model_name=tiny_ner_model_dir)
+    texts = [
+        "Patient John Smith reports headache.",
+        "",
+        "Call 555-123-4567 to follow up",
+        "   ",
+        "Smith",
+    ]
+    batched = clf.predict_batch(texts, batch_size=2)
+    assert len(batched) == len(texts)
+    for text, ents in zip(texts, batched):
+        single = clf.predict(text)
+        assert [(e.label, e.start, e.end, e.text) for e in ents] == [
+            (e.label, e.start, e.end, e.text) for e in single
+        ]
+        assert [e.score for e in ents] == pytest.approx([e.score for e in single], abs=1e-5)
+
+
+def test_quantized_torch_classifier_predicts(tiny_ner_model_dir: str) -> None:
+    import torch
+
+    clf = HFTokenClassifier(model_name=tiny_ner_model_dir, quantized=True)
+    assert any(
+        isinstance(m, torch.ao.nn.quantized.dynamic.Linear) for m in clf._pipe.model.modules()
+    )
+    texts = ["Patient John Smith reports headache.", ""]
+    batched = clf.predict_batch(texts)
+    assert batched[1] == []
+    assert all(e.text == texts[0][e.start:e.end] for e in batched[0])
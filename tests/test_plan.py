@@ -74,3 +74,34 @@ def test_build_conservative_plan_ignores_missing_spans() -> None:
     ]
     plan = build_conservative_plan(record_id="r1", findings=findings)
     assert len(plan.actions) == 0
+
+
+def _note_finding(start: int, end: int, entity_type: str = "NAME", source: str = "rule", confidence: float = 0.9) -> Finding:
+    return Finding(
+        field_path="encounter_notes",
+        entity_type=entity_type,
+        confidence=confidence,
+        detector_source=source,
+        start=start,
+        end=end,
+    )
+
+
+def test_build_conservative_plan_merges_overlapping_and_adjacent_spans() -> None:
+    findings = [
+        _note_finding(10, 30, "EMAIL", "rule", 1.0),
+        _note_finding(15, 22, "ORG", "huggingface", 0.7),
+        _note_finding(30, 35, "NAME", "known", 1.0),  # adjacent to the email
+        _note_finding(50, 55, "NAME", "huggingface", 0.8),
+    ]
+    plan = build_conservative_plan(record_id="r1", findings=findings)
+    assert [(a.start, a.end) for a in plan.actions] == [(50, 55), (10, 35)]
+    merged = plan.actions[1]
+    assert merged.entity_type == "EMAIL"
+    assert merged.reason == "redact detected entity_type=EMAIL,ORG,NAME source=rule,huggingface,known"
+
+
+def test_build_conservative_plan_merges_nested_chain() -> None:
+    findings = [_note_finding(0, 100), _note_finding(5, 10), _note_finding(90, 120), _note_finding(121, 125)]
+    plan = build_conservative_plan(record_id="r1", findings=findings)
+    assert [(a.start, a.end) for a in plan.actions] == [(121, 125), (0, 120)]
@@ -0,0 +1,94 @@
+"""Tests for the pseudonym vault and bulk pseudonym resolution."""
+from __future__ import annotations
+
+import sqlite3
+from dataclasses import replace
+
+from stupiphi.models.canonical_record import CanonicalRecord, Metadata, PatientInfo
+from stupiphi.sanitizer.pipeline import PipelineConfig, SanitizationPipeline
+from stupiphi.slice.apply_db_policy import apply_db_policy_to_row
+from stupiphi.transformation.pseudonym_vault import PseudonymVault
+from stupiphi.transformation.pseudonymizer import stable_pseudonym, stable_pseudonyms
+
+ITEMS = [
+    ("patient.first_name", "Alice", "first_name"),
+    ("patient.email", "alice@example.com", "email"),
+    ("patient.first_name", "Alice", "first_name"),  # duplicate within one batch
+]
+
+
+def test_bulk_without_vault_matches_single_calls() -> None:
+    out = stable_pseudonyms("salt", ITEMS)
+    assert out == [stable_pseudonym("salt", path, value, kind) for path, value, kind in ITEMS]
+
+
+def test_vault_stores_issued_pseudonyms_and_counts_hits() -> None:
+    vault = PseudonymVault(max_entries=100)
+    first = stable_pseudonyms("salt", ITEMS, vault)
+    assert first == stable_pseudonyms("salt", ITEMS)
+    assert vault.stats()["misses"] == 2 and vault.stats()["puts"] == 2
+
+    assert stable_pseudonyms("salt", ITEMS, vault) == first
+    stats = vault.stats()
+    assert stats["memory_hits"] == 2
+    assert stats["entries"] == 2
+    assert stats["hit_rate"] == 0.5
+
+
+def test_vault_pins_pseudonyms_across_runs(tmp_path) -> None:
+    path = tmp_path / "vault.sqlite3"
+    vault = PseudonymVault(path=path)
+    vault.put_many({"a" * 64: "Pinned"})
+    vault.close()
+
+    reopened = PseudonymVault(max_entries=0, path=path)
+    assert reopened.get_many(["a" * 64, "b" * 64]) == {"a" * 64: "Pinned"}
+    stats = reopened.stats()
+    assert stats["disk_hits"] == 1 and stats["misses"] == 1 and stats["disk_entries"] == 1
+
+
+def test_vault_file_holds_no_original_values(tmp_path) -> None:
+    path = tmp_path / "vault.sqlite3"
+    vault = PseudonymVault(path=path)
+    stable_pseudonyms("salt", ITEMS, vault)
+    vault.close()
+    rows = sqlite3.connect(str(path)).execute("SELECT key, pseudonym FROM pseudonyms").fetchall()
+    assert len(rows) == 2
+    assert not any("Alice" in k or "alice@" in p for k, p in rows)
+
+
+def test_vault_keeps_first_pseudonym_issued(tmp_path) -> None:
+    vault = PseudonymVault(max_entries=0, path=tmp_path / "vault.sqlite3")
+    vault.put_many({"a" * 64: "First"})
+    vault.put_many({"a" * 64: "Second"})
+    assert vault.get_many(["a" * 64]) == {"a" * 64: "First"}
+
+
+def test_db_policy_row_uses_vault() -> None:
+    vault = PseudonymVault()
+    policy = {"therapists": {"first_name": "pseudonymize", "email": "pseudonymize", "id": "preserve"}}
+    row = {"id": 3, "first_name": "Dana", "email": "dana@clinic.org"}
+    out = apply_db_policy_to_row("therapists", row, policy, "salt", vault=vault)
+    assert list(out) == ["id", "first_name", "email"]
+    assert out == apply_db_policy_to_row("therapists", row, policy, "salt")
+    assert vault.stats()["puts"] == 2
+    apply_db_policy_to_row("therapists", row, policy, "salt", vault=vault)
+    assert vault.stats()["hits"] == 2
+
+
+def test_pipeline_uses_vault_only_with_salt(tmp_path) -> None:
+    base = PipelineConfig(enable_hf=False, cache_dir=str(tmp_path), pseudonym_vault=True)
+    assert SanitizationPipeline(base).pseudonym_vault is None
+
+    pipeline = SanitizationPipeline(replace(base, pseudonym_salt="s"))
+    assert pipeline.pseudonym_vault is not None
+    record = CanonicalRecord(
+        record_id="r1",
+        patient=PatientInfo("Jane", "Doe", "1990-01-15", "555-111-2222", "1 Main St", "jane@x.org"),
+        encounter_notes="Seen today.",
+        metadata=Metadata(source="test", created_at="2024-01-01T00:00:00Z"),
+    )
+    first = pipeline.sanitize_record(record).record.patient
+    assert pipeline.sanitize_record(record).record.patient == first
+    assert (tmp_path / "pseudonym_vault.sqlite3").exists()
+    assert pipeline.pseudonym_vault.stats()["hits"] >= 5
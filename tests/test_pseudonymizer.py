@@ -0,0 +1,52 @@
+"""Unit tests for the table-backed stable pseudonymizer."""
+from __future__ import annotations
+
+import re
+
+import pytest
+
+from stupiphi.transformation.pseudonym_vocab import FIRST_NAMES, LAST_NAMES, STATES
+from stupiphi.transformation.pseudonymizer import stable_pseudonym
+
+KINDS = ("first_name", "last_name", "phone", "address", "email")
+
+
+@pytest.mark.parametrize("kind", KINDS)
+def test_same_inputs_same_output(kind: str) -> None:
+    a = stable_pseudonym("salt", f"patient.{kind}", "Alice Smith", kind)
+    b = stable_pseudonym("salt", f"patient.{kind}", "Alice Smith", kind)
+    assert a == b
+
+
+@pytest.mark.parametrize("kind", ("phone", "address", "email"))
+def test_salt_field_and_value_all_change_output(kind: str) -> None:
+    base = stable_pseudonym("salt", "patient.x", "value", kind)
+    assert stable_pseudonym("other-salt", "patient.x", "value", kind) != base
+    assert stable_pseudonym("salt", "patient.y", "value", kind) != base
+    assert stable_pseudonym("salt", "patient.x", "value2", kind) != base
+
+
+def test_names_come_from_vocab() -> None:
+    firsts = {stable_pseudonym("s", "patient.first_name", str(i), "first_name") for i in range(200)}
+    lasts = {stable_pseudonym("s", "patient.last_name", str(i), "last_name") for i in range(200)}
+    assert firsts <= set(FIRST_NAMES) and len(firsts) > 100
+    assert lasts <= set(LAST_NAMES) and len(lasts) > 100
+
+
+def test_phone_address_email_shapes() -> None:
+    for i in range(100):
+        phone = stable_pseudonym("s", "patient.phone", str(i), "phone")
+        assert len(re.sub(r"\D", "", phone.replace("+1-", ""))) == 10
+        assert re.sub(r"\D", "", phone.replace("+1-", ""))[0] in "23456789"
+
+        address = stable_pseudonym("s", "patient.address", str(i), "address")
+        m = re.fullmatch(r"\d{1,5} [A-Za-z]+ [A-Za-z]+, [A-Za-z ]+, ([A-Z]{2}) \d{5}", address)
+        assert m and m.group(1) in STATES
+
+        email = stable_pseudonym("s", "patient.email", str(i), "email")
+        assert re.fullmatch(r"[a-z]+\.[a-z]+\d{1,2}@example\.(com|org|net)", email)
+
+
+def test_unknown_kind_falls_back_to_hash_placeholder() -> None:
+    out = stable_pseudonym("s", "therapists.notes", "v", "other")
+    assert re.fullmatch(r"x[0-9a-f]{8}", out)
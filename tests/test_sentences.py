@@ -0,0 +1,23 @@
+"""Tests for the heuristic sentence splitter used by the per-sentence NER memo."""
+from __future__ import annotations
+
+from stupiphi.detection.sentences import split_sentences
+
+
+def _split(text: str) -> list:
+    return [text[s:e] for s, e in split_sentences(text)]
+
+
+def test_splits_on_terminators_and_newlines() -> None:
+    text = "Patient reports headache. Vitals stable!\nFollow-up scheduled?  ok"
+    assert _split(text) == ["Patient reports headache.", "Vitals stable!", "Follow-up scheduled?", "ok"]
+
+
+def test_titles_and_initials_do_not_split() -> None:
+    text = "Seen by Dr. Smith today. J. Doe called."
+    assert _split(text) == ["Seen by Dr. Smith today.", "J. Doe called."]
+
+
+def test_decimals_and_blank_text() -> None:
+    assert _split("Temp 98.6 today.") == ["Temp 98.6 today."]
+    assert split_sentences("   \n ") == []
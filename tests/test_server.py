@@ -0,0 +1,155 @@
+"""Tests for `stupiphi serve`: remote results match a local pipeline over TCP and Unix sockets."""
+from __future__ import annotations
+
+import http.client
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Iterator, List
+
+import pytest
+
+from stupiphi.evals.labeled_dataset import generate_labeled_records
+from stupiphi.sanitizer.pipeline import SanitizationPipeline
+from stupiphi.server import PipelineCache, RemotePipeline, SanitizationServer, ServerError, request
+
+
+@pytest.fixture
+def config_path(tmp_path: Path) -> str:
+    path = tmp_path / "config.yaml"
+    path.write_text("detectors:\n  hf:\n    enabled: false\nfaker_seed: 5\n", encoding="utf-8")
+    return str(path)
+
+
+@pytest.fixture(params=["tcp", "unix"])
+def server(request: pytest.FixtureRequest, tmp_path: Path, config_path: str) -> Iterator[SanitizationServer]:
+    address = "http://127.0.0.1:0" if request.param == "tcp" else f"unix:{tmp_path / 's.sock'}"
+    srv = SanitizationServer(address, pipelines=PipelineCache(micro_batch_size=0), configs=[config_path])
+    thread = threading.Thread(target=srv.serve_forever, daemon=True)
+    thread.start()
+    yield srv
+    srv.shutdown()
+    thread.join()
+
+
+def _records(count: int = 5):
+    return [lr.record for lr in generate_labeled_records(count=count, seed=11, difficulty="hard")]
+
+
+def test_remote_matches_local(server: SanitizationServer, config_path: str) -> None:
+    local = SanitizationPipeline.from_yaml(config_path)
+    remote = RemotePipeline(server.address, config_path)
+    records = _records()
+
+    expected_audit: list = []
+    got_audit: list = []
+    assert remote.sanitize_batch(records, audit_sink=got_audit.append) == local.sanitize_batch(
+        records, audit_sink=expected_audit.append
+    )
+    assert got_audit == expected_audit
+    assert remote.sanitize_record(records[0]) == local.sanitize_record(records[0])
+
+    assert request(server.address, "/health") == {"ok": True, "pipelines": 1}
+
+
+def test_pipeline_is_reused_until_config_changes(config_path: str) -> None:
+    cache = PipelineCache(micro_batch_size=0)
+    first = cache.get(config_path)
+    assert cache.get(config_path) is first
+
+    path = Path(config_path)
+    path.write_text(path.read_text(encoding="utf-8") + "faker_seed: 6\n", encoding="utf-8")
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert cache.get(config_path) is not first
+    assert len(cache) == 1
+
+
+def test_replaced_pipeline_closed_after_last_request(config_path: str) -> None:
+    cache = PipelineCache(micro_batch_size=0)
+    closed: List[str] = []
+
+    def touch() -> None:
+        path = Path(config_path)
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    with cache.use(config_path) as first:
+        first.close = lambda: closed.append("first")  # type: ignore[method-assign]
+        touch()
+        second = cache.get(config_path)
+        second.close = lambda: closed.append("second")  # type: ignore[method-assign]
+        assert second is not first
+        assert closed == []  # still serving the request that picked it up
+    assert closed == ["first"]
+
+    touch()
+    assert cache.get(config_path) is not second
+    assert closed == ["first", "second"]  # nothing was using it
+
+
+def test_server_turns_on_micro_batching() -> None:
+    pipelines = PipelineCache(micro_batch_size=8, micro_batch_wait_ms=2.0)
+    assert pipelines._config("").hf_micro_batch_size == 8
+
+
+def test_errors(server: SanitizationServer, config_path: str) -> None:
+    with pytest.raises(ServerError) as exc:
+        request(server.address, "/sanitize", {"config": config_path, "record": {"record_id": "x"}})
+    assert exc.value.status == 400
+    with pytest.raises(ServerError) as exc:
+        request(server.address, "/nope", {})
+    assert exc.value.status == 404
+
+
+@pytest.fixture
+def tcp_server(config_path: str) -> Iterator[SanitizationServer]:
+    srv = SanitizationServer("http://127.0.0.1:0", pipelines=PipelineCache(micro_batch_size=0), configs=[config_path])
+    thread = threading.Thread(target=srv.serve_forever, daemon=True)
+    thread.start()
+    yield srv
+    srv.shutdown()
+    thread.join()
+
+
+def _raw_post(server: SanitizationServer, path: str, body: dict, headers: dict) -> int:
+    host, port = server.address[len("http://"):].rsplit(":", 1)
+    conn = http.client.HTTPConnection(host, int(port), timeout=10)
+    try:
+        conn.request("POST", path, json.dumps(body), headers)
+        response = conn.getresponse()
+        response.read()
+        return response.status
+    finally:
+        conn.close()
+
+
+def test_browser_requests_refused(tcp_server: SanitizationServer, config_path: str) -> None:
+    body = {"config": config_path, "record": _records(1)[0].to_dict()}
+    json_type = {"Content-Type": "application/json"}
+    assert _raw_post(tcp_server, "/sanitize", body, json_type) == 200
+    # A cross-origin page can send text/plain without a preflight.
+    assert _raw_post(tcp_server, "/sanitize", body, {"Content-Type": "text/plain"}) == 415
+    assert _raw_post(tcp_server, "/sanitize", body, {**json_type, "Origin": "https://evil.example"}) == 403
+    # DNS rebinding: a page on attacker.example resolved to 127.0.0.1 still sends its own Host.
+    assert _raw_post(tcp_server, "/sanitize", body, {**json_type, "Host": "attacker.example:8765"}) == 403
+
+
+def test_only_startup_configs_and_no_report_out(server: SanitizationServer, config_path: str, tmp_path: Path) -> None:
+    other = tmp_path / "other.yaml"
+    other.write_text(Path(config_path).read_text(encoding="utf-8"), encoding="utf-8")
+    record = _records(1)[0].to_dict()
+    for body in ({"config": str(other), "record": record}, {"record": record}):
+        with pytest.raises(ServerError) as exc:
+            request(server.address, "/sanitize", body)
+        assert exc.value.status == 403
+    with pytest.raises(ServerError) as exc:
+        request(server.address, "/transfer-case", {"config": config_path, "case_id": 1, "report_out": str(tmp_path / "r")})
+    assert exc.value.status == 400
+    assert not (tmp_path / "r").exists()
+
+
+def test_non_loopback_bind_refused() -> None:
+    with pytest.raises(ValueError):
+        SanitizationServer("http://0.0.0.0:0")